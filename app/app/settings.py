@@ -51,6 +51,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",
+    "django.contrib.postgres",
     "core",
     "rest_framework",
     "rest_framework.authtoken",
@@ -62,6 +63,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.TrafficCaptureMiddleware",
+    "core.middleware.ServerTimingMiddleware",
+    "core.middleware.QueryObserverMiddleware",
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.ReplicaRoutingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -72,10 +78,56 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django.contrib.sites.middleware.CurrentSiteMiddleware",
+    "core.middleware.ProfilingMiddleware",
+    "core.middleware.MemoryProfilingMiddleware",
+    "core.middleware.NPlusOneMiddleware",
 ]
 
 SITE_ID = 1
 
+# sampled capture of the journal and user API traffic, replayed with the
+# replay_traffic command
+TRAFFIC_CAPTURE = bool(int(os.environ.get("TRAFFIC_CAPTURE", 0)))
+TRAFFIC_CAPTURE_DIR = os.environ.get("TRAFFIC_CAPTURE_DIR", "/vol/journalweb/traffic")
+TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.environ.get("TRAFFIC_CAPTURE_SAMPLE_RATE", 0.1))
+TRAFFIC_CAPTURE_MAX_BYTES = int(os.environ.get("TRAFFIC_CAPTURE_MAX_BYTES", 50_000_000))
+TRAFFIC_CAPTURE_BACKUP_COUNT = int(os.environ.get("TRAFFIC_CAPTURE_BACKUP_COUNT", 5))
+
+# share of the requests reporting their timings in a Server-Timing header
+SERVER_TIMING_SAMPLE_RATE = float(os.environ.get("SERVER_TIMING_SAMPLE_RATE", 0))
+
+# query fingerprint statistics of every worker, read by the query_report command
+QUERY_OBSERVER = bool(int(os.environ.get("QUERY_OBSERVER", 0)))
+QUERY_OBSERVER_DIR = os.environ.get("QUERY_OBSERVER_DIR", "/vol/journalweb/queries")
+QUERY_OBSERVER_FLUSH_INTERVAL = int(os.environ.get("QUERY_OBSERVER_FLUSH_INTERVAL", 60))
+
+# prometheus metrics served at /api/metrics, the workers share them through
+# METRICS_DIR which should be emptied when the server starts
+METRICS = bool(int(os.environ.get("METRICS", 0)))
+METRICS_DIR = os.environ.get("METRICS_DIR", "/vol/journalweb/metrics")
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 1))
+# bearer token of the scrapers, without one only the admins read the metrics
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# seconds a worker reuses the result of the readiness probes
+HEALTH_CHECK_CACHE_SECONDS = float(os.environ.get("HEALTH_CHECK_CACHE_SECONDS", 5))
+
+# profiling of the requests sent with ?profile=1 by staff users
+PROFILING = bool(int(os.environ.get("PROFILING", 0)))
+PROFILING_DIR = os.environ.get("PROFILING_DIR", "/vol/journalweb/profiles")
+PROFILING_SAMPLE_INTERVAL = float(os.environ.get("PROFILING_SAMPLE_INTERVAL", 0.005))
+
+# tracemalloc sessions of a worker started by admins at /api/memory/start
+MEMORY_PROFILING = bool(int(os.environ.get("MEMORY_PROFILING", 0)))
+MEMORY_PROFILING_DIR = os.environ.get("MEMORY_PROFILING_DIR", "/vol/journalweb/memory")
+MEMORY_PROFILING_TOP = int(os.environ.get("MEMORY_PROFILING_TOP", 25))
+
+# off, log or raise for the queries a request repeats more than the threshold,
+# the test runner raises
+NPLUSONE_DETECTION = os.environ.get("NPLUSONE_DETECTION", "log" if DEBUG else "off")
+NPLUSONE_THRESHOLD = int(os.environ.get("NPLUSONE_THRESHOLD", 10))
+TEST_RUNNER = "core.test_runner.TestRunner"
+
 ROOT_URLCONF = "app.urls"
 
 TEMPLATES = [
@@ -128,17 +180,56 @@ CORS_ALLOW_HEADERS = ["X-Custom-Header", "Authorization", "Content-Type"]
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# the connections are kept DB_CONN_MAX_AGE seconds and checked before a request
+# reuses them, with DB_POOL the threads of a worker share a pool of them instead
+DB_POOL = bool(int(os.environ.get("DB_POOL", 0)))
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": (
+            "core.backends.postgresql_pool"
+            if DB_POOL
+            else "django.db.backends.postgresql"
+        ),
         "HOST": os.environ.get("DB_HOST"),
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASS"),
         "PORT": int(os.environ.get("DB_PORT", 5432)),
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": bool(int(os.environ.get("DB_CONN_HEALTH_CHECKS", 1))),
+        "POOL": {
+            "MIN_SIZE": int(os.environ.get("DB_POOL_MIN_SIZE", 1)),
+            "MAX_SIZE": int(os.environ.get("DB_POOL_MAX_SIZE", 4)),
+            "TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            "MAX_IDLE": float(os.environ.get("DB_POOL_MAX_IDLE", 300)),
+        },
     }
 }
 
+# read replicas at the comma separated DB_REPLICA_HOSTS, host or host:port, the
+# safe requests read from, setting the primary's host gives two aliases of the
+# same database locally
+DATABASE_REPLICAS = []
+for index, replica_host in enumerate(
+    filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(","))
+):
+    replica_host, _, replica_port = replica_host.partition(":")
+    DATABASE_REPLICAS.append(f"replica_{index + 1}")
+    DATABASES[f"replica_{index + 1}"] = {
+        **DATABASES["default"],
+        "HOST": replica_host,
+        "PORT": int(replica_port or DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+
+# seconds the reads of credentials which wrote stay on the primary, shared by
+# the workers through REPLICA_STICKY_DIR
+REPLICA_STICKY_SECONDS = float(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+REPLICA_STICKY_DIR = os.environ.get("REPLICA_STICKY_DIR", "/vol/journalweb/replicas")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -203,6 +294,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.TimedJSONRenderer",
+        "core.renderers.TimedBrowsableAPIRenderer",
+    ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "user.authentication.ExpiringTokenAuthentication",
     ),
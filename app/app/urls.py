@@ -29,7 +29,12 @@ urlpatterns = [
     re_path("api/docs/",SpectacularSwaggerView.as_view(url_name="api-schema"),name="api-docs"),
     re_path("api/user/",include("user.urls")),
     re_path("api/journal/", include("journal.urls")),
+    re_path("api/healthcheck/ready", core_views.readiness_check,name="readiness"),
     re_path("api/healthcheck", core_views.health_check,name="healthcheck"),
+    re_path("api/metrics", core_views.metrics,name="metrics"),
+    re_path("api/memory/start", core_views.memory_start,name="memory-start"),
+    re_path("api/memory/stop", core_views.memory_stop,name="memory-stop"),
+    re_path("api/memory", core_views.memory_reports,name="memory"),
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL,document_root=settings.MEDIA_ROOT)
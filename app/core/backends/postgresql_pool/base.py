@@ -0,0 +1,43 @@
+"""
+PostgreSQL engine taking its connections from the worker's pool and
+returning them to it on close, configured by the POOL entry of the database
+settings
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from core.pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.settings_dict["CONN_MAX_AGE"]:
+            raise ImproperlyConfigured(
+                "CONN_MAX_AGE must be 0 with the pooled engine, the connections "
+                "are kept open by the pool and returned to it after every request"
+            )
+        self.pool = None
+
+    def get_new_connection(self, conn_params):
+        def connect():
+            return super(DatabaseWrapper, self).get_new_connection(conn_params)
+
+        self.pool = get_pool(self.alias, conn_params, self.settings_dict)
+        self.pool.fill(connect)
+        connection = self.pool.getconn(connect)
+        # set by the parent when opening a connection, the isolation level of
+        # the OPTIONS was applied to the connection then
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
+                # the connection may be handed to another thread from now on
+                self.connection = None
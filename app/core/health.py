@@ -0,0 +1,91 @@
+"""
+Readiness probes of the API dependencies, cached in process so the load
+balancer polling does not add load on them
+"""
+import os
+import threading
+import time
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db import connection, Error as DatabaseError
+from django.db.migrations.executor import MigrationExecutor
+from core.pool import get_pool_stats
+
+# caches of a single worker, probing them tells nothing of the other workers
+LOCAL_CACHE_BACKENDS = [
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+]
+
+_readiness = {}
+_readiness_lock = threading.Lock()
+
+
+def probe_database():
+    start_time = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    result = {"latency_ms": round((time.perf_counter() - start_time) * 1000, 3)}
+    pool_stats = get_pool_stats()
+    if pool_stats:
+        result["pools"] = pool_stats
+    return result
+
+
+def probe_migrations():
+    # the migrations of the running code stay applied, a worker loads the
+    # migration graph until it finds none pending
+    if not _readiness.get("migrated"):
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if plan:
+            raise RuntimeError(f"{len(plan)} unapplied migrations")
+        _readiness["migrated"] = True
+    return {"unapplied": 0}
+
+
+def probe_cache():
+    if settings.CACHES[DEFAULT_CACHE_ALIAS]["BACKEND"] in LOCAL_CACHE_BACKENDS:
+        return {"status": "not configured"}
+    key = f"readiness-{os.getpid()}"
+    cache.set(key, key, 10)
+    if cache.get(key) != key:
+        raise RuntimeError("The cache did not return the value set")
+    return {}
+
+
+PROBES = {
+    "database": probe_database,
+    "migrations": probe_migrations,
+    "cache": probe_cache,
+}
+
+
+def run_probes():
+    checks = {}
+    for name, probe in PROBES.items():
+        try:
+            checks[name] = {"healthy": True, **probe()}
+        except (DatabaseError, RuntimeError, OSError) as e:
+            checks[name] = {"healthy": False, "error": str(e)}
+    return {
+        "healthy": all(check["healthy"] for check in checks.values()),
+        "checks": checks,
+    }
+
+
+def get_readiness():
+    """
+    Return the result of the probes, run at most every
+    `HEALTH_CHECK_CACHE_SECONDS` seconds by each worker
+    """
+    with _readiness_lock:
+        checked = _readiness.get("checked")
+        if (
+            checked is None
+            or time.monotonic() - checked >= settings.HEALTH_CHECK_CACHE_SECONDS
+        ):
+            _readiness["result"] = run_probes()
+            _readiness["checked"] = time.monotonic()
+        return _readiness["result"]
@@ -0,0 +1,9 @@
+"""
+Latency summaries of the benchmark and replay commands
+"""
+import numpy as np
+
+
+def get_percentiles(values):
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3)}
@@ -0,0 +1,454 @@
+"""
+Django command to benchmark the API in process on generated data
+"""
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.latency import get_percentiles
+from core.models import (
+    Journal,
+    JournalTables,
+    Activities,
+    Intentions,
+    Happenings,
+    GratefulFor,
+    ActionItems,
+    Tags,
+)
+from journal.autocomplete import Trie
+from journal.config import get_table_defaults
+from journal.counters import reconcile_table_counters, reconcile_tags_usage
+from journal.rollups import rebuild_daily_rollups
+from journal.search import refresh_search_documents
+
+SUBMODEL_FIELDS = [
+    (Intentions, "intention"),
+    (Happenings, "happening"),
+    (GratefulFor, "grateful_for"),
+    (ActionItems, "action_item"),
+]
+
+WORDS = ["work", "family", "run", "read", "call", "plan", "cook", "write", "walk"]
+
+
+class Rollback(Exception):
+    pass
+
+
+def get_bench_tables(journal, count):
+    """
+    Return the defaults of the journal's virtual table and `count` tables,
+    the default tables followed by generated ones
+    """
+    defaults = get_table_defaults(journal)
+    tables = [table for table in defaults if table.get("is_virtual")]
+    tables += [table for table in defaults if not table.get("is_virtual")][:count]
+    tables += [
+        {"journal": journal, "table_name": f"Bench table {i}"}
+        for i in range(len(tables), count + 1)
+    ]
+    return tables
+
+
+def get_request_mix(user_data):
+    """
+    Return the (name, weight, method, url, data) of the replayed calls for a
+    generated user, weighted like the web client's traffic
+    """
+    journal, table, virtual_table, activity_ids, tag_ids = user_data
+    activity_id = random.choice(activity_ids)
+
+    def url(name, *args):
+        return reverse(name, args=args)
+
+    return [
+        ("journal detail", 10, "get", url("journal:journal-detail", journal), None),
+        (
+            "journal table detail",
+            25,
+            "get",
+            url("journal:journaltables-detail", table),
+            None,
+        ),
+        (
+            "journal table page",
+            10,
+            "get",
+            url("journal:journaltables-detail", table) + "?page=1",
+            None,
+        ),
+        (
+            "virtual journal table page",
+            10,
+            "get",
+            url("journal:journaltables-detail", virtual_table) + "?page=1",
+            None,
+        ),
+        ("tags list", 5, "get", url("journal:tags-list"), None),
+        (
+            "activities autocomplete",
+            5,
+            "get",
+            url("journal:activities-autocomplete") + f"?q={random.choice(WORDS)}",
+            None,
+        ),
+        (
+            "journal search",
+            5,
+            "get",
+            url("journal:journal-search", journal) + f"?q={random.choice(WORDS)}",
+            None,
+        ),
+        ("journal calendar", 3, "get", url("journal:journal-calendar", journal), None),
+        ("journal stats", 2, "get", url("journal:journal-stats", journal), None),
+        (
+            "activities create",
+            10,
+            "post",
+            url("journal:activities-list"),
+            {"name": f"Bench {random.choice(WORDS)}", "journal_table": table},
+        ),
+        (
+            "activities update",
+            10,
+            "patch",
+            url("journal:activities-detail", activity_id),
+            {"name": f"Bench {random.choice(WORDS)}"},
+        ),
+        (
+            "activities batch update",
+            5,
+            "patch",
+            url("journal:activities-batch_update_activities"),
+            {
+                "activities_list": [
+                    {
+                        "ids": random.sample(activity_ids, min(3, len(activity_ids))),
+                        "tags": random.sample(tag_ids, min(2, len(tag_ids))),
+                    }
+                ]
+            },
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Generates users with their journals in bulk inside a transaction, replays
+    a weighted mix of API calls through the test client and reports the
+    latency, queries and allocations of every endpoint as JSON, then rolls
+    the data back
+    """
+
+    help = "Benchmark the API endpoints on generated data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5)
+        parser.add_argument(
+            "--tables", type=int, default=2, help="Tables per journal, at least 1"
+        )
+        parser.add_argument(
+            "--activities", type=int, default=200, help="Activities per table"
+        )
+        parser.add_argument("--tags", type=int, default=10, help="Tags per user")
+        parser.add_argument("--requests", type=int, default=500, help="Calls replayed")
+        parser.add_argument(
+            "--allocation-requests",
+            type=int,
+            default=5,
+            help="Calls per endpoint traced for allocations",
+        )
+        parser.add_argument(
+            "--trie-entries",
+            type=int,
+            default=100_000,
+            help="Entries of the benchmarked autocomplete trie, 0 to skip it",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report to a file")
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the generated data instead of rolling it back",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Entrypoint for command
+        """
+        if options["tables"] < 1:
+            raise CommandError("--tables must be at least 1")
+        random.seed(options["seed"])
+        try:
+            with transaction.atomic():
+                users = self.generate_data(options)
+                report = self.run_benchmark(users, options)
+                if not options["keep"]:
+                    raise Rollback()
+        except Rollback:
+            pass
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write(output)
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def generate_data(self, options):
+        """
+        Bulk create the users and their journals, returns the user and the ids
+        the replayed calls use
+        """
+        self.stderr.write("Generating data...")
+        start_time = time.perf_counter()
+        prefix = f"bench-{time.time_ns()}"
+
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(
+                email=f"{prefix}-{i}@example.com",
+                username=f"{prefix}-{i}",
+                password=make_password(None),
+            )
+            for i in range(options["users"])
+        )
+        journals = Journal.objects.bulk_create(
+            Journal(user=user, journal_name="Bench") for user in users
+        )
+        tables = JournalTables.objects.bulk_create(
+            JournalTables(**defaults)
+            for journal in journals
+            for defaults in get_bench_tables(journal, options["tables"])
+        )
+        tags = Tags.objects.bulk_create(
+            Tags(
+                tag_user=user,
+                tag_name=f"Tag {i}",
+                tag_color=Tags.Colors.GRAY,
+                tag_class=Tags.ColorsClasses.GRAY_CLASS,
+            )
+            for user in users
+            for i in range(options["tags"])
+        )
+        activities = Activities.objects.bulk_create(
+            Activities(
+                journal_table=table,
+                owner_id=table.journal.user_id,
+                name=" ".join(random.sample(WORDS, 3)),
+                ordering=i + 1,
+            )
+            for table in tables
+            if not table.is_virtual
+            for i in range(options["activities"])
+        )
+        for submodel, field in SUBMODEL_FIELDS:
+            submodel.objects.bulk_create(
+                submodel(
+                    activity=activity,
+                    owner_id=activity.owner_id,
+                    ordering=1,
+                    **{field: " ".join(random.sample(WORDS, 2))},
+                    **(
+                        {"checked": random.random() < 0.5}
+                        if submodel is ActionItems
+                        else {}
+                    ),
+                )
+                for activity in activities
+            )
+        user_tags = {}
+        for tag in tags:
+            user_tags.setdefault(tag.tag_user_id, []).append(tag.id)
+        ActivitiesTags = Activities.tags.through
+        ActivitiesTags.objects.bulk_create(
+            ActivitiesTags(activities_id=activity.id, tags_id=tag_id)
+            for activity in activities
+            for tag_id in random.sample(
+                user_tags[activity.owner_id], min(2, options["tags"])
+            )
+        )
+
+        # spread the activities over the past year, then fill what the signals
+        # would have maintained
+        journal_ids = [journal.id for journal in journals]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE core_activities
+                SET created = now() - random() * interval '365 days'
+                WHERE owner_id = ANY(%s)
+                """,
+                [[user.id for user in users]],
+            )
+        refresh_search_documents([activity.id for activity in activities])
+        rebuild_daily_rollups(journal_ids)
+        reconcile_table_counters(journal_ids)
+        reconcile_tags_usage([user.id for user in users])
+
+        elapsed = time.perf_counter() - start_time
+        self.stderr.write(f"Generated {len(activities)} activities in {elapsed:.1f}s")
+
+        users_data = []
+        for user, journal in zip(users, journals):
+            user_tables = [table for table in tables if table.journal_id == journal.id]
+            virtual_table = next(table for table in user_tables if table.is_virtual)
+            table = next(table for table in user_tables if not table.is_virtual)
+            activity_ids = [
+                activity.id for activity in activities if activity.owner_id == user.id
+            ]
+            users_data.append(
+                (
+                    user,
+                    (
+                        journal.id,
+                        table.id,
+                        virtual_table.id,
+                        activity_ids,
+                        user_tags[user.id],
+                    ),
+                )
+            )
+        return users_data
+
+    def call(self, client, method, url, data):
+        res = getattr(client, method)(url, data, format="json")
+        if res.streaming:
+            b"".join(res.streaming_content)
+        return res
+
+    def replay(self, users, options):
+        """
+        Replay the weighted calls, returns the latencies and query counts of
+        every endpoint
+        """
+        clients = []
+        for user, user_data in users:
+            client = APIClient()
+            client.force_authenticate(user)
+            clients.append((client, user_data))
+
+        results = {}
+        for _ in range(options["requests"]):
+            client, user_data = random.choice(clients)
+            mix = get_request_mix(user_data)
+            name, _, method, url, data = random.choices(
+                mix, weights=[call[1] for call in mix]
+            )[0]
+
+            with CaptureQueriesContext(connection) as queries:
+                start_time = time.perf_counter()
+                res = self.call(client, method, url, data)
+                elapsed = time.perf_counter() - start_time
+
+            result = results.setdefault(
+                name, {"latencies": [], "queries": [], "errors": 0}
+            )
+            result["latencies"].append(elapsed * 1000)
+            result["queries"].append(len(queries))
+            result["errors"] += int(res.status_code >= 400)
+        return results
+
+    def trace_allocations(self, users, options):
+        """
+        Return the peak memory allocated by each endpoint's calls, traced in
+        their own pass as tracing slows the calls down
+        """
+        client = APIClient()
+        user, user_data = users[0]
+        client.force_authenticate(user)
+
+        allocations = {}
+        tracemalloc.start()
+        try:
+            for name, _, method, url, data in get_request_mix(user_data):
+                peaks = []
+                for _ in range(options["allocation_requests"]):
+                    tracemalloc.reset_peak()
+                    baseline = tracemalloc.get_traced_memory()[0]
+                    self.call(client, method, url, data)
+                    peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+                allocations[name] = round(float(np.median(peaks)) / 1024, 1)
+        finally:
+            tracemalloc.stop()
+        return allocations
+
+    def bench_autocomplete_trie(self, entries):
+        """
+        Return the build time and the search latencies of the autocomplete
+        trie the workers fall back to without pg_trgm
+        """
+        self.stderr.write(f"Searching a trie of {entries} entries...")
+        start_time = time.perf_counter()
+        trie = Trie()
+        for i in range(entries):
+            trie.insert(f"Entry number {i} about topic{i % 977}", i)
+        build_time = time.perf_counter() - start_time
+
+        latencies = {}
+        for kind, texts in [
+            ("prefix", ["entry", "topic12", "entry number 9", "about"]),
+            ("fuzzy", ["entyr", "topcik", "abuot"]),
+        ]:
+            latencies[kind] = []
+            for _ in range(25):
+                for text in texts:
+                    start_time = time.perf_counter()
+                    trie.search(text)
+                    latencies[kind].append((time.perf_counter() - start_time) * 1000)
+        return {
+            "entries": entries,
+            "build_s": round(build_time, 3),
+            **{
+                f"{kind}_search_ms": get_percentiles(values)
+                for kind, values in latencies.items()
+            },
+        }
+
+    def run_benchmark(self, users, options):
+        self.stderr.write(f"Replaying {options['requests']} calls...")
+        # the test client's host is not one of the deployment's hosts
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            results = self.replay(users, options)
+            allocations = self.trace_allocations(users, options)
+
+        endpoints = {
+            name: {
+                "calls": len(result["latencies"]),
+                "errors": result["errors"],
+                "latency_ms": get_percentiles(result["latencies"]),
+                "queries_per_call": round(float(np.mean(result["queries"])), 2),
+                "peak_allocated_kib": allocations.get(name),
+            }
+            for name, result in sorted(results.items())
+        }
+        return {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "parameters": {
+                field: options[field]
+                for field in [
+                    "users",
+                    "tables",
+                    "activities",
+                    "tags",
+                    "requests",
+                    "seed",
+                ]
+            },
+            "endpoints": endpoints,
+            "autocomplete_trie": (
+                self.bench_autocomplete_trie(options["trie_entries"])
+                if options["trie_entries"]
+                else None
+            ),
+        }
@@ -0,0 +1,148 @@
+"""
+Django command to benchmark the cost of the database connections per request
+like the uWSGI workers run them
+"""
+import copy
+import json
+import multiprocessing
+import statistics
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from core.latency import get_percentiles
+from core.pool import close_pools, get_pool_stats
+
+# name: (engine, settings overrides)
+MODES = {
+    # a connection opened and closed by every request, Django's default
+    "close": ("django.db.backends.postgresql", {"CONN_MAX_AGE": 0}),
+    "persistent": ("django.db.backends.postgresql", {"CONN_MAX_AGE": 600}),
+    "pool": ("core.backends.postgresql_pool", {"CONN_MAX_AGE": 0}),
+}
+
+ALIAS = "bench_connections"
+
+
+def run_requests(requests, latencies):
+    wrapper = connections[ALIAS]
+    for _ in range(requests):
+        start_time = time.perf_counter()
+        # what close_old_connections does on the request started and finished
+        # signals
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        wrapper.close_if_unusable_or_obsolete()
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    wrapper.close()
+
+
+def run_worker(mode, settings_dict, requests, threads):
+    """
+    Run the requests of a worker process on `threads` threads, each with its
+    own connection like Django's, returns their latencies and the
+    connections the worker opened
+    """
+    engine, overrides = MODES[mode]
+    connections.settings[ALIAS] = {
+        **copy.deepcopy(settings_dict),
+        **overrides,
+        "ENGINE": engine,
+    }
+
+    opened = []
+
+    def count_opened(sender, connection, **kwargs):
+        if connection.alias == ALIAS:
+            opened.append(connection)
+
+    connection_created.connect(count_opened)
+    latencies = []
+    workers = [
+        threading.Thread(target=run_requests, args=(requests, latencies))
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    connection_created.disconnect(count_opened)
+
+    if mode == "pool":
+        # the wrappers connect on every checkout of a pooled connection
+        connections_opened = get_pool_stats()[ALIAS]["opened"]
+        close_pools()
+    else:
+        connections_opened = len(opened)
+    return latencies, connections_opened
+
+
+class Command(BaseCommand):
+    """
+    Runs the same requests in worker processes forked like the uWSGI ones
+    with a connection per request, persistent connections and the pool,
+    and reports the latency each adds to a request
+    """
+
+    help = "Benchmark the database connection setup per request"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--threads", type=int, default=1, help="Threads of every worker"
+        )
+        parser.add_argument(
+            "--requests", type=int, default=500, help="Requests of every thread"
+        )
+        parser.add_argument(
+            "--modes", nargs="+", choices=list(MODES), default=list(MODES)
+        )
+        parser.add_argument("--output", help="Write the JSON report to a file")
+
+    def handle(self, *args, **options):
+        """
+        Entrypoint for command
+        """
+        report = {
+            "parameters": {
+                name: options[name] for name in ("workers", "threads", "requests")
+            },
+            "modes": {},
+        }
+        context = multiprocessing.get_context("fork")
+        for mode in options["modes"]:
+            self.stderr.write(f"Benchmarking {mode} connections...")
+            args = (
+                mode,
+                connection.settings_dict,
+                options["requests"],
+                options["threads"],
+            )
+            with context.Pool(options["workers"]) as pool:
+                results = pool.starmap(run_worker, [args] * options["workers"])
+            latencies = [latency for result in results for latency in result[0]]
+            report["modes"][mode] = {
+                "requests": len(latencies),
+                "connections_opened": sum(result[1] for result in results),
+                "mean_ms": round(statistics.mean(latencies), 3),
+                **get_percentiles(latencies),
+            }
+
+        if "close" in report["modes"]:
+            close_mean = report["modes"]["close"]["mean_ms"]
+            report["setup_savings_ms"] = {
+                mode: round(close_mean - result["mean_ms"], 3)
+                for mode, result in report["modes"].items()
+                if mode != "close"
+            }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write(output)
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,138 @@
+"""
+Django command to benchmark the journal analytics on a large generated journal
+"""
+import statistics
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from core.models import Journal, JournalTables, Tags
+from journal.analytics import get_journal_stats
+from journal.counters import reconcile_table_counters, reconcile_tags_usage
+from journal.rollups import rebuild_daily_rollups
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Generates a journal with the requested number of activities inside a
+    transaction, times the analytics over it then rolls the data back
+    """
+
+    help = "Benchmark the journal stats endpoint computation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--activities", type=int, default=1_000_000)
+        parser.add_argument("--tags", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the generated journal instead of rolling it back",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Entrypoint for command
+        """
+        try:
+            with transaction.atomic():
+                journal = self.generate_journal(options["activities"], options["tags"])
+                self.run_benchmark(journal, options["repeat"])
+                if not options["keep"]:
+                    raise Rollback()
+        except Rollback:
+            self.stdout.write("Generated journal rolled back")
+
+    def generate_journal(self, activities_count, tags_count):
+        self.stdout.write(f"Generating {activities_count} activities...")
+        start_time = time.perf_counter()
+
+        user = get_user_model().objects.create_user(
+            email=f"benchmark-{time.time_ns()}@example.com",
+            username=f"benchmark-{time.time_ns()}",
+            password=None,
+        )
+        journal = Journal.objects.create(user=user, journal_name="Benchmark")
+        table = JournalTables.objects.create(journal=journal, table_name="Benchmark")
+        Tags.objects.bulk_create(
+            Tags(
+                tag_user=user,
+                tag_name=f"Tag {i}",
+                tag_color=Tags.Colors.GRAY,
+                tag_class=Tags.ColorsClasses.GRAY_CLASS,
+            )
+            for i in range(tags_count)
+        )
+
+        # generated set based so no signal runs, the rollups and counters are
+        # rebuilt once the rows exist
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO core_activities
+                    (name, created, journal_table_id, ordering, search_document,
+                    owner_id)
+                SELECT 'Activity ' || i, now() - random() * interval '730 days',
+                    %s, i, '', %s
+                FROM generate_series(1, %s) AS i
+                """,
+                [table.id, user.id, activities_count],
+            )
+            cursor.execute(
+                """
+                INSERT INTO core_actionitems
+                    (action_item, checked, activity_id, ordering, owner_id)
+                SELECT 'Action item', random() < 0.6, id, 1, owner_id
+                FROM core_activities WHERE journal_table_id = %s
+                """,
+                [table.id],
+            )
+            cursor.execute(
+                """
+                INSERT INTO core_intentions (intention, activity_id, ordering, owner_id)
+                SELECT 'Intention', id, 1, owner_id
+                FROM core_activities WHERE journal_table_id = %s AND random() < 0.5
+                """,
+                [table.id],
+            )
+            cursor.execute(
+                """
+                INSERT INTO core_tags_activities (tags_id, activities_id)
+                SELECT tag.id, activity.id
+                FROM core_activities AS activity CROSS JOIN core_tags AS tag
+                WHERE activity.journal_table_id = %s AND tag.tag_user_id = %s
+                    AND random() < 0.1
+                """,
+                [table.id, user.id],
+            )
+            cursor.execute(
+                "ANALYZE core_activities, core_actionitems, core_intentions, "
+                "core_tags_activities"
+            )
+        rebuild_daily_rollups([journal.id])
+        reconcile_table_counters([journal.id])
+        reconcile_tags_usage([user.id])
+
+        elapsed = time.perf_counter() - start_time
+        self.stdout.write(f"Generated in {elapsed:.1f}s")
+        return journal
+
+    def run_benchmark(self, journal, repeat):
+        timings = []
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            stats = get_journal_stats(journal)
+            timings.append(time.perf_counter() - start_time)
+
+        self.stdout.write(f"Activities: {stats['activities_count']}")
+        self.stdout.write(f"Tag pairs: {len(stats['tag_co_occurrence'])}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stats computed in {statistics.median(timings):.3f}s median, "
+                f"{min(timings):.3f}s best of {repeat}"
+            )
+        )
@@ -0,0 +1,80 @@
+"""
+Django command to report the costliest queries of the observed requests
+"""
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.queries import read_query_stats
+
+SORT_FIELDS = ["total_ms", "count", "max_ms"]
+
+
+class Command(BaseCommand):
+    """
+    Merges the query statistics flushed by the workers and prints the top
+    fingerprints by total time, count or max time, then the fingerprints run
+    repeatedly within a single request, the N+1 patterns
+    """
+
+    help = "Report the top query fingerprints of the observed requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            help="Statistics files or globs, defaults to QUERY_OBSERVER_DIR",
+        )
+        parser.add_argument("--top", type=int, default=10)
+        parser.add_argument("--sort", choices=SORT_FIELDS, default="total_ms")
+        parser.add_argument("--view", help="Only report the queries of a view")
+        parser.add_argument(
+            "--repeat-threshold",
+            type=int,
+            default=5,
+            help="Runs of a fingerprint in one request reported as N+1",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Entrypoint for command
+        """
+        paths = options["paths"] or [
+            os.path.join(settings.QUERY_OBSERVER_DIR, "queries.*.jsonl")
+        ]
+        stats = read_query_stats(paths)
+        if options["view"]:
+            stats = [stat for stat in stats if stat["view"] == options["view"]]
+        if not stats:
+            raise CommandError("No query statistics found")
+
+        self.stdout.write(f"Top {options['top']} queries by {options['sort']}")
+        top = sorted(stats, key=lambda stat: stat[options["sort"]], reverse=True)
+        for stat in top[: options["top"]]:
+            self.write_stat(stat)
+
+        repeated = sorted(
+            (
+                stat
+                for stat in stats
+                if stat["max_per_request"] >= options["repeat_threshold"]
+            ),
+            key=lambda stat: (stat["max_per_request"], stat["total_ms"]),
+            reverse=True,
+        )
+        self.stdout.write(
+            f"\nQueries run at least {options['repeat_threshold']} times in a "
+            f"request (N+1): {len(repeated)}"
+        )
+        for stat in repeated[: options["top"]]:
+            self.write_stat(stat)
+
+    def write_stat(self, stat):
+        self.stdout.write(
+            f"\n{stat['view']}\n"
+            f"  total {stat['total_ms']:.1f}ms, count {stat['count']}, "
+            f"avg {stat['total_ms'] / stat['count']:.2f}ms, "
+            f"max {stat['max_ms']:.1f}ms, "
+            f"{stat['count'] / stat['requests']:.1f} per request "
+            f"(max {stat['max_per_request']})\n"
+            f"  {stat['fingerprint']}"
+        )
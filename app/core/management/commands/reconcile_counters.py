@@ -0,0 +1,45 @@
+"""
+Django command to repair the denormalized counters
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.models import Journal
+from journal.counters import reconcile_table_counters, reconcile_tags_usage
+
+
+class Command(BaseCommand):
+    """
+    Django Command recomputing the counters that drifted from the rows they
+    count
+    """
+
+    help = "Repair the journal table counters and the tags usage counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--journal",
+            type=int,
+            action="append",
+            dest="journal_ids",
+            help="Only reconcile the given journal and its user's tags, can be repeated",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Entrypoint for command
+        """
+        journal_ids = options["journal_ids"]
+        user_ids = None
+        if journal_ids is not None:
+            user_ids = Journal.objects.filter(id__in=journal_ids).values("user_id")
+
+        with transaction.atomic():
+            repaired_tables = reconcile_table_counters(journal_ids)
+            repaired_tags = reconcile_tags_usage(user_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Repaired the counters of {repaired_tables} tables")
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Repaired the usage counts of {repaired_tags} tags")
+        )
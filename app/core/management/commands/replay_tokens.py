@@ -0,0 +1,69 @@
+"""
+Django command to write the tokens file of the replay_traffic command
+"""
+import json
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from core.traffic import anonymize_user, read_captured
+from user.authentication import TOKEN_LIFETIME
+
+
+class Command(BaseCommand):
+    """
+    Maps the pseudonym of each given user to a valid token, creating the
+    tokens missing or expired, so their captured requests can be replayed.
+    The users are given by email or are the users found in capture files.
+    """
+
+    help = "Write the pseudonym to token map of replay_traffic --tokens"
+
+    def add_arguments(self, parser):
+        parser.add_argument("emails", nargs="*", help="Emails of the users")
+        parser.add_argument(
+            "--captured",
+            nargs="+",
+            default=[],
+            help="Capture files or globs whose users are mapped",
+        )
+        parser.add_argument("--output", help="Write the map to a file")
+
+    def handle(self, *args, **options):
+        """
+        Entrypoint for command
+        """
+        if not options["emails"] and not options["captured"]:
+            raise CommandError("Give the emails of the users or --captured files")
+        users = list(get_user_model().objects.filter(email__in=options["emails"]))
+        missing = set(options["emails"]) - {user.email for user in users}
+        if missing:
+            raise CommandError(f"Unknown users: {', '.join(sorted(missing))}")
+        if options["captured"]:
+            pseudonyms = {
+                record["user"] for record in read_captured(options["captured"])
+            }
+            # the pseudonyms are one way, every user is hashed to find them
+            users += [
+                user
+                for user in get_user_model().objects.exclude(
+                    id__in=[user.id for user in users]
+                )
+                if anonymize_user(user) in pseudonyms
+            ]
+
+        tokens = {}
+        for user in users:
+            token, created = Token.objects.get_or_create(user=user)
+            if not created and token.created < timezone.now() - TOKEN_LIFETIME:
+                token.delete()
+                token = Token.objects.create(user=user)
+            tokens[anonymize_user(user)] = token.key
+
+        output = json.dumps(tokens, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write(output)
+            self.stderr.write(f"Wrote the tokens of {len(tokens)} users")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,161 @@
+"""
+Django command to replay captured API traffic against a running instance
+"""
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+from django.core.management.base import BaseCommand, CommandError
+from core.latency import get_percentiles
+from core.traffic import read_captured
+
+
+class Command(BaseCommand):
+    """
+    Re-issues the requests of the capture files in their captured order and
+    pacing, sped up by `--speedup`, and reports the replayed latencies of every
+    route next to the captured ones as JSON. The captured ids only resolve
+    against a copy of the captured database, and the requests of each captured
+    user are authenticated with the token `--tokens` maps its pseudonym to.
+    """
+
+    help = "Replay captured traffic against a local instance"
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Capture files or globs")
+        parser.add_argument("--base-url", default="http://localhost:9008")
+        parser.add_argument(
+            "--tokens",
+            help="JSON file mapping the captured user pseudonyms to their tokens, "
+            "written by the replay_tokens command",
+        )
+        parser.add_argument(
+            "--token", help="Token of the requests whose user has none in --tokens"
+        )
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--speedup",
+            type=float,
+            default=1.0,
+            help="Replay speed relative to the capture, 0 replays without pauses",
+        )
+        parser.add_argument("--limit", type=int, help="Replay the first requests only")
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--output", help="Write the JSON report to a file")
+
+    def handle(self, *args, **options):
+        """
+        Entrypoint for command
+        """
+        records = read_captured(options["paths"])[: options["limit"]]
+        if not records:
+            raise CommandError("No captured requests found")
+        tokens = {}
+        if options["tokens"]:
+            try:
+                with open(options["tokens"]) as tokens_file:
+                    tokens = json.load(tokens_file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read the tokens: {e}")
+        self.stderr.write(
+            f"Replaying {len(records)} requests with a concurrency of "
+            f"{options['concurrency']}..."
+        )
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            futures = []
+            for record in records:
+                if options["speedup"]:
+                    offset = (record["timestamp"] - records[0]["timestamp"]) / options[
+                        "speedup"
+                    ]
+                    delay = offset - (time.perf_counter() - start_time)
+                    if delay > 0:
+                        time.sleep(delay)
+                token = tokens.get(record["user"]) or options["token"]
+                futures.append(executor.submit(self.send, record, token, options))
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start_time
+
+        report = self.get_report(records, results, elapsed)
+        report["unmapped"] = self.get_unmapped(records, tokens)
+        if report["unmapped"]["requests"]:
+            self.stderr.write(
+                f"{report['unmapped']['requests']} requests of "
+                f"{len(report['unmapped']['users'])} users had no token in --tokens"
+            )
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write(output)
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def send(self, record, token, options):
+        """
+        Issue a captured request, returns its status and latency in ms
+        """
+        url = options["base_url"].rstrip("/") + record["path"]
+        if record["query"]:
+            url += f"?{record['query']}"
+        headers = {}
+        data = None
+        if record["body"] is not None:
+            headers["Content-Type"] = "application/json"
+            data = json.dumps(record["body"]).encode()
+        if token:
+            headers["Authorization"] = f"Token {token}"
+
+        request = Request(url, data=data, headers=headers, method=record["method"])
+        start_time = time.perf_counter()
+        try:
+            with urlopen(request, timeout=options["timeout"]) as response:
+                response.read()
+                status = response.status
+        except HTTPError as e:
+            status = e.code
+        except (URLError, TimeoutError):
+            status = None
+        return status, (time.perf_counter() - start_time) * 1000
+
+    def get_unmapped(self, records, tokens):
+        """
+        Return the requests of the captured users without a token, replayed
+        with `--token` or anonymously
+        """
+        users = Counter(
+            record["user"]
+            for record in records
+            if record["user"] and record["user"] not in tokens
+        )
+        return {"requests": sum(users.values()), "users": dict(users)}
+
+    def get_report(self, records, results, elapsed):
+        routes = {}
+        for record, (status, latency) in zip(records, results):
+            route = routes.setdefault(
+                f"{record['method']} {record['route'] or record['path']}",
+                {"captured": [], "replayed": [], "statuses": Counter()},
+            )
+            route["captured"].append(record["duration_ms"])
+            route["replayed"].append(latency)
+            route["statuses"][str(status)] += 1
+
+        return {
+            "requests": len(records),
+            "elapsed_s": round(elapsed, 3),
+            "requests_per_s": round(len(records) / elapsed, 2),
+            "routes": {
+                name: {
+                    "calls": len(route["replayed"]),
+                    "statuses": dict(route["statuses"]),
+                    "captured_latency_ms": get_percentiles(route["captured"]),
+                    "replayed_latency_ms": get_percentiles(route["replayed"]),
+                }
+                for name, route in sorted(routes.items())
+            },
+        }
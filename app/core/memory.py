@@ -0,0 +1,124 @@
+"""
+Tracemalloc snapshots of a worker before and after a number of requests,
+diffed by file and line to find what keeps growing the workers' memory
+"""
+import glob
+import json
+import os
+import threading
+import time
+import tracemalloc
+from django.conf import settings
+
+# allocations of the tracing itself and of imports are not reported
+IGNORED_TRACES = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+_session = {"remaining": None, "before": None, "started": None}
+_session_lock = threading.Lock()
+
+
+def take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(IGNORED_TRACES)
+
+
+def start_session(requests, frames=1):
+    """
+    Start tracing this worker's allocations and snapshot them, the requests
+    handled after are diffed against it once `requests` have finished
+    """
+    with _session_lock:
+        tracemalloc.stop()
+        tracemalloc.start(frames)
+        _session.update(remaining=requests, before=take_snapshot(), started=time.time())
+
+
+def stop_session():
+    with _session_lock:
+        _session.update(remaining=None, before=None, started=None)
+        tracemalloc.stop()
+
+
+def get_status():
+    return {
+        "pid": os.getpid(),
+        "tracing": tracemalloc.is_tracing(),
+        "remaining_requests": _session["remaining"],
+    }
+
+
+def is_active():
+    return _session["remaining"] is not None
+
+
+def request_finished():
+    """
+    Count a request of the session, the last one writes the report and
+    stops the tracing
+    """
+    with _session_lock:
+        if _session["remaining"] is None:
+            return
+        _session["remaining"] -= 1
+        if _session["remaining"] > 0:
+            return
+        after = take_snapshot()
+        report = get_report(_session["before"], after, _session["started"])
+        _session.update(remaining=None, before=None, started=None)
+        tracemalloc.stop()
+
+    os.makedirs(settings.MEMORY_PROFILING_DIR, exist_ok=True)
+    path = os.path.join(
+        settings.MEMORY_PROFILING_DIR, f"memory.{time.time_ns()}.{os.getpid()}.json"
+    )
+    with open(path, "w") as report_file:
+        json.dump(report, report_file)
+
+
+def get_report(before, after, started):
+    """
+    Return the allocation sites whose memory grew the most between the
+    snapshots
+    """
+    top = [
+        {
+            "file": stat.traceback[0].filename,
+            "line": stat.traceback[0].lineno,
+            "traceback": [str(frame) for frame in stat.traceback],
+            "size_diff_kib": round(stat.size_diff / 1024, 1),
+            "size_kib": round(stat.size / 1024, 1),
+            "count_diff": stat.count_diff,
+        }
+        for stat in after.compare_to(before, "traceback")[
+            : settings.MEMORY_PROFILING_TOP
+        ]
+    ]
+    return {
+        "pid": os.getpid(),
+        "started": started,
+        "finished": time.time(),
+        "total_diff_kib": round(
+            sum(stat.size_diff for stat in after.compare_to(before, "filename")) / 1024,
+            1,
+        ),
+        "top": top,
+    }
+
+
+def read_reports(limit=10):
+    """
+    Return the latest reports of all the workers, latest first
+    """
+    paths = sorted(
+        glob.glob(os.path.join(settings.MEMORY_PROFILING_DIR, "memory.*.json")),
+        reverse=True,
+    )
+    reports = []
+    for path in paths[:limit]:
+        with open(path) as report_file:
+            reports.append(json.load(report_file))
+    return reports
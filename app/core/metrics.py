@@ -0,0 +1,224 @@
+"""
+Prometheus metrics of the API aggregated across the uWSGI workers. Every
+worker keeps its metrics in memory and periodically writes them to its own
+file, the metrics endpoint sums the files of all the workers, past workers
+included so counters never go backwards on a respawn. The files are named by
+the pid and a start id of the worker, a respawned worker reusing the pid of a
+dead one gets its own file instead of overwriting the dead worker's totals.
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from django.conf import settings
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+QUERIES_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200]
+
+BATCH_SIZE_BUCKETS = [1, 2, 5, 10, 25, 50, 100, 250, 500]
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    "journal_http_requests_total": (
+        "counter",
+        "Requests by view, method and status",
+        None,
+    ),
+    "journal_http_request_duration_seconds": (
+        "histogram",
+        "Request latency by view and method",
+        LATENCY_BUCKETS,
+    ),
+    "journal_http_request_queries": (
+        "histogram",
+        "Queries run by a request by view and method",
+        QUERIES_BUCKETS,
+    ),
+    "journal_cache_requests_total": (
+        "counter",
+        "In process cache lookups by cache and result",
+        None,
+    ),
+    "journal_token_auth_total": (
+        "counter",
+        "Token authentications by result",
+        None,
+    ),
+    "journal_batch_size": (
+        "histogram",
+        "Instances handled by a batch operation by action",
+        BATCH_SIZE_BUCKETS,
+    ),
+    "journal_db_pool_connections_total": (
+        "counter",
+        "Connection pool events by database and event",
+        None,
+    ),
+}
+
+# gauges computed from the merged counters when rendering
+CACHE_HIT_RATIO = "journal_cache_hit_ratio"
+
+
+def get_key(name, labels):
+    return json.dumps([name, sorted(labels.items())])
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of this worker since it started
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.last_flush = 0.0
+        self.pid = None
+        self.start_id = None
+
+    def inc(self, name, value=1, **labels):
+        if not settings.METRICS:
+            return
+        key = get_key(name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if not settings.METRICS:
+            return
+        buckets = METRICS[name][2]
+        key = get_key(name, labels)
+        with self.lock:
+            histogram = self.values.setdefault(
+                key, {"buckets": [0] * (len(buckets) + 1), "sum": 0, "count": 0}
+            )
+            index = next(
+                (i for i, bound in enumerate(buckets) if value <= bound), len(buckets)
+            )
+            histogram["buckets"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def get_path(self):
+        pid = os.getpid()
+        # the start id is drawn in the worker, the workers forked from a
+        # master that imported the registry don't share it
+        if self.pid != pid:
+            self.pid, self.start_id = pid, uuid.uuid4().hex[:12]
+        return os.path.join(settings.METRICS_DIR, f"metrics.{pid}.{self.start_id}.json")
+
+    def flush(self, force=False):
+        """
+        Write this worker's metrics to its file, at most every
+        `METRICS_FLUSH_INTERVAL` seconds unless forced
+        """
+        with self.lock:
+            if not self.values or (
+                not force
+                and time.monotonic() - self.last_flush < settings.METRICS_FLUSH_INTERVAL
+            ):
+                return
+            self.last_flush = time.monotonic()
+            values = json.dumps(self.values)
+
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = self.get_path()
+        # written aside then renamed so readers never see a partial file
+        with open(f"{path}.tmp", "w") as metrics_file:
+            metrics_file.write(values)
+        os.replace(f"{path}.tmp", path)
+
+    def collect(self):
+        """
+        Return the metrics of all the workers, this worker's being current
+        """
+        own_path = self.get_path()
+        workers = []
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, "metrics.*.json")):
+            if path == own_path:
+                continue
+            try:
+                with open(path) as metrics_file:
+                    workers.append(json.load(metrics_file))
+            except (OSError, ValueError):
+                continue
+        with self.lock:
+            workers.append(json.loads(json.dumps(self.values)))
+
+        merged = {}
+        for values in workers:
+            for key, value in values.items():
+                if isinstance(value, dict):
+                    histogram = merged.setdefault(
+                        key,
+                        {"buckets": [0] * len(value["buckets"]), "sum": 0, "count": 0},
+                    )
+                    histogram["buckets"] = [
+                        a + b for a, b in zip(histogram["buckets"], value["buckets"])
+                    ]
+                    histogram["sum"] += value["sum"]
+                    histogram["count"] += value["count"]
+                else:
+                    merged[key] = merged.get(key, 0) + value
+        return merged
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush, force=True)
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for _, value in labels
+    )
+    return (
+        "{"
+        + ",".join(f'{label}="{value}"' for (label, _), value in zip(labels, escaped))
+        + "}"
+    )
+
+
+def render_metrics(merged):
+    """
+    Return the merged metrics in the Prometheus text exposition format
+    """
+    by_name = {}
+    for key, value in merged.items():
+        name, labels = json.loads(key)
+        by_name.setdefault(name, []).append(([tuple(label) for label in labels], value))
+
+    lines = []
+    for name, (metric_type, description, buckets) in METRICS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}"]
+        for labels, value in sorted(by_name.get(name, [])):
+            if metric_type == "counter":
+                lines.append(f"{name}{format_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ["+Inf"], value["buckets"]):
+                cumulative += count
+                bucket_labels = format_labels(labels + [("le", str(bound))])
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {value['sum']}")
+            lines.append(f"{name}_count{format_labels(labels)} {value['count']}")
+
+    lines += [
+        f"# HELP {CACHE_HIT_RATIO} Share of the in process cache lookups hitting",
+        f"# TYPE {CACHE_HIT_RATIO} gauge",
+    ]
+    caches = {}
+    for labels, value in by_name.get("journal_cache_requests_total", []):
+        labels = dict(labels)
+        lookups = caches.setdefault(labels["cache"], {"hit": 0, "miss": 0})
+        lookups[labels["result"]] += value
+    for cache, lookups in sorted(caches.items()):
+        ratio = lookups["hit"] / (lookups["hit"] + lookups["miss"])
+        lines.append(f"{CACHE_HIT_RATIO}{format_labels([('cache', cache)])} {ratio}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,327 @@
+"""
+Middlewares of the API
+"""
+import json
+import logging
+import os
+import random
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from core import (
+    traffic,
+    timing,
+    queries,
+    metrics,
+    routers,
+    profiling,
+    memory,
+    nplusone,
+)
+from user.authentication import ExpiringTokenAuthentication
+
+logger = logging.getLogger(__name__)
+
+
+class TrafficCaptureMiddleware:
+    """
+    Writes a sample of the journal and user API requests with their
+    anonymized bodies and timings to the capture files, unused unless
+    `TRAFFIC_CAPTURE` is set
+    """
+
+    def __init__(self, get_response):
+        if not settings.TRAFFIC_CAPTURE:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            not request.path.startswith(traffic.CAPTURE_PATH_PREFIXES)
+            or random.random() >= settings.TRAFFIC_CAPTURE_SAMPLE_RATE
+        ):
+            return self.get_response(request)
+
+        # read before the view so the stream is still available
+        body = self.get_body(request)
+        timestamp = time.time()
+        start_time = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start_time
+
+        match = request.resolver_match
+        traffic.get_capture_logger().info(
+            json.dumps(
+                {
+                    "timestamp": timestamp,
+                    "method": request.method,
+                    "path": request.path,
+                    "route": match.route if match else None,
+                    "query": traffic.anonymize_query(
+                        request.META.get("QUERY_STRING", "")
+                    ),
+                    "body": body,
+                    "user": traffic.anonymize_user(getattr(request, "user", None)),
+                    "status": response.status_code,
+                    "duration_ms": round(duration * 1000, 3),
+                }
+            )
+        )
+        return response
+
+    def get_body(self, request):
+        """
+        Return the anonymized JSON body of the request, None when it has no
+        JSON body or one too large to capture
+        """
+        if request.content_type != "application/json":
+            return None
+        if int(request.META.get("CONTENT_LENGTH") or 0) > traffic.CAPTURE_MAX_BODY_SIZE:
+            return None
+        try:
+            return traffic.anonymize(json.loads(request.body))
+        except ValueError:
+            return None
+
+
+class ServerTimingMiddleware:
+    """
+    Reports the database, serialization and rendering time and the query
+    count of a sample of the requests in a Server-Timing header and the log,
+    unused unless `SERVER_TIMING_SAMPLE_RATE` is set
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_SAMPLE_RATE:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        timer = timing.RequestTimer()
+        token = timing.current_timer.set(timer)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer.time_query))
+                start_time = time.perf_counter()
+                response = self.get_response(request)
+                timer.total = time.perf_counter() - start_time
+        finally:
+            timing.current_timer.reset(token)
+
+        response["Server-Timing"] = timer.get_header()
+        logger.info(
+            "%s %s timings",
+            request.method,
+            request.path,
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                **timer.get_log_fields(),
+            },
+        )
+        return response
+
+
+class QueryObserverMiddleware:
+    """
+    Records the fingerprints of the queries of every request by view in the
+    worker's query statistics, unused unless `QUERY_OBSERVER` is set
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_OBSERVER:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        observed = []
+
+        def observe(execute, sql, params, many, context):
+            start_time = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                observed.append(
+                    (queries.fingerprint(sql), time.perf_counter() - start_time)
+                )
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(observe))
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        queries.query_stats.add_request(f"{request.method} {view}", observed)
+        queries.query_stats.flush()
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Records the count, latency and queries of every request by view in the
+    worker's metrics, unused unless `METRICS` is set
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries_count = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries_count
+            queries_count += 1
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            start_time = time.perf_counter()
+            response = self.get_response(request)
+            duration = time.perf_counter() - start_time
+
+        match = request.resolver_match
+        labels = {
+            "view": match.view_name if match else "unresolved",
+            "method": request.method,
+        }
+        registry = metrics.registry
+        registry.inc(
+            "journal_http_requests_total", status=response.status_code, **labels
+        )
+        registry.observe("journal_http_request_duration_seconds", duration, **labels)
+        registry.observe("journal_http_request_queries", queries_count, **labels)
+        registry.flush()
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sends the reads of the safe requests to one of the read replicas, but
+    for the credentials which wrote in the last `REPLICA_STICKY_SECONDS`,
+    unused without `DATABASE_REPLICAS`
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        keys = routers.get_sticky_keys(request)
+        safe = request.method in ("GET", "HEAD", "OPTIONS")
+        alias = None
+        if safe and not routers.is_sticky(keys):
+            alias = random.choice(settings.DATABASE_REPLICAS)
+
+        token = routers.read_alias.set(alias)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.read_alias.reset(token)
+
+        # a streamed body is read after this returns, with the request's alias
+        if alias and response.streaming and not response.is_async:
+            response.streaming_content = routers.read_from(
+                alias, response.streaming_content
+            )
+        # a failed write changed nothing to read back
+        if not safe and response.status_code < 400:
+            routers.stick(keys)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests of staff users sent with `?profile=1` or an
+    `X-Profile: 1` header, any user's in DEBUG, unused unless `PROFILING` is
+    set
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            request.GET.get("profile") != "1"
+            and request.headers.get("X-Profile") != "1"
+        ) or not self.can_profile(request):
+            return self.get_response(request)
+
+        response, path = profiling.profile_request(self.get_response, request)
+        response["X-Profile"] = os.path.basename(path)
+        return response
+
+    def can_profile(self, request):
+        if settings.DEBUG:
+            return True
+        user = getattr(request, "user", None)
+        if user is None or not user.is_authenticated:
+            # the API authenticates by token in the views, after the middlewares
+            try:
+                user_auth = ExpiringTokenAuthentication().authenticate(Request(request))
+            except AuthenticationFailed:
+                return False
+            user = user_auth[0] if user_auth else None
+        return user is not None and user.is_staff
+
+
+class MemoryProfilingMiddleware:
+    """
+    Counts the requests of a running memory profiling session of the worker,
+    unused unless `MEMORY_PROFILING` is set
+    """
+
+    def __init__(self, get_response):
+        if not settings.MEMORY_PROFILING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # the request starting a session is not part of it
+        counted = memory.is_active()
+        response = self.get_response(request)
+        if counted:
+            memory.request_finished()
+        return response
+
+
+class NPlusOneMiddleware:
+    """
+    Logs or raises for the queries run more than `NPLUSONE_THRESHOLD` times
+    by a request, as set by `NPLUSONE_DETECTION`
+    """
+
+    def __init__(self, get_response):
+        if settings.NPLUSONE_DETECTION not in ["log", "raise"]:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        detector = nplusone.NPlusOneDetector()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(detector))
+            response = self.get_response(request)
+
+        if detector.violations:
+            report = detector.get_report(request)
+            # raised after the view so its error handling cannot hide it
+            if settings.NPLUSONE_DETECTION == "raise":
+                raise nplusone.NPlusOneError(report)
+            logger.warning(report)
+        return response
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.5 on 2026-10-19 01:48
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce, Concat
+
+
+SEARCH_SUBMODELS = [
+    ("Intentions", "intention"),
+    ("Happenings", "happening"),
+    ("GratefulFor", "grateful_for"),
+    ("ActionItems", "action_item"),
+]
+
+
+def backfill_search_documents(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    Activities = apps.get_model("core", "Activities")
+    parts = [Coalesce(F("name"), Value(""), output_field=TextField())]
+    for model_name, field in SEARCH_SUBMODELS:
+        model = apps.get_model("core", model_name)
+        submodel_text = (
+            model.objects.filter(activity=OuterRef("pk"))
+            .order_by()
+            .values("activity")
+            .annotate(text=StringAgg(field, " "))
+            .values("text")
+        )
+        parts.append(
+            Coalesce(Subquery(submodel_text), Value(""), output_field=TextField())
+        )
+
+    separated_parts = []
+    for part in parts:
+        separated_parts.extend([part, Value(" ")])
+    Activities.objects.update(
+        search_document=Concat(*separated_parts[:-1], output_field=TextField()),
+        search_vector=django.contrib.postgres.search.SearchVector(
+            *parts, config="english"
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_alter_actionitems_options_alter_activities_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activities',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='activities',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='activities',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='activities_search_vector_gin'),
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
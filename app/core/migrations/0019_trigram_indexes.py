@@ -0,0 +1,54 @@
+# Generated by Django 4.2.5 on 2026-10-19 01:52
+
+from django.db import migrations, transaction, DatabaseError
+
+
+TRIGRAM_INDEXES = [
+    ("tags_tag_name_trgm", "core_tags", "tag_name"),
+    ("activities_name_trgm", "core_activities", "name"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """
+    pg_trgm is a contrib extension that is not available on every server,
+    autocomplete falls back to an in process trie when it is missing
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:
+        return
+
+    for index_name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name} "
+            f"ON {table} USING gin (UPPER({column}) gin_trgm_ops)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name}_word "
+            f"ON {table} USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for index_name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index_name}")
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index_name}_word")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0018_activities_search_document"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
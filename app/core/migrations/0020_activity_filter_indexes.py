@@ -0,0 +1,37 @@
+# Generated by Django 4.2.5 on 2026-10-19 01:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0019_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="actionitems",
+            index=models.Index(
+                fields=["activity", "checked"], name="actionitems_act_checked_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="activities",
+            index=models.Index(
+                fields=["journal_table", "created"], name="activities_table_created_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="actionitems",
+            name="activity",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="action_items",
+                to="core.activities",
+            ),
+        ),
+    ]
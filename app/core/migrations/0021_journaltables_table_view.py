@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-19 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0020_activity_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journaltables",
+            name="table_view",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.5 on 2026-10-19 02:00
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def mark_default_tables_virtual(apps, schema_editor):
+    """
+    Every journal is created with its default tables, the first of which
+    becomes the virtual one, so the first table of each journal is marked
+    virtual whatever it was renamed to. A journal with a single table keeps
+    it as the table storing its activities
+    """
+    JournalTables = apps.get_model("core", "JournalTables")
+    first_table_ids = (
+        JournalTables.objects.values("journal_id")
+        .annotate(first_id=Min("id"), tables=Count("id"))
+        .filter(tables__gt=1)
+        .values("first_id")
+    )
+    JournalTables.objects.filter(id__in=first_table_ids).update(is_virtual=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0021_journaltables_table_view"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journaltables",
+            name="is_virtual",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_default_tables_virtual, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.5 on 2026-10-19 02:03
+
+from collections import defaultdict
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def backfill_daily_rollups(apps, schema_editor):
+    Activities = apps.get_model("core", "Activities")
+    ActionItems = apps.get_model("core", "ActionItems")
+    JournalDailyRollups = apps.get_model("core", "JournalDailyRollups")
+    tzinfo = timezone.get_current_timezone()
+    counts = defaultdict(lambda: [0, 0, 0])
+
+    activities = (
+        Activities.objects.filter(journal_table__isnull=False)
+        .annotate(day=TruncDate("created", tzinfo=tzinfo))
+        .values("journal_table__journal_id", "day")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    for row in activities.iterator():
+        counts[(row["journal_table__journal_id"], row["day"])][0] = row["total"]
+
+    # the empty action item every activity is created with is not counted
+    action_items = (
+        ActionItems.objects.filter(activity__journal_table__isnull=False)
+        .exclude(action_item="")
+        .annotate(day=TruncDate("activity__created", tzinfo=tzinfo))
+        .values("activity__journal_table__journal_id", "day")
+        .annotate(total=Count("id"), checked=Count("id", filter=Q(checked=True)))
+        .order_by()
+    )
+    for row in action_items.iterator():
+        bucket = counts[(row["activity__journal_table__journal_id"], row["day"])]
+        bucket[1] = row["total"]
+        bucket[2] = row["checked"]
+
+    JournalDailyRollups.objects.bulk_create(
+        (
+            JournalDailyRollups(
+                journal_id=journal_id,
+                day=day,
+                activities_count=bucket[0],
+                action_items_count=bucket[1],
+                action_items_checked_count=bucket[2],
+            )
+            for (journal_id, day), bucket in counts.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0022_journaltables_is_virtual"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JournalDailyRollups",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("activities_count", models.IntegerField(default=0)),
+                ("action_items_count", models.IntegerField(default=0)),
+                ("action_items_checked_count", models.IntegerField(default=0)),
+                (
+                    "journal",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="core.journal",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "JournalDailyRollup",
+                "verbose_name_plural": "JournalDailyRollups",
+                "ordering": ["day"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="journaldailyrollups",
+            constraint=models.UniqueConstraint(
+                fields=("journal", "day"), name="unique_journal_daily_rollup"
+            ),
+        ),
+        migrations.RunPython(backfill_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.5 on 2026-10-19 02:17
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_table_counters(apps, schema_editor):
+    JournalTables = apps.get_model("core", "JournalTables")
+    Activities = apps.get_model("core", "Activities")
+    ActionItems = apps.get_model("core", "ActionItems")
+
+    def count(queryset, group_by):
+        counts = queryset.order_by().values(group_by).annotate(count=Count("id"))
+        return Coalesce(Subquery(counts.values("count")), 0)
+
+    JournalTables.objects.filter(is_virtual=False).update(
+        activities_count=count(
+            Activities.objects.filter(journal_table_id=OuterRef("pk")),
+            "journal_table_id",
+        ),
+        open_action_items_count=count(
+            ActionItems.objects.filter(
+                ~Q(action_item=""),
+                activity__journal_table_id=OuterRef("pk"),
+                checked=False,
+            ),
+            "activity__journal_table_id",
+        ),
+    )
+    JournalTables.objects.filter(is_virtual=True).update(
+        activities_count=count(
+            Activities.objects.filter(journal_table__journal_id=OuterRef("journal_id")),
+            "journal_table__journal_id",
+        ),
+        open_action_items_count=count(
+            ActionItems.objects.filter(
+                ~Q(action_item=""),
+                activity__journal_table__journal_id=OuterRef("journal_id"),
+                checked=False,
+            ),
+            "activity__journal_table__journal_id",
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0023_journaldailyrollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journaltables",
+            name="activities_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="journaltables",
+            name="open_action_items_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_table_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.5 on 2026-10-19 03:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_tags_usage(apps, schema_editor):
+    Tags = apps.get_model("core", "Tags")
+    ActivitiesTags = Tags.activities.through
+
+    counts = (
+        ActivitiesTags.objects.filter(tags_id=OuterRef("pk"))
+        .order_by()
+        .values("tags_id")
+        .annotate(count=Count("id"))
+    )
+    Tags.objects.update(usage_count=Coalesce(Subquery(counts.values("count")), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0024_journaltables_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tags",
+            name="usage_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_tags_usage, migrations.RunPython.noop),
+    ]
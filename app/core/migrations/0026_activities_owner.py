@@ -0,0 +1,97 @@
+# Generated by Django 4.2.5 on 2026-10-19 02:23
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_owner(apps, schema_editor):
+    JournalTables = apps.get_model("core", "JournalTables")
+    Activities = apps.get_model("core", "Activities")
+
+    Activities.objects.filter(journal_table__isnull=False).update(
+        owner_id=Subquery(
+            JournalTables.objects.filter(id=OuterRef("journal_table_id")).values(
+                "journal__user_id"
+            )
+        )
+    )
+    for submodel in ["Intentions", "Happenings", "GratefulFor", "ActionItems"]:
+        SubModel = apps.get_model("core", submodel)
+        SubModel.objects.filter(activity__isnull=False).update(
+            owner_id=Subquery(
+                Activities.objects.filter(id=OuterRef("activity_id")).values("owner_id")
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0025_tags_usage_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="actionitems",
+            name="owner",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="activities",
+            name="owner",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="gratefulfor",
+            name="owner",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="happenings",
+            name="owner",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="intentions",
+            name="owner",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(backfill_owner, migrations.RunPython.noop),
+    ]
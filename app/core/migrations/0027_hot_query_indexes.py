@@ -0,0 +1,117 @@
+# Generated by Django 4.2.5 on 2026-10-19 02:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0026_activities_owner"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="activities",
+            name="journal_table",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="activities",
+                to="core.journaltables",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="activities",
+            name="owner",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="gratefulfor",
+            name="activity",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="grateful_for",
+                to="core.activities",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="happenings",
+            name="activity",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="happenings",
+                to="core.activities",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="intentions",
+            name="activity",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="intentions",
+                to="core.activities",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="actionitems",
+            index=models.Index(
+                condition=models.Q(
+                    ("checked", False), models.Q(("action_item", ""), _negated=True)
+                ),
+                fields=["activity"],
+                name="actionitems_open_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="activities",
+            index=models.Index(
+                fields=["journal_table", "ordering"],
+                name="activities_table_ordering_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="activities",
+            index=models.Index(
+                fields=["owner", "ordering"], name="activities_owner_ordering_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="gratefulfor",
+            index=models.Index(
+                fields=["activity", "ordering"], name="gratefulfor_act_ordering_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="happenings",
+            index=models.Index(
+                fields=["activity", "ordering"], name="happenings_act_ordering_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="intentions",
+            index=models.Index(
+                fields=["activity", "ordering"], name="intentions_act_ordering_idx"
+            ),
+        ),
+    ]
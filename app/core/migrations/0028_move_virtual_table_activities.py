@@ -0,0 +1,74 @@
+# Generated by Django 4.2.5 on 2026-10-19 03:10
+
+from importlib import import_module
+from django.db import migrations
+
+
+def move_virtual_table_activities(apps, schema_editor):
+    """
+    Before becoming virtual the "All entries" tables stored a copy of the
+    activities of the other tables. The copies matching an activity of a
+    physical table of their journal, by name and search document (the name
+    with the text of the submodels), are deleted. The other activities were
+    only stored in the virtual table and are moved to the first table of
+    their journal, the virtual table still shows them once through the
+    journal
+    """
+    JournalTables = apps.get_model("core", "JournalTables")
+    Activities = apps.get_model("core", "Activities")
+
+    journal_ids = set(
+        Activities.objects.filter(journal_table__is_virtual=True).values_list(
+            "journal_table__journal_id", flat=True
+        )
+    )
+    if not journal_ids:
+        return
+
+    for journal_id in journal_ids:
+        activities = Activities.objects.filter(journal_table__journal_id=journal_id)
+        stored = set(
+            activities.filter(journal_table__is_virtual=False).values_list(
+                "name", "search_document"
+            )
+        )
+        copy_ids, moved_ids = [], []
+        for activity_id, name, search_document in activities.filter(
+            journal_table__is_virtual=True
+        ).values_list("id", "name", "search_document"):
+            if (name, search_document) in stored:
+                copy_ids.append(activity_id)
+            else:
+                moved_ids.append(activity_id)
+
+        Activities.objects.filter(id__in=copy_ids).delete()
+        if not moved_ids:
+            continue
+        target = (
+            JournalTables.objects.filter(journal_id=journal_id, is_virtual=False)
+            .order_by("id")
+            .first()
+        )
+        if target is None:
+            target = JournalTables.objects.create(
+                journal_id=journal_id, table_name="Daily entries"
+            )
+        Activities.objects.filter(id__in=moved_ids).update(journal_table=target)
+
+    # the counters and tags usage counted the deleted copies, the rollups are
+    # rebuilt by 0030
+    counters = import_module("core.migrations.0024_journaltables_counters")
+    counters.backfill_table_counters(apps, schema_editor)
+    tags_usage = import_module("core.migrations.0025_tags_usage_count")
+    tags_usage.backfill_tags_usage(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0027_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(move_virtual_table_activities, migrations.RunPython.noop),
+    ]
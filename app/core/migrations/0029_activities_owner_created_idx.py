@@ -0,0 +1,19 @@
+# Generated by Django 4.2.5 on 2026-10-19 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0028_move_virtual_table_activities"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="activities",
+            index=models.Index(
+                fields=["owner", "created"], name="activities_owner_created_idx"
+            ),
+        ),
+    ]
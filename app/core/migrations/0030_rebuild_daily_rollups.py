@@ -0,0 +1,27 @@
+# Generated by Django 4.2.5 on 2026-10-19 09:40
+
+from importlib import import_module
+from django.db import migrations
+
+
+def rebuild_daily_rollups(apps, schema_editor):
+    """
+    The rollups backfilled before the empty action items were left out counted
+    them, along with the virtual table copies deleted by 0028, they are
+    backfilled again
+    """
+    JournalDailyRollups = apps.get_model("core", "JournalDailyRollups")
+    JournalDailyRollups.objects.all().delete()
+    backfill = import_module("core.migrations.0023_journaldailyrollups")
+    backfill.backfill_daily_rollups(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0029_activities_owner_created_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,8 @@ from django.contrib.auth.models import (
     PermissionsMixin,
 )
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db.models.constraints import UniqueConstraint
 from django.db.models import Q, Max
 import random
@@ -112,13 +114,44 @@ def create_default_table_name():
         return table_name
 
 
-class JournalTables(models.Model):
+class CounterFieldsMixin:
+    """
+    Protects the COUNTER_FIELDS maintained by the journal signals, a new
+    instance (or a clone) starts at zero and saving an existing one never
+    writes back counters that may be stale in memory
+    """
+
+    COUNTER_FIELDS = []
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or self.pk is None:
+            for field in self.COUNTER_FIELDS:
+                setattr(self, field, 0)
+        elif kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        return super().save(*args, **kwargs)
+
+
+class JournalTables(CounterFieldsMixin, models.Model):
     journal = models.ForeignKey(
         Journal, on_delete=models.CASCADE, related_name="journal_tables"
     )
     table_name = models.CharField(
         default=create_default_table_name, null=True, blank=True, max_length=100
     )
+    table_view = models.JSONField(default=dict, null=False, blank=True)
+    # virtual tables store no activities of their own, they show the
+    # activities of every table of the journal
+    is_virtual = models.BooleanField(default=False)
+    # maintained by the journal signals, see journal.counters
+    activities_count = models.IntegerField(default=0, editable=False)
+    open_action_items_count = models.IntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ["activities_count", "open_action_items_count"]
 
     def __str__(self) -> str:
         return self.table_name
@@ -129,17 +162,60 @@ class JournalTables(models.Model):
         verbose_name_plural = "JournalTables"
 
 
+class JournalDailyRollups(models.Model):
+    """
+    Per day counts of a journal's activities and action items, kept in sync on
+    write by the journal signals
+    """
+
+    journal = models.ForeignKey(
+        Journal, on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+    day = models.DateField()
+    activities_count = models.IntegerField(default=0)
+    action_items_count = models.IntegerField(default=0)
+    action_items_checked_count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["day"]
+        constraints = (
+            UniqueConstraint(
+                fields=["journal", "day"],
+                name="unique_journal_daily_rollup",
+            ),
+        )
+        verbose_name = "JournalDailyRollup"
+        verbose_name_plural = "JournalDailyRollups"
+
+
 class Activities(models.Model):
     name = models.CharField(max_length=3000, null=True, blank=True)
     created = models.DateTimeField(auto_now_add=True)
+    # indexed by activities_table_ordering_idx and activities_table_created_idx
+    # which lead with the table
     journal_table = models.ForeignKey(
         JournalTables,
         on_delete=models.CASCADE,
         null=True,
         blank=True,
+        db_index=False,
         related_name="activities",
     )
     ordering = models.IntegerField(null=True, blank=True)
+    search_document = models.TextField(default="", blank=True, editable=False)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    # the journal's user, set on insert so ownership checks filter one column
+    # instead of joining up to the journal, indexed by
+    # activities_owner_ordering_idx and activities_owner_created_idx
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False,
+        related_name="+",
+    )
 
     @property
     def increment_ordering(self):
@@ -158,6 +234,12 @@ class Activities(models.Model):
     def save(self, *args, **kwargs):
         if self.ordering is None:
             self.increment_ordering
+        if self.owner_id is None and self.journal_table_id is not None:
+            self.owner_id = (
+                JournalTables.objects.filter(id=self.journal_table_id)
+                .values_list("journal__user_id", flat=True)
+                .first()
+            )
         return super(Activities, self).save(*args, **kwargs)
 
 
@@ -166,11 +248,28 @@ class Activities(models.Model):
 
     class Meta:
         ordering = ["ordering"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="activities_search_vector_gin"),
+            models.Index(
+                fields=["journal_table", "created"], name="activities_table_created_idx"
+            ),
+            models.Index(
+                fields=["journal_table", "ordering"],
+                name="activities_table_ordering_idx",
+            ),
+            models.Index(
+                fields=["owner", "ordering"], name="activities_owner_ordering_idx"
+            ),
+            # the listed activities filtered by created range only
+            models.Index(
+                fields=["owner", "created"], name="activities_owner_created_idx"
+            ),
+        ]
         verbose_name = "Activity"
         verbose_name_plural = "Activities"
 
 
-class Tags(models.Model):
+class Tags(CounterFieldsMixin, models.Model):
     class Colors(models.TextChoices):
         GRAY = (
             "Off Gray",
@@ -205,6 +304,10 @@ class Tags(models.Model):
     tag_color = models.CharField(max_length=30, choices=Colors.choices)
     tag_class = models.CharField(max_length=30, choices=ColorsClasses.choices)
     activities = models.ManyToManyField(Activities, related_name="tags", blank=True)
+    # maintained by the journal signals, see journal.counters
+    usage_count = models.IntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ["usage_count"]
 
     class Meta:
         constraints = (
@@ -225,6 +328,16 @@ class BaseSubModel(models.Model):
     Should be subclassed by every submodels that have to define a common property
     """
 
+    # the activity's owner, set on insert so ownership checks filter one column
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+    )
+
     @property
     def increment_ordering(self):
         submodel_instances = self.__class__.objects.filter(activity=self.activity)
@@ -243,16 +356,20 @@ class BaseSubModel(models.Model):
     def save(self, *args, **kwargs):
         if self.ordering is None:
             self.increment_ordering
+        if self.owner_id is None and self.activity_id is not None:
+            self.owner_id = self.activity.owner_id
         return super().save(*args, **kwargs)
 
 
 class Intentions(BaseSubModel):
     # TODO: add ordering to submodels, and implement re-ordering
     intention = models.CharField(max_length=2000)
+    # indexed by intentions_act_ordering_idx which leads with the activity
     activity = models.ForeignKey(
         Activities,
         null=True,
         blank=True,
+        db_index=False,
         on_delete=models.CASCADE,
         related_name="intentions",
     )
@@ -263,16 +380,23 @@ class Intentions(BaseSubModel):
 
     class Meta:
         ordering = ["ordering"]
+        indexes = [
+            models.Index(
+                fields=["activity", "ordering"], name="intentions_act_ordering_idx"
+            ),
+        ]
         verbose_name = "Intention"
         verbose_name_plural = "Intentions"
 
 
 class Happenings(BaseSubModel):
     happening = models.CharField(max_length=2000)
+    # indexed by happenings_act_ordering_idx which leads with the activity
     activity = models.ForeignKey(
         Activities,
         null=True,
         blank=True,
+        db_index=False,
         on_delete=models.CASCADE,
         related_name="happenings",
     )
@@ -283,16 +407,23 @@ class Happenings(BaseSubModel):
 
     class Meta:
         ordering = ["ordering"]
+        indexes = [
+            models.Index(
+                fields=["activity", "ordering"], name="happenings_act_ordering_idx"
+            ),
+        ]
         verbose_name = "Happening"
         verbose_name_plural = "Happenings"
 
 
 class GratefulFor(BaseSubModel):
     grateful_for = models.CharField(max_length=2000)
+    # indexed by gratefulfor_act_ordering_idx which leads with the activity
     activity = models.ForeignKey(
         Activities,
         null=True,
         blank=True,
+        db_index=False,
         on_delete=models.CASCADE,
         related_name="grateful_for",
     )
@@ -303,6 +434,11 @@ class GratefulFor(BaseSubModel):
 
     class Meta:
         ordering = ["ordering"]
+        indexes = [
+            models.Index(
+                fields=["activity", "ordering"], name="gratefulfor_act_ordering_idx"
+            ),
+        ]
         verbose_name = "GratefulFor"
         verbose_name_plural = "GratefulFor"
 
@@ -310,10 +446,12 @@ class GratefulFor(BaseSubModel):
 class ActionItems(BaseSubModel):
     action_item = models.CharField(max_length=2000)
     checked = models.BooleanField(default=False)
+    # indexed by actionitems_act_checked_idx which leads with the activity
     activity = models.ForeignKey(
         Activities,
         null=True,
         blank=True,
+        db_index=False,
         on_delete=models.CASCADE,
         related_name="action_items",
     )
@@ -324,5 +462,16 @@ class ActionItems(BaseSubModel):
 
     class Meta:
         ordering = ["ordering"]  # ["id"]
+        indexes = [
+            models.Index(
+                fields=["activity", "checked"], name="actionitems_act_checked_idx"
+            ),
+            # the open action items the table counters count
+            models.Index(
+                fields=["activity"],
+                condition=Q(checked=False) & ~Q(action_item=""),
+                name="actionitems_open_idx",
+            ),
+        ]
         verbose_name = "ActionItem"
         verbose_name_plural = "ActionItems"
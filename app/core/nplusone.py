@@ -0,0 +1,76 @@
+"""
+Detection of the queries repeated within a request, the N+1 patterns of the
+serializers fetching a relation per instance
+"""
+import inspect
+import traceback
+from django.conf import settings
+from rest_framework.fields import Field
+from core.queries import fingerprint
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def get_serializer_field(frame):
+    """
+    Return the serializer field running the query of `frame`, the innermost
+    one for nested serializers
+    """
+    while frame is not None:
+        field = frame.f_locals.get("self")
+        # top level serializers and the children of list serializers have
+        # no field name
+        if isinstance(field, Field) and field.field_name:
+            return f"{type(field.parent).__name__}.{field.field_name}"
+        frame = frame.f_back
+    return None
+
+
+def get_app_stack():
+    """
+    Return the frames of the project code leading to the current query
+    """
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and frame.filename != __file__
+        and "/tests/" not in frame.filename
+    ]
+    return "".join(traceback.format_list(frames))
+
+
+class NPlusOneDetector:
+    """
+    Counts the queries of a request by fingerprint and keeps where the
+    fingerprints run more than `NPLUSONE_THRESHOLD` times came from
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.violations = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        query_fingerprint = fingerprint(sql)
+        count = self.counts.get(query_fingerprint, 0) + 1
+        self.counts[query_fingerprint] = count
+        if count == settings.NPLUSONE_THRESHOLD + 1:
+            self.violations[query_fingerprint] = (
+                get_serializer_field(inspect.currentframe()),
+                get_app_stack(),
+            )
+        return execute(sql, params, many, context)
+
+    def get_report(self, request):
+        reports = []
+        for query_fingerprint, (field, stack) in self.violations.items():
+            reports.append(
+                f"{request.method} {request.path} ran this query "
+                f"{self.counts[query_fingerprint]} times"
+                + (f" from the {field} field" if field else "")
+                + f":\n  {query_fingerprint}\n{stack}"
+            )
+        return "\n".join(reports)
@@ -0,0 +1,236 @@
+"""
+In process pools of PostgreSQL connections, one per worker and database,
+used by the core.backends.postgresql_pool engine. Django's persistent
+connections keep one connection per thread, the pool lets the threads of a
+worker share MIN_SIZE to MAX_SIZE connections opened once.
+"""
+import os
+import threading
+import time
+from collections import Counter, deque
+from psycopg2 import Error as Psycopg2Error
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from core.metrics import registry
+
+POOL_DEFAULTS = {
+    "MIN_SIZE": 1,
+    "MAX_SIZE": 4,
+    # seconds a checkout waits for a connection when all of them are in use
+    "TIMEOUT": 10,
+    # seconds a connection above MIN_SIZE stays idle before being closed
+    "MAX_IDLE": 300,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+def is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        # the check must not leave a transaction open when not autocommitting
+        connection.rollback()
+    except Psycopg2Error:
+        return False
+    return True
+
+
+class ConnectionPool:
+    """
+    Connections of a database shared by the threads of a worker, opened on
+    demand up to `max_size` and checked before being reused when
+    `health_checks` is set
+    """
+
+    def __init__(self, alias, min_size, max_size, timeout, max_idle, health_checks):
+        self.alias = alias
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_checks = health_checks
+        self.idle = deque()
+        self.size = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.stats = Counter()
+
+    def record(self, event):
+        self.stats[event] += 1
+        registry.inc("journal_db_pool_connections_total", alias=self.alias, event=event)
+
+    def getconn(self, connect):
+        """
+        Return an idle connection or one opened with `connect`, waiting up
+        to `timeout` seconds for a connection to be returned when the pool
+        is full
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connection = None
+            with self.condition:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self.condition.wait(remaining):
+                        self.record("exhausted")
+                        raise PoolExhausted(
+                            f"No connection of the {self.alias} pool was returned "
+                            f"within {self.timeout}s, all {self.max_size} are in use"
+                        )
+                if self.idle:
+                    connection, _ = self.idle.pop()
+                else:
+                    self.size += 1
+
+            if connection is None:
+                try:
+                    connection = connect()
+                except BaseException:
+                    self.discarded()
+                    raise
+                self.record("opened")
+            elif connection.closed or (
+                self.health_checks and not is_usable(connection)
+            ):
+                self.close_connection(connection, "unusable")
+                continue
+            self.record("checkout")
+            return connection
+
+    def putconn(self, connection):
+        """
+        Return a connection to the pool, rolled back to an idle state, or
+        close it when it is broken or the pool closed
+        """
+        if connection.closed:
+            self.discarded()
+            self.record("unusable")
+            return
+        if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except Psycopg2Error:
+                self.close_connection(connection, "unusable")
+                return
+        if self.closed:
+            self.close_connection(connection, "closed")
+            return
+
+        now = time.monotonic()
+        expired = []
+        with self.condition:
+            self.idle.append((connection, now))
+            # the least recently used connections are at the left
+            while (
+                len(self.idle) > self.min_size and now - self.idle[0][1] > self.max_idle
+            ):
+                expired.append(self.idle.popleft()[0])
+            self.condition.notify()
+        for expired_connection in expired:
+            self.close_connection(expired_connection, "expired")
+
+    def discarded(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def close_connection(self, connection, event):
+        try:
+            connection.close()
+        except Psycopg2Error:
+            pass
+        self.discarded()
+        self.record(event)
+
+    def fill(self, connect):
+        """
+        Open connections until the pool holds `min_size` of them
+        """
+        while True:
+            with self.condition:
+                if self.size >= self.min_size:
+                    return
+                self.size += 1
+            try:
+                connection = connect()
+            except BaseException:
+                self.discarded()
+                raise
+            self.record("opened")
+            self.putconn(connection)
+
+    def close(self):
+        """
+        Close the idle connections, those in use are closed when returned
+        """
+        with self.condition:
+            self.closed = True
+            idle = [connection for connection, _ in self.idle]
+            self.idle.clear()
+        for connection in idle:
+            self.close_connection(connection, "closed")
+
+    def get_stats(self):
+        with self.condition:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self.size,
+                "idle": len(self.idle),
+                "in_use": self.size - len(self.idle),
+                **self.stats,
+            }
+
+
+def get_pool(alias, conn_params, settings_dict):
+    """
+    Return this worker's pool of the database, created on first use so
+    uWSGI workers forked from the master never share a connection
+    """
+    key = (os.getpid(), alias, tuple(sorted(conn_params.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.closed:
+            options = {**POOL_DEFAULTS, **settings_dict.get("POOL", {})}
+            pool = _pools[key] = ConnectionPool(
+                alias,
+                options["MIN_SIZE"],
+                options["MAX_SIZE"],
+                options["TIMEOUT"],
+                options["MAX_IDLE"],
+                settings_dict["CONN_HEALTH_CHECKS"],
+            )
+        return pool
+
+
+def get_pool_stats():
+    """
+    Return the statistics of this worker's pools by database
+    """
+    with _pools_lock:
+        pools = [pool for key, pool in _pools.items() if key[0] == os.getpid()]
+    stats = {}
+    for pool in pools:
+        pool_stats = pool.get_stats()
+        alias_stats = stats.setdefault(pool.alias, Counter())
+        alias_stats.update(pool_stats)
+        alias_stats["min_size"] = pool_stats["min_size"]
+        alias_stats["max_size"] = pool_stats["max_size"]
+    return {alias: dict(alias_stats) for alias, alias_stats in stats.items()}
+
+
+def close_pools():
+    """
+    Close this worker's pools, the connections inherited from a parent
+    process are left to it
+    """
+    with _pools_lock:
+        keys = [key for key in _pools if key[0] == os.getpid()]
+        pools = [_pools.pop(key) for key in keys]
+    for pool in pools:
+        pool.close()
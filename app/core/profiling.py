@@ -0,0 +1,79 @@
+"""
+Profiling of single requests to a .prof file of cProfile and a collapsed
+stacks file, the format of flamegraph.pl and speedscope
+"""
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stack of a thread every `interval` seconds, counting the
+    samples of every stack
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def get_profile_path(request):
+    """
+    Return the path of the request's profiles without their extension
+    """
+    name = re.sub(r"[^\w]+", "-", request.path).strip("-")
+    return os.path.join(
+        settings.PROFILING_DIR,
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**9:09d}-"
+        f"{request.method.lower()}-{name}",
+    )
+
+
+def profile_request(get_response, request):
+    """
+    Return the response of the request run under cProfile and the stack
+    sampler, and the path of the written profiles
+    """
+    sampler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL)
+    profiler = cProfile.Profile()
+    sampler.start()
+    profiler.enable()
+    try:
+        response = get_response(request)
+    finally:
+        profiler.disable()
+        sampler.stop()
+
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    path = get_profile_path(request)
+    profiler.dump_stats(f"{path}.prof")
+    with open(f"{path}.collapsed", "w") as collapsed_file:
+        for stack, count in sampler.stacks.most_common():
+            collapsed_file.write(f"{stack} {count}\n")
+    return response, path
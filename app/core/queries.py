@@ -0,0 +1,144 @@
+"""
+SQL fingerprinting and the per worker query statistics of the observed
+requests, flushed to JSONL files read by the query_report command
+"""
+import atexit
+import glob
+import json
+import os
+import re
+import threading
+import time
+from django.conf import settings
+
+FINGERPRINT_PATTERNS = [
+    # savepoint names embed the thread and a counter
+    (re.compile(r'"s\d+_x\d+"'), "?"),
+    # string literals, then numbers not part of an identifier
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    # lists of any length share a fingerprint
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+"), "(...)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def fingerprint(sql):
+    """
+    Return the shape of a query, with its literals and parameters stripped
+    """
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class QueryStats:
+    """
+    Count, total and max time of the queries of every fingerprint and view
+    since the last flush, with the most a fingerprint ran in one request
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.last_flush = time.monotonic()
+
+    def add_request(self, view, queries):
+        """
+        Merge the (fingerprint, duration) of the queries of a request
+        """
+        request_stats = {}
+        for query_fingerprint, duration in queries:
+            count, total, longest = request_stats.get(query_fingerprint, (0, 0.0, 0.0))
+            request_stats[query_fingerprint] = (
+                count + 1,
+                total + duration,
+                max(longest, duration),
+            )
+
+        with self.lock:
+            for query_fingerprint, (count, total, longest) in request_stats.items():
+                stat = self.stats.setdefault(
+                    (view, query_fingerprint),
+                    {
+                        "count": 0,
+                        "total_ms": 0.0,
+                        "max_ms": 0.0,
+                        "requests": 0,
+                        "max_per_request": 0,
+                    },
+                )
+                stat["count"] += count
+                stat["total_ms"] += total * 1000
+                stat["max_ms"] = max(stat["max_ms"], longest * 1000)
+                stat["requests"] += 1
+                stat["max_per_request"] = max(stat["max_per_request"], count)
+
+    def flush(self, force=False):
+        """
+        Append the statistics to this worker's file and reset them, at most
+        every `QUERY_OBSERVER_FLUSH_INTERVAL` seconds unless forced
+        """
+        with self.lock:
+            interval = time.monotonic() - self.last_flush
+            if not self.stats or (
+                not force and interval < settings.QUERY_OBSERVER_FLUSH_INTERVAL
+            ):
+                return
+            stats, self.stats = self.stats, {}
+            self.last_flush = time.monotonic()
+
+        os.makedirs(settings.QUERY_OBSERVER_DIR, exist_ok=True)
+        path = os.path.join(settings.QUERY_OBSERVER_DIR, f"queries.{os.getpid()}.jsonl")
+        with open(path, "a") as stats_file:
+            for (view, query_fingerprint), stat in stats.items():
+                stats_file.write(
+                    json.dumps(
+                        {
+                            "timestamp": time.time(),
+                            "view": view,
+                            "fingerprint": query_fingerprint,
+                            **stat,
+                        }
+                    )
+                    + "\n"
+                )
+
+
+query_stats = QueryStats()
+atexit.register(query_stats.flush, force=True)
+
+
+def read_query_stats(paths):
+    """
+    Return the statistics of the flushed files matching `paths` merged by
+    view and fingerprint
+    """
+    merged = {}
+    for pattern in paths:
+        for path in glob.glob(pattern):
+            with open(path) as stats_file:
+                for line in stats_file:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    key = (record["view"], record["fingerprint"])
+                    stat = merged.setdefault(
+                        key,
+                        {
+                            "view": record["view"],
+                            "fingerprint": record["fingerprint"],
+                            "count": 0,
+                            "total_ms": 0.0,
+                            "max_ms": 0.0,
+                            "requests": 0,
+                            "max_per_request": 0,
+                        },
+                    )
+                    for field in ["count", "total_ms", "requests"]:
+                        stat[field] += record[field]
+                    for field in ["max_ms", "max_per_request"]:
+                        stat[field] = max(stat[field], record[field])
+    return list(merged.values())
@@ -0,0 +1,13 @@
+"""
+Renderers of the API
+"""
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
+from core.timing import TimedRendererMixin
+
+
+class TimedJSONRenderer(TimedRendererMixin, JSONRenderer):
+    pass
+
+
+class TimedBrowsableAPIRenderer(TimedRendererMixin, BrowsableAPIRenderer):
+    pass
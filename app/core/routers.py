@@ -0,0 +1,107 @@
+"""
+Routing of the reads of the safe requests to the read replicas. The writes,
+the reads outside of a request and the requests of the credentials which
+wrote in the last `REPLICA_STICKY_SECONDS` stay on the primary, so users
+read their own writes despite the replication lag.
+"""
+import hashlib
+import os
+import time
+from contextvars import ContextVar, copy_context
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# the replica the reads of the current request go to, None for the primary
+read_alias = ContextVar("read_alias", default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        # the relations of an instance are read from where it was
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def get_sticky_keys(request):
+    """
+    Return the keys of the credentials sent with the request, the token and
+    the session
+    """
+    credentials = [
+        request.META.get("HTTP_AUTHORIZATION"),
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME),
+    ]
+    return [
+        hashlib.sha256(credential.encode()).hexdigest()[:32]
+        for credential in credentials
+        if credential
+    ]
+
+
+def get_sticky_path(key):
+    return os.path.join(settings.REPLICA_STICKY_DIR, key)
+
+
+def is_sticky(keys):
+    """
+    Return whether one of the credentials wrote recently, through any of
+    the workers
+    """
+    for key in keys:
+        path = get_sticky_path(key)
+        try:
+            wrote = os.stat(path).st_mtime
+        except FileNotFoundError:
+            continue
+        if time.time() - wrote < settings.REPLICA_STICKY_SECONDS:
+            return True
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return False
+
+
+def stick(keys):
+    """
+    Keep the reads of the credentials on the primary for the next
+    `REPLICA_STICKY_SECONDS`
+    """
+    if not keys:
+        return
+    os.makedirs(settings.REPLICA_STICKY_DIR, exist_ok=True)
+    for key in keys:
+        with open(get_sticky_path(key), "a"):
+            pass
+        os.utime(get_sticky_path(key))
+
+
+def read_from(alias, iterable):
+    """
+    Iterate `iterable` with its reads sent to `alias`, for the bodies of the
+    streaming responses which are read after their request returned
+    """
+    context = copy_context()
+    context.run(read_alias.set, alias)
+    iterator = iter(iterable)
+
+    def iterate():
+        while True:
+            try:
+                yield context.run(next, iterator)
+            except StopIteration:
+                return
+
+    return iterate()
@@ -0,0 +1,25 @@
+"""
+Test runner of the project
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from core.pool import close_pools
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the tests with the N+1 detection raising, so a request repeating a
+    query fails its test, and the reads on the primary
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.NPLUSONE_DETECTION = "raise"
+        # the replicas mirror the test database through connections of their
+        # own, which do not see the uncommitted data of the TestCase tests
+        settings.DATABASE_REPLICAS = []
+
+    def teardown_databases(self, old_config, **kwargs):
+        # pooled connections to the test databases would prevent dropping them
+        close_pools()
+        super().teardown_databases(old_config, **kwargs)
@@ -0,0 +1,75 @@
+"""
+Test for the bench command
+"""
+import json
+from io import StringIO
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from core.management.commands.bench import get_bench_tables
+from core.models import Activities
+
+
+class BenchCommandTests(TestCase):
+    """
+    Tests for the in process API benchmark
+    """
+
+    @skipUnless(connection.vendor == "postgresql", "benchmarks PostgreSQL queries")
+    def test_bench_reports_endpoints(self):
+        """
+        Test the bench command reports the latency, queries and allocations of
+        the replayed endpoints and rolls the generated data back
+        """
+        out = StringIO()
+
+        call_command(
+            "bench",
+            users=2,
+            tables=1,
+            activities=10,
+            tags=3,
+            requests=40,
+            allocation_requests=1,
+            trie_entries=1000,
+            stdout=out,
+            stderr=StringIO(),
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["parameters"]["users"], 2)
+        self.assertTrue(report["endpoints"])
+        for name, endpoint in report["endpoints"].items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(endpoint["errors"], 0)
+                self.assertEqual(set(endpoint["latency_ms"]), {"p50", "p95", "p99"})
+                self.assertGreater(endpoint["queries_per_call"], 0)
+                self.assertIsNotNone(endpoint["peak_allocated_kib"])
+        self.assertEqual(report["autocomplete_trie"]["entries"], 1000)
+        self.assertEqual(
+            set(report["autocomplete_trie"]["fuzzy_search_ms"]), {"p50", "p95", "p99"}
+        )
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertFalse(Activities.objects.exists())
+
+    def test_bench_generates_requested_tables(self):
+        """
+        Test the tables beyond the default ones are generated
+        """
+        tables = get_bench_tables(None, 4)
+
+        self.assertEqual(
+            [table.get("is_virtual", False) for table in tables].count(True), 1
+        )
+        self.assertEqual(len(tables), 5)
+        self.assertEqual(len({table["table_name"] for table in tables}), 5)
+
+    def test_bench_without_tables_fails(self):
+        """
+        Test the bench command needs a table to store the activities in
+        """
+        with self.assertRaises(CommandError):
+            call_command("bench", tables=0, stdout=StringIO(), stderr=StringIO())
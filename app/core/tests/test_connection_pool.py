@@ -0,0 +1,188 @@
+"""
+Test for the database connection pool
+"""
+import json
+import psycopg2
+from io import StringIO
+from django.test import TestCase
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, DEFAULT_DB_ALIAS
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from core.backends.postgresql_pool.base import DatabaseWrapper
+from core.pool import ConnectionPool, PoolExhausted, close_pools
+
+
+def create_pool(**params):
+    """
+    Create and return a pool of the test database
+    """
+    defaults = {
+        "alias": "test",
+        "min_size": 0,
+        "max_size": 2,
+        "timeout": 0,
+        "max_idle": 300,
+        "health_checks": True,
+    }
+    defaults.update(params)
+    return ConnectionPool(**defaults)
+
+
+def connect():
+    return psycopg2.connect(**connection.get_connection_params())
+
+
+class ConnectionPoolTests(TestCase):
+    """
+    Tests for the pool of connections of a worker
+    """
+
+    def setUp(self):
+        self.pool = create_pool()
+        self.addCleanup(self.pool.close)
+
+    def test_returned_connections_are_reused(self):
+        """
+        Test a connection returned to the pool is checked out again instead
+        of opening one
+        """
+        first = self.pool.getconn(connect)
+        self.pool.putconn(first)
+        second = self.pool.getconn(connect)
+        self.pool.putconn(second)
+
+        self.assertIs(first, second)
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["opened"], 1)
+        self.assertEqual(stats["checkout"], 2)
+        self.assertEqual(stats["idle"], 1)
+        self.assertEqual(stats["in_use"], 0)
+
+    def test_returned_connections_are_rolled_back(self):
+        """
+        Test the transaction left open by a connection is rolled back when
+        it is returned
+        """
+        pooled = self.pool.getconn(connect)
+        pooled.autocommit = False
+        with pooled.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+        self.pool.putconn(pooled)
+
+        self.assertEqual(pooled.info.transaction_status, TRANSACTION_STATUS_IDLE)
+
+    def test_pool_exhausted(self):
+        """
+        Test a checkout fails once all the connections are in use
+        """
+        pooled = [self.pool.getconn(connect) for _ in range(2)]
+
+        with self.assertRaises(PoolExhausted):
+            self.pool.getconn(connect)
+
+        for pooled_connection in pooled:
+            self.pool.putconn(pooled_connection)
+        self.assertEqual(self.pool.get_stats()["exhausted"], 1)
+
+    def test_broken_connections_are_replaced(self):
+        """
+        Test the health check replaces an idle connection the server closed
+        """
+        broken = self.pool.getconn(connect)
+        self.pool.putconn(broken)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_terminate_backend(%s)", [broken.info.backend_pid])
+
+        pooled = self.pool.getconn(connect)
+        self.pool.putconn(pooled)
+
+        self.assertIsNot(pooled, broken)
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["unusable"], 1)
+        self.assertEqual(stats["opened"], 2)
+        self.assertEqual(stats["size"], 1)
+
+    def test_idle_connections_expire(self):
+        """
+        Test the connections above the minimum size are closed once idle
+        for longer than the maximum
+        """
+        pool = create_pool(min_size=1, max_idle=0)
+        self.addCleanup(pool.close)
+        pooled = [pool.getconn(connect) for _ in range(2)]
+        for pooled_connection in pooled:
+            pool.putconn(pooled_connection)
+
+        stats = pool.get_stats()
+        self.assertEqual(stats["expired"], 1)
+        self.assertEqual(stats["size"], 1)
+
+
+class PooledBackendTests(TestCase):
+    """
+    Tests for the database engine using the pool
+    """
+
+    def setUp(self):
+        self.addCleanup(close_pools)
+        self.settings_dict = {
+            **connection.settings_dict,
+            "ENGINE": "core.backends.postgresql_pool",
+            "CONN_MAX_AGE": 0,
+            # a pool of its own when the tests run with the pooled engine
+            "OPTIONS": {"application_name": "pool-tests"},
+        }
+
+    def test_closed_connections_return_to_pool(self):
+        """
+        Test the connections closed at the end of the requests are reused by
+        the next ones
+        """
+        wrapper = DatabaseWrapper(self.settings_dict, DEFAULT_DB_ALIAS)
+        for _ in range(3):
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            wrapper.close()
+
+        self.assertIsNone(wrapper.connection)
+        stats = wrapper.pool.get_stats()
+        self.assertEqual(stats["opened"], 1)
+        self.assertEqual(stats["checkout"], 3)
+        self.assertEqual(stats["idle"], 1)
+
+    def test_persistent_connections_rejected(self):
+        """
+        Test the pooled engine refuses a maximum connection age
+        """
+        with self.assertRaises(ImproperlyConfigured):
+            DatabaseWrapper({**self.settings_dict, "CONN_MAX_AGE": 60})
+
+
+class BenchConnectionsCommandTests(TestCase):
+    """
+    Tests for the connection setup benchmark
+    """
+
+    def test_bench_connections_reports_modes(self):
+        """
+        Test the benchmark opens a connection per request only without
+        persistent connections or the pool
+        """
+        out = StringIO()
+
+        call_command(
+            "bench_connections",
+            workers=2,
+            requests=5,
+            stdout=out,
+            stderr=StringIO(),
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report["modes"]), {"close", "persistent", "pool"})
+        self.assertEqual(report["modes"]["close"]["connections_opened"], 10)
+        self.assertEqual(report["modes"]["persistent"]["connections_opened"], 2)
+        self.assertEqual(report["modes"]["pool"]["connections_opened"], 2)
+        self.assertEqual(set(report["setup_savings_ms"]), {"persistent", "pool"})
@@ -0,0 +1,108 @@
+"""
+Test for the health check endpoints
+"""
+import shutil
+import tempfile
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.db import OperationalError
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from core import health
+
+HEALTHCHECK_URL = reverse("healthcheck")
+READINESS_URL = reverse("readiness")
+
+
+def failing_probe():
+    raise OperationalError("connection refused")
+
+
+class HealthCheckApiTests(TestCase):
+    """
+    Tests for the liveness and readiness checks
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        health._readiness.clear()
+        self.addCleanup(health._readiness.clear)
+
+    def test_liveness_does_not_probe(self):
+        """
+        Test the liveness check answers without running the probes
+        """
+        with patch.dict(health.PROBES, database=failing_probe):
+            res = self.client.get(HEALTHCHECK_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"healthy": True})
+
+    def test_readiness_probes_dependencies(self):
+        """
+        Test the readiness check reports the database, migrations and cache
+        """
+        res = self.client.get(READINESS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data["healthy"])
+        self.assertEqual(set(res.data["checks"]), {"database", "migrations", "cache"})
+        self.assertTrue(all(check["healthy"] for check in res.data["checks"].values()))
+        self.assertGreater(res.data["checks"]["database"]["latency_ms"], 0)
+        self.assertEqual(
+            res.data["checks"]["cache"], {"healthy": True, "status": "not configured"}
+        )
+
+    def test_readiness_probes_shared_cache(self):
+        """
+        Test the readiness check probes a cache shared by the workers
+        """
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        caches_override = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": cache_dir,
+            }
+        }
+
+        with override_settings(CACHES=caches_override):
+            with patch.object(health.cache, "get", return_value=None):
+                res = self.client.get(READINESS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(
+            res.data["checks"]["cache"],
+            {"healthy": False, "error": "The cache did not return the value set"},
+        )
+
+    def test_readiness_is_cached(self):
+        """
+        Test the probes are not run again until the result expires
+        """
+        self.client.get(READINESS_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(READINESS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # the migrations are not loaded again once found applied
+        with override_settings(HEALTH_CHECK_CACHE_SECONDS=0):
+            with self.assertNumQueries(1):
+                self.client.get(READINESS_URL)
+
+    def test_readiness_failing_database(self):
+        """
+        Test the readiness check fails when the database cannot be reached
+        """
+        with patch.dict(health.PROBES, database=failing_probe):
+            res = self.client.get(READINESS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(res.data["healthy"])
+        self.assertEqual(
+            res.data["checks"]["database"],
+            {"healthy": False, "error": "connection refused"},
+        )
+        self.assertTrue(res.data["checks"]["cache"]["healthy"])
@@ -0,0 +1,123 @@
+"""
+Test for the memory profiling endpoints
+"""
+import shutil
+import tempfile
+import tracemalloc
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from core import memory
+from core.models import Journal
+
+MEMORY_URL = reverse("memory")
+MEMORY_START_URL = reverse("memory-start")
+MEMORY_STOP_URL = reverse("memory-stop")
+TAGS_URL = reverse("journal:tags-list")
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+class PrivateMemoryProfilingApiTests(TestCase):
+    """
+    Private tests for the memory profiling sessions
+    """
+
+    def setUp(self):
+        self.reports_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.reports_dir)
+        settings_override = override_settings(
+            MEMORY_PROFILING=True, MEMORY_PROFILING_DIR=self.reports_dir
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(memory.stop_session)
+        self.user = create_user(
+            email="admin@example.com",
+            username="admin",
+            password="Awesomeuser123",
+            is_staff=True,
+        )
+        Journal.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_session_reports_allocation_sites(self):
+        """
+        Test a session traces the given number of requests then reports the
+        allocation sites diffed by file and line
+        """
+        res = self.client.post(MEMORY_START_URL, {"requests": 2})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(res.data["tracing"])
+        self.assertEqual(res.data["remaining_requests"], 2)
+
+        self.client.get(TAGS_URL)
+        self.assertTrue(tracemalloc.is_tracing())
+        self.client.get(TAGS_URL)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        res = self.client.get(MEMORY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data["worker"]["remaining_requests"])
+        report = res.data["reports"][0]
+        self.assertTrue(report["top"])
+        site = report["top"][0]
+        self.assertEqual(
+            set(site),
+            {"file", "line", "traceback", "size_diff_kib", "size_kib", "count_diff"},
+        )
+        self.assertIsInstance(site["line"], int)
+
+    def test_stop_session(self):
+        """
+        Test stopping a session stops the tracing without a report
+        """
+        self.client.post(MEMORY_START_URL, {"requests": 5})
+
+        res = self.client.post(MEMORY_STOP_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data["tracing"])
+        self.assertEqual(self.client.get(MEMORY_URL).data["reports"], [])
+
+    def test_invalid_requests_count(self):
+        """
+        Test the number of requests should be positive
+        """
+        res = self.client.post(MEMORY_START_URL, {"requests": 0})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_non_admin_forbidden(self):
+        """
+        Test only admins can start a session
+        """
+        self.client.force_authenticate(
+            create_user(
+                email="user@example.com", username="user", password="Awesomeuser123"
+            )
+        )
+
+        res = self.client.post(MEMORY_START_URL, {"requests": 1})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    @override_settings(MEMORY_PROFILING=False)
+    def test_memory_profiling_off(self):
+        """
+        Test sessions cannot be started when memory profiling is off
+        """
+        res = self.client.post(MEMORY_START_URL, {"requests": 1})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
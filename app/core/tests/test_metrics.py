@@ -0,0 +1,210 @@
+"""
+Test for the Prometheus metrics endpoint
+"""
+import json
+import os
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.metrics import MetricsRegistry, registry, get_key
+from core.models import Journal, JournalTables, Activities
+
+METRICS_URL = reverse("metrics")
+BATCH_DELETE_ACTIVITIES_URL = reverse("journal:activities-batch_delete_activities")
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+def get_samples(content):
+    """
+    Return the samples of a Prometheus text page by name and labels
+    """
+    samples = {}
+    for line in content.decode().splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+class MetricsApiTests(TestCase):
+    """
+    Tests for the metrics collected from the requests
+    """
+
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+        settings_override = override_settings(
+            METRICS=True,
+            METRICS_DIR=self.metrics_dir,
+            METRICS_FLUSH_INTERVAL=0,
+            METRICS_TOKEN="scraper",
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        registry.values.clear()
+        self.addCleanup(registry.values.clear)
+
+        self.user = create_user(
+            email="user@example.com", username="testuser", password="Awesomeuser123"
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        self.table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}"
+        )
+        self.scraper = APIClient()
+        self.scraper.credentials(HTTP_AUTHORIZATION="Bearer scraper")
+
+    def test_requests_and_operations_are_exposed(self):
+        """
+        Test the request latency, queries, token authentications and batch
+        sizes are exposed
+        """
+        activities = [
+            Activities.objects.create(journal_table=self.table) for _ in range(3)
+        ]
+        self.client.get(reverse("journal:journal-detail", args=[self.journal.id]))
+        res = self.client.delete(
+            BATCH_DELETE_ACTIVITIES_URL,
+            {"delete_list": [activity.id for activity in activities]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        res = self.scraper.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain; version=0.0.4"))
+        samples = get_samples(res.content)
+        labels = 'method="GET",view="journal:journal-detail"'
+        self.assertEqual(
+            samples[
+                "journal_http_requests_total"
+                '{method="GET",status="200",view="journal:journal-detail"}'
+            ],
+            1,
+        )
+        self.assertEqual(
+            samples[f"journal_http_request_duration_seconds_count{{{labels}}}"], 1
+        )
+        self.assertEqual(
+            samples[
+                f'journal_http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'
+            ],
+            1,
+        )
+        self.assertGreater(samples[f"journal_http_request_queries_sum{{{labels}}}"], 0)
+        self.assertEqual(samples['journal_token_auth_total{result="valid"}'], 2)
+        self.assertEqual(
+            samples['journal_batch_size_sum{action="batch_delete_activities"}'], 3
+        )
+        self.assertEqual(
+            samples[
+                'journal_batch_size_bucket{action="batch_delete_activities",le="2"}'
+            ],
+            0,
+        )
+
+    def test_metrics_of_other_workers_are_summed(self):
+        """
+        Test the metrics written by the other workers are added to this
+        worker's
+        """
+        other_worker = MetricsRegistry()
+        other_worker.inc(
+            "journal_cache_requests_total", cache="table_view", result="hit"
+        )
+        other_worker.inc(
+            "journal_cache_requests_total", cache="table_view", result="miss"
+        )
+        with open(os.path.join(self.metrics_dir, "metrics.1.json"), "w") as f:
+            json.dump(other_worker.values, f)
+        registry.inc(
+            "journal_cache_requests_total", 2, cache="table_view", result="hit"
+        )
+
+        res = self.scraper.get(METRICS_URL)
+
+        samples = get_samples(res.content)
+        self.assertEqual(
+            samples['journal_cache_requests_total{cache="table_view",result="hit"}'], 3
+        )
+        self.assertEqual(samples['journal_cache_hit_ratio{cache="table_view"}'], 0.75)
+
+    def test_metrics_of_dead_worker_with_same_pid_are_kept(self):
+        """
+        Test a worker reusing the pid of a dead worker writes its own file and
+        the dead worker's totals are still summed
+        """
+        dead_worker = MetricsRegistry()
+        dead_worker.inc("journal_token_auth_total", 4, result="valid")
+        dead_worker.flush(force=True)
+        registry.inc("journal_token_auth_total", result="valid")
+        registry.flush(force=True)
+
+        self.assertEqual(dead_worker.pid, registry.pid)
+        self.assertEqual(len(os.listdir(self.metrics_dir)), 2)
+        self.assertEqual(
+            registry.collect()[
+                get_key("journal_token_auth_total", {"result": "valid"})
+            ],
+            5,
+        )
+
+    def test_metrics_token_required(self):
+        """
+        Test the metrics require the bearer token when one is configured
+        """
+        client = APIClient()
+
+        res = client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        client.credentials(HTTP_AUTHORIZATION="Bearer other")
+        res = client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        res = self.scraper.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_without_token_require_admin(self):
+        """
+        Test only the admins read the metrics when no token is configured
+        """
+        res = APIClient().get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS=False)
+    def test_metrics_off(self):
+        """
+        Test nothing is recorded when the metrics are off
+        """
+        registry.inc("journal_token_auth_total", result="valid")
+
+        self.assertNotIn(
+            get_key("journal_token_auth_total", {"result": "valid"}), registry.values
+        )
@@ -0,0 +1,97 @@
+"""
+Test for the N+1 detection
+"""
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import Journal, JournalTables, Activities
+from core.nplusone import NPlusOneDetector, NPlusOneError
+from journal.serializers import JournalTableActivitiesSerializer
+
+TAGS_URL = reverse("journal:tags-list")
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+class NPlusOneDetectionTests(TestCase):
+    """
+    Tests for the detection of the queries repeated within a request
+    """
+
+    def setUp(self):
+        self.user = create_user(
+            email="user@example.com", username="testuser", password="Awesomeuser123"
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        self.table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(NPLUSONE_THRESHOLD=3)
+    def test_detector_names_serializer_field(self):
+        """
+        Test serializing activities without prefetching their relations is
+        reported with the serializer field querying them
+        """
+        for i in range(5):
+            Activities.objects.create(journal_table=self.table, name=str(i))
+        detector = NPlusOneDetector()
+
+        with connection.execute_wrapper(detector):
+            JournalTableActivitiesSerializer(
+                Activities.objects.filter(journal_table=self.table), many=True
+            ).data
+
+        fields = [field for field, _ in detector.violations.values()]
+        self.assertIn("JournalTableActivitiesSerializer.tags", fields)
+        self.assertIn("JournalTableActivitiesSerializer.action_items", fields)
+        for _, stack in detector.violations.values():
+            self.assertIn("to_representation", stack)
+            self.assertNotIn("core/nplusone.py", stack)
+
+    def test_test_runner_raises(self):
+        """
+        Test the test runner turns the detection into errors
+        """
+        with override_settings(NPLUSONE_THRESHOLD=0):
+            client = APIClient()
+            client.force_authenticate(self.user)
+
+            with self.assertRaisesMessage(NPlusOneError, f"GET {TAGS_URL} ran"):
+                client.get(TAGS_URL)
+
+    @override_settings(NPLUSONE_DETECTION="log", NPLUSONE_THRESHOLD=0)
+    def test_log_detection(self):
+        """
+        Test the log mode logs the repeated queries and answers the request
+        """
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with self.assertLogs("core.middleware", "WARNING") as logs:
+            res = client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn(f"GET {TAGS_URL} ran this query", logs.output[0])
+
+    def test_endpoints_within_threshold(self):
+        """
+        Test a regular request is not reported at the default threshold
+        """
+        for i in range(20):
+            Activities.objects.create(journal_table=self.table, name=str(i))
+
+        res = self.client.get(
+            reverse("journal:journaltables-detail", args=[self.table.id])
+        )
+
+        self.assertEqual(res.status_code, 200)
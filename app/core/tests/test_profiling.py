@@ -0,0 +1,108 @@
+"""
+Test for the request profiling middleware
+"""
+import os
+import pstats
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import Journal
+
+TAGS_URL = reverse("journal:tags-list")
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """
+    Tests for the profiles of the requests
+    """
+
+    def setUp(self):
+        self.profiles_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profiles_dir)
+        settings_override = override_settings(
+            PROFILING=True,
+            PROFILING_DIR=self.profiles_dir,
+            PROFILING_SAMPLE_INTERVAL=0.0001,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = create_user(
+            email="user@example.com", username="testuser", password="Awesomeuser123"
+        )
+        Journal.objects.create(user=self.user)
+
+    def get_client(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+        )
+        return client
+
+    def test_staff_request_is_profiled(self):
+        """
+        Test a staff user's request with the profile parameter writes a
+        cProfile file and a collapsed stacks file
+        """
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.get_client(self.user).get(TAGS_URL, {"profile": "1"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        path = os.path.join(self.profiles_dir, res["X-Profile"])
+        self.assertEqual(
+            sorted(os.listdir(self.profiles_dir)),
+            [f"{res['X-Profile']}.collapsed", f"{res['X-Profile']}.prof"],
+        )
+        self.assertTrue(pstats.Stats(f"{path}.prof").total_calls)
+        with open(f"{path}.collapsed") as collapsed_file:
+            for line in collapsed_file:
+                stack, count = line.rsplit(" ", 1)
+                self.assertGreater(int(count), 0)
+                self.assertIn(";", stack)
+
+    def test_header_triggers_profile(self):
+        """
+        Test the profile header triggers the profile like the parameter
+        """
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.get_client(self.user).get(TAGS_URL, HTTP_X_PROFILE="1")
+
+        self.assertIn("X-Profile", res)
+
+    def test_non_staff_request_is_not_profiled(self):
+        """
+        Test other users cannot profile their requests
+        """
+        res = self.get_client(self.user).get(TAGS_URL, {"profile": "1"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Profile", res)
+        self.assertEqual(os.listdir(self.profiles_dir), [])
+
+    def test_profiling_off(self):
+        """
+        Test nothing is profiled when profiling is off
+        """
+        self.user.is_staff = True
+        self.user.save()
+
+        with override_settings(PROFILING=False):
+            res = self.get_client(self.user).get(TAGS_URL, {"profile": "1"})
+
+        self.assertNotIn("X-Profile", res)
+        self.assertEqual(os.listdir(self.profiles_dir), [])
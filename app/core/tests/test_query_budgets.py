@@ -0,0 +1,408 @@
+"""
+Query count budgets of the journal and user endpoints
+
+Every endpoint is called on journals of growing sizes, its query count has to
+stay the same at every size and within its budget in query_budgets.json. The
+batch endpoints are called with batches growing with the journal, so a query
+per item of a batch shows as a growing count too. The requests send real
+token credentials so the budgets include the authentication queries.
+"""
+import json
+from pathlib import Path
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core.models import (
+    Journal,
+    JournalTables,
+    Activities,
+    Intentions,
+    Happenings,
+    GratefulFor,
+    ActionItems,
+    Tags,
+)
+from journal.config import get_table_defaults
+from journal.rollups import rebuild_daily_rollups
+
+BUDGETS_PATH = Path(__file__).with_name("query_budgets.json")
+
+# activities seeded in every table of the journal, an endpoint's query count
+# has to be the same at every size
+SIZES = [4, 12, 36]
+
+
+def get_batch_size(size):
+    return size // 2
+
+
+def load_budgets():
+    with open(BUDGETS_PATH) as budgets_file:
+        return json.load(budgets_file)
+
+
+def seed_journal(index, size):
+    """
+    Create a user with a journal holding `size` tagged activities with their
+    submodels in each of its tables
+    """
+    user = get_user_model().objects.create_user(
+        email=f"budget{index}@example.com",
+        username=f"budget{index}",
+        password="Awesomeuser123",
+    )
+    journal = Journal.objects.create(user=user)
+    tables = [
+        JournalTables.objects.create(**defaults)
+        for defaults in get_table_defaults(journal)
+    ]
+    journal.current_table = tables[1].id
+    journal.save()
+    tags = [
+        Tags.objects.create(
+            tag_user=user,
+            tag_name=f"Tag {i}",
+            tag_color=Tags.Colors.GRAY,
+            tag_class=Tags.ColorsClasses.GRAY_CLASS,
+        )
+        for i in range(max(3, get_batch_size(size)))
+    ]
+    for table in tables[1:]:
+        for i in range(size):
+            activity = Activities.objects.create(journal_table=table, name=f"Entry {i}")
+            activity.tags.add(*tags[: i % 3 + 1])
+            Intentions.objects.create(activity=activity, intention="Intention")
+            Happenings.objects.create(activity=activity, happening="Happening")
+            GratefulFor.objects.create(activity=activity, grateful_for="Grateful")
+            ActionItems.objects.create(activity=activity, action_item="Action item")
+    rebuild_daily_rollups([journal.id])
+    return user, journal, tables, tags
+
+
+def get_requests(index, size, user, journal, tables, tags):
+    """
+    Return the (name, method, url, data) of the calls made to every endpoint,
+    writes come last so the reads see the seeded journal
+    """
+    table = tables[1]
+    activities = list(
+        Activities.objects.filter(journal_table=table).values_list("id", flat=True)
+    )
+    activity_id = activities[0]
+    batch_size = get_batch_size(size)
+    batch_ids = activities[:batch_size]
+    new_tags = [
+        {
+            "tag_name": f"Batch {i}",
+            "tag_color": Tags.Colors.RED,
+            "tag_class": Tags.ColorsClasses.RED_CLASS,
+        }
+        for i in range(batch_size)
+    ]
+    submodel_ids = {
+        name: model.objects.filter(activity_id=activity_id).values_list(
+            "id", flat=True
+        )[0]
+        for name, model in [
+            ("intentions", Intentions),
+            ("happenings", Happenings),
+            ("grateful_for", GratefulFor),
+            ("action_items", ActionItems),
+        ]
+    }
+
+    def url(name, *args):
+        return reverse(name, args=args)
+
+    return [
+        ("journal list", "get", url("journal:journal-list"), None),
+        ("journal detail", "get", url("journal:journal-detail", journal.id), None),
+        (
+            "journal export",
+            "get",
+            url("journal:journal-export", journal.id),
+            None,
+        ),
+        (
+            "journal search",
+            "get",
+            url("journal:journal-search", journal.id) + "?q=entry",
+            None,
+        ),
+        (
+            "journal calendar",
+            "get",
+            url("journal:journal-calendar", journal.id),
+            None,
+        ),
+        ("journal stats", "get", url("journal:journal-stats", journal.id), None),
+        ("journal tables list", "get", url("journal:journaltables-list"), None),
+        (
+            "journal table detail",
+            "get",
+            url("journal:journaltables-detail", table.id),
+            None,
+        ),
+        (
+            "journal table page",
+            "get",
+            url("journal:journaltables-detail", table.id) + "?page=1",
+            None,
+        ),
+        (
+            "virtual journal table detail",
+            "get",
+            url("journal:journaltables-detail", tables[0].id),
+            None,
+        ),
+        ("tags list", "get", url("journal:tags-list"), None),
+        (
+            "tags autocomplete",
+            "get",
+            url("journal:tags-autocomplete") + "?q=tag",
+            None,
+        ),
+        ("activities list", "get", url("journal:activities-list"), None),
+        (
+            "activities detail",
+            "get",
+            url("journal:activities-detail", activity_id),
+            None,
+        ),
+        (
+            "activities autocomplete",
+            "get",
+            url("journal:activities-autocomplete") + "?q=entry",
+            None,
+        ),
+        ("intentions list", "get", url("journal:intentions-list"), None),
+        ("happenings list", "get", url("journal:happenings-list"), None),
+        ("grateful for list", "get", url("journal:gratefulfor-list"), None),
+        ("action items list", "get", url("journal:actionitems-list"), None),
+        ("user me", "get", url("user:me"), None),
+        (
+            "activities create",
+            "post",
+            url("journal:activities-list"),
+            {"name": "New entry", "journal_table": table.id},
+        ),
+        (
+            "activities update",
+            "patch",
+            url("journal:activities-detail", activity_id),
+            {"name": "Updated entry"},
+        ),
+        (
+            "intentions create",
+            "post",
+            url("journal:intentions-list"),
+            {"intention": "New", "activity": activity_id},
+        ),
+        (
+            "intentions update",
+            "patch",
+            url("journal:intentions-detail", submodel_ids["intentions"]),
+            {"intention": "Updated"},
+        ),
+        (
+            "activities batch update",
+            "patch",
+            url("journal:activities-batch_update_activities"),
+            {"activities_list": [{"ids": batch_ids, "tags": [tags[0].id]}]},
+        ),
+        (
+            "activities batch duplicate",
+            "post",
+            url("journal:activities-batch_duplicate_activities"),
+            {"duplicate_list": [{"ids": batch_ids}]},
+        ),
+        (
+            "tags create",
+            "post",
+            url("journal:tags-list"),
+            {
+                "tag_name": "Created",
+                "tag_color": Tags.Colors.GRAY,
+                "tag_class": Tags.ColorsClasses.GRAY_CLASS,
+            },
+        ),
+        (
+            "tags batch create",
+            "post",
+            url("journal:tags-batch_tag_processor"),
+            {"tags_list": new_tags},
+        ),
+        (
+            "tags batch update",
+            "patch",
+            url("journal:tags-batch_tag_processor"),
+            {
+                "tags_list": [
+                    {**new_tag, "id": tag.id, "tag_name": f"Renamed {i}"}
+                    for i, (tag, new_tag) in enumerate(zip(tags, new_tags))
+                ]
+            },
+        ),
+        (
+            "tags update",
+            "patch",
+            url("journal:tags-detail", tags[0].id),
+            {
+                "tag_name": "Renamed",
+                "tag_color": Tags.Colors.GRAY,
+                "tag_class": Tags.ColorsClasses.GRAY_CLASS,
+            },
+        ),
+        (
+            "journal update",
+            "patch",
+            url("journal:journal-detail", journal.id),
+            {"journal_name": "Renamed"},
+        ),
+        (
+            "journal table update",
+            "patch",
+            url("journal:journaltables-detail", table.id),
+            {"table_name": "Renamed"},
+        ),
+        (
+            "user update info",
+            "put",
+            url("user:update_info"),
+            {
+                "first_name": "Budget",
+                "last_name": "User",
+                "email": user.email,
+                "username": user.username,
+            },
+        ),
+        (
+            "activities batch delete",
+            "delete",
+            url("journal:activities-batch_delete_activities"),
+            {"delete_list": batch_ids},
+        ),
+        (
+            "activities delete",
+            "delete",
+            url("journal:activities-detail", activities[batch_size]),
+            None,
+        ),
+        (
+            "intentions batch delete",
+            "delete",
+            url("journal:intentions-batch_submodel_processor"),
+            {
+                "tags_list": list(
+                    Intentions.objects.filter(
+                        activity__journal_table=tables[2]
+                    ).values_list("id", flat=True)[:batch_size]
+                )
+            },
+        ),
+        (
+            "journal table create",
+            "post",
+            url("journal:journaltables-list"),
+            {"journal": journal.id, "table_name": "New table"},
+        ),
+        (
+            "journal table duplicate",
+            "post",
+            url("journal:journaltables-list"),
+            {
+                "journal": journal.id,
+                "journal_table": tables[2].id,
+                "duplicate": True,
+                "table_name": "",
+            },
+        ),
+        (
+            "journal table delete",
+            "delete",
+            url("journal:journaltables-detail", tables[2].id),
+            None,
+        ),
+        (
+            "journal create",
+            "post",
+            url("journal:journal-list"),
+            {"journal_name": "New journal"},
+        ),
+        (
+            "user create",
+            "post",
+            url("user:create"),
+            {
+                "first_name": "New",
+                "last_name": "User",
+                "username": f"newuser{index}",
+                "email": f"newuser{index}@example.com",
+                "password": "Awesomeuser123",
+                "password2": "Awesomeuser123",
+            },
+        ),
+        (
+            "user token",
+            "post",
+            url("user:token"),
+            {"email": user.email, "password": "Awesomeuser123"},
+        ),
+    ]
+
+
+class QueryBudgetsTests(TestCase):
+    """
+    Tests every endpoint stays within its query budget from
+    query_budgets.json at every journal size
+    """
+
+    def count_queries(self, client, method, url, data):
+        with CaptureQueriesContext(connection) as queries:
+            res = getattr(client, method)(url, data, format="json")
+            # streamed responses query while their content is consumed
+            if res.streaming:
+                b"".join(res.streaming_content)
+        self.assertLess(res.status_code, 400, f"{method.upper()} {url}: {res}")
+        return len(queries)
+
+    def measure(self):
+        """
+        Return the query counts of every endpoint at every size
+        """
+        counts = {}
+        for index, size in enumerate(SIZES):
+            user, journal, tables, tags = seed_journal(index, size)
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+            )
+            requests = get_requests(index, size, user, journal, tables, tags)
+            for name, method, url, data in requests:
+                count = self.count_queries(client, method, url, data)
+                counts.setdefault(name, []).append(count)
+        return counts
+
+    def test_endpoints_stay_within_budget(self):
+        """
+        Test no endpoint exceeds its budget or queries more as the journal
+        grows
+        """
+        budgets = load_budgets()
+        counts = self.measure()
+        report = "\n".join(
+            f"{name}: {', '.join(map(str, sizes))} (budget {budgets.get(name)})"
+            for name, sizes in counts.items()
+        )
+
+        for name, sizes in counts.items():
+            with self.subTest(endpoint=name):
+                self.assertIn(name, budgets, f"No budget declared\n{report}")
+                self.assertLessEqual(max(sizes), budgets[name], report)
+                self.assertEqual(
+                    max(sizes), sizes[0], f"Query count grows with size\n{report}"
+                )
@@ -0,0 +1,143 @@
+"""
+Test for the query observer and the query_report command
+"""
+import shutil
+import tempfile
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import Journal, JournalTables
+from core.queries import fingerprint, read_query_stats, QueryStats
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+class QueryFingerprintTests(TestCase):
+    """
+    Tests for the SQL fingerprints
+    """
+
+    def test_fingerprint_strips_literals(self):
+        """
+        Test queries differing by their literals and list sizes share a
+        fingerprint and identifiers are kept
+        """
+        first = fingerprint(
+            'SELECT "t1"."id" FROM "core_tags" WHERE "id" IN (1, 2) '
+            "AND \"tag_name\" = 'it''s'  LIMIT 21"
+        )
+        second = fingerprint(
+            'SELECT "t1"."id" FROM "core_tags" WHERE "id" IN (%s, %s, %s) '
+            'AND "tag_name" = %s LIMIT 5'
+        )
+
+        self.assertEqual(first, second)
+        self.assertEqual(
+            first,
+            'SELECT "t1"."id" FROM "core_tags" WHERE "id" IN (...) '
+            'AND "tag_name" = ? LIMIT ?',
+        )
+        self.assertEqual(
+            fingerprint('INSERT INTO "t" ("a") VALUES (%s), (%s) RETURNING "t"."id"'),
+            'INSERT INTO "t" ("a") VALUES (...) RETURNING "t"."id"',
+        )
+
+
+class QueryObserverTests(TestCase):
+    """
+    Tests for the observed query statistics and their report
+    """
+
+    def setUp(self):
+        self.stats_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.stats_dir)
+        settings_override = override_settings(
+            QUERY_OBSERVER=True,
+            QUERY_OBSERVER_DIR=self.stats_dir,
+            QUERY_OBSERVER_FLUSH_INTERVAL=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = create_user(
+            email="user@example.com", username="testuser", password="Awesomeuser123"
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_requests_are_recorded_by_view(self):
+        """
+        Test the queries of the observed requests are flushed by view and
+        fingerprint
+        """
+        url = reverse("journal:journal-detail", args=[self.journal.id])
+        for _ in range(3):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        table = JournalTables.objects.create(journal=self.journal)
+        for _ in range(3):
+            res = self.client.post(
+                reverse("journal:activities-list"),
+                {"name": "Entry", "journal_table": table.id},
+            )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        stats = read_query_stats([f"{self.stats_dir}/*.jsonl"])
+
+        journal_stats = [
+            stat
+            for stat in stats
+            if stat["view"] == "GET journal:journal-detail"
+            and stat["fingerprint"].startswith('SELECT "core_journal"')
+        ]
+        self.assertTrue(journal_stats)
+        for stat in journal_stats:
+            self.assertEqual(stat["requests"], 3)
+            self.assertNotIn(str(self.journal.id), stat["fingerprint"].split())
+        # the reads run outside of a transaction, the writes in one
+        savepoints = {
+            stat["view"]: stat["requests"]
+            for stat in stats
+            if stat["fingerprint"] == "SAVEPOINT ?"
+        }
+        self.assertEqual(savepoints, {"POST journal:activities-list": 3})
+
+    def test_report_lists_top_and_repeated_queries(self):
+        """
+        Test the report ranks the fingerprints and lists the ones repeated
+        within a request
+        """
+        query_stats = QueryStats()
+        query_stats.add_request(
+            "GET journal:journal-detail",
+            [("SELECT tags WHERE id = ?", 0.001)] * 6
+            + [("SELECT journal WHERE id = ?", 0.05)],
+        )
+        query_stats.flush(force=True)
+        out = StringIO()
+
+        call_command("query_report", top=1, stdout=out)
+
+        output = out.getvalue()
+        top, repeated = output.split("(N+1)")
+        self.assertIn("SELECT journal WHERE id = ?", top)
+        self.assertNotIn("SELECT tags", top)
+        self.assertIn("SELECT tags WHERE id = ?", repeated)
+        self.assertIn("(max 6)", repeated)
+
+    def test_report_without_statistics(self):
+        """
+        Test the report fails when nothing was flushed
+        """
+        with self.assertRaises(CommandError):
+            call_command("query_report", stdout=StringIO())
@@ -0,0 +1,230 @@
+"""
+Test for the routing of the reads to the read replicas
+"""
+import shutil
+import tempfile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import Journal, JournalTables, Activities
+from core.routers import ReplicaRouter, read_alias
+
+REPLICA_ALIAS = "replica"
+ACTIVITIES_URL = reverse("journal:activities-list")
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+def journal_reads(queries):
+    return [query for query in queries if 'FROM "core_journal"' in query["sql"]]
+
+
+def activities_reads(queries):
+    return [query for query in queries if 'FROM "core_activities"' in query["sql"]]
+
+
+class ReplicaRouterTests(TestCase):
+    """
+    Tests for the databases the router picks
+    """
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        settings_override = override_settings(DATABASE_REPLICAS=[REPLICA_ALIAS])
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_reads_follow_request(self):
+        """
+        Test the reads go to the replica of the request and the writes to
+        the primary
+        """
+        self.assertEqual(self.router.db_for_read(Journal), DEFAULT_DB_ALIAS)
+
+        token = read_alias.set(REPLICA_ALIAS)
+        self.addCleanup(read_alias.reset, token)
+
+        self.assertEqual(self.router.db_for_read(Journal), REPLICA_ALIAS)
+        self.assertEqual(self.router.db_for_write(Journal), DEFAULT_DB_ALIAS)
+        instance = Journal()
+        instance._state.db = DEFAULT_DB_ALIAS
+        self.assertEqual(
+            self.router.db_for_read(Journal, instance=instance), DEFAULT_DB_ALIAS
+        )
+
+    def test_replicas_not_migrated(self):
+        """
+        Test the migrations only run on the primary
+        """
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, "core"))
+        self.assertFalse(self.router.allow_migrate(REPLICA_ALIAS, "core"))
+
+
+class ReplicaRoutingApiTests(TransactionTestCase):
+    """
+    Tests for the routing of the requests with a second alias of the test
+    database standing for a replica
+    """
+
+    # the replica alias is added by setUpClass, after the runner set up the
+    # test databases
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        connections.settings[REPLICA_ALIAS] = {
+            **connections[DEFAULT_DB_ALIAS].settings_dict,
+            "TEST": {
+                **connections[DEFAULT_DB_ALIAS].settings_dict["TEST"],
+                "MIRROR": DEFAULT_DB_ALIAS,
+            },
+        }
+        # removed even when the set up of the class fails
+        cls.addClassCleanup(cls.remove_replica_alias)
+        super().setUpClass()
+
+    @classmethod
+    def remove_replica_alias(cls):
+        connections[REPLICA_ALIAS].close()
+        del connections[REPLICA_ALIAS]
+        del connections.settings[REPLICA_ALIAS]
+
+    def setUp(self):
+        self.sticky_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.sticky_dir)
+        settings_override = override_settings(
+            DATABASE_REPLICAS=[REPLICA_ALIAS],
+            REPLICA_STICKY_DIR=self.sticky_dir,
+            REPLICA_STICKY_SECONDS=60,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = create_user(
+            email="user@example.com", username="testuser", password="Awesomeuser123"
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        self.url = reverse("journal:journal-detail", args=[self.journal.id])
+        self.client = self.create_client(self.user)
+
+    def create_client(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+        )
+        return client
+
+    def get_journal(self, client):
+        """
+        Return the response of the journal and its reads on the primary and
+        the replica
+        """
+        with CaptureQueriesContext(
+            connections[DEFAULT_DB_ALIAS]
+        ) as primary, CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica:
+            res = client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, journal_reads(primary), journal_reads(replica)
+
+    def test_safe_requests_read_replica(self):
+        """
+        Test the reads of a GET request go to the replica
+        """
+        res, primary_reads, replica_reads = self.get_journal(self.client)
+
+        self.assertEqual(res.data["id"], self.journal.id)
+        self.assertFalse(primary_reads)
+        self.assertTrue(replica_reads)
+
+    def test_writes_stick_to_primary(self):
+        """
+        Test the reads after a write of the same credentials go to the
+        primary while the other users still read the replica
+        """
+        res = self.client.patch(self.url, {"journal_name": "Renamed"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res, primary_reads, replica_reads = self.get_journal(self.client)
+
+        self.assertEqual(res.data["journal_name"], "Renamed")
+        self.assertTrue(primary_reads)
+        self.assertFalse(replica_reads)
+
+        other_user = create_user(
+            email="other@example.com", username="otheruser", password="Awesomeuser123"
+        )
+        self.url = reverse(
+            "journal:journal-detail",
+            args=[Journal.objects.create(user=other_user).id],
+        )
+        _, primary_reads, replica_reads = self.get_journal(
+            self.create_client(other_user)
+        )
+        self.assertFalse(primary_reads)
+        self.assertTrue(replica_reads)
+
+    def test_failed_writes_do_not_stick(self):
+        """
+        Test the reads after a rejected write still go to the replica
+        """
+        res = self.client.post(ACTIVITIES_URL, {})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        _, primary_reads, replica_reads = self.get_journal(self.client)
+
+        self.assertFalse(primary_reads)
+        self.assertTrue(replica_reads)
+
+    def test_streamed_body_reads_replica(self):
+        """
+        Test the reads of a streamed response body go to the replica like
+        the rest of its request
+        """
+        table = JournalTables.objects.create(journal=self.journal)
+        Activities.objects.create(journal_table=table, owner=self.user, name="Run")
+
+        with CaptureQueriesContext(
+            connections[DEFAULT_DB_ALIAS]
+        ) as primary, CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica:
+            res = self.client.get(ACTIVITIES_URL, {"stream": "true"})
+            body = b"".join(res.streaming_content)
+
+        self.assertIn(b'"Run"', body)
+        self.assertFalse(activities_reads(primary))
+        self.assertTrue(activities_reads(replica))
+
+    def test_stickiness_expires(self):
+        """
+        Test the reads go back to the replica once the sticky window passed
+        """
+        with override_settings(REPLICA_STICKY_SECONDS=0):
+            self.client.patch(self.url, {"journal_name": "Renamed"})
+
+            _, primary_reads, replica_reads = self.get_journal(self.client)
+
+        self.assertFalse(primary_reads)
+        self.assertTrue(replica_reads)
+
+    def test_unreplicated_token_read_from_primary(self):
+        """
+        Test a token the replica does not have yet is authenticated from the
+        primary
+        """
+        with transaction.atomic():
+            # uncommitted, only visible through the primary's connection
+            Token.objects.filter(user=self.user).delete()
+            client = self.create_client(self.user)
+            res, _, replica_reads = self.get_journal(client)
+
+        self.assertEqual(res.data["id"], self.journal.id)
+        self.assertTrue(replica_reads)
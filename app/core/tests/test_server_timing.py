@@ -0,0 +1,91 @@
+"""
+Test for the Server-Timing middleware
+"""
+import re
+from itertools import count
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import Journal, JournalTables, Activities
+
+
+def journal_detail_url(journal_id):
+    """
+    Return the journal detail url
+    """
+    return reverse("journal:journal-detail", args=[journal_id])
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+def parse_server_timing(header):
+    return {
+        metric.split(";")[0]: float(re.search(r"dur=([\d.]+)", metric).group(1))
+        for metric in header.split(", ")
+    }
+
+
+class PrivateServerTimingApiTests(TestCase):
+    """
+    Private tests for the Server-Timing header
+    """
+
+    def setUp(self):
+        self.user = create_user(
+            email="user@example.com", username="testuser", password="Awesomeuser123"
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+        Activities.objects.create(journal_table=table, name="Entry")
+
+    def get_client(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_sampled_request_reports_timings(self):
+        """
+        Test a sampled request reports its phases and query count in the
+        header and the log
+        """
+        client = self.get_client()
+
+        # every clock reading advances 1ms so each timed phase is measured
+        with patch("time.perf_counter", side_effect=count(step=0.001)):
+            with CaptureQueriesContext(connection) as queries:
+                with self.assertLogs("core.middleware", "INFO") as logs:
+                    res = client.get(journal_detail_url(self.journal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        header = res["Server-Timing"]
+        self.assertIn(f'desc="{len(queries)} queries"', header)
+        timings = parse_server_timing(header)
+        self.assertEqual(set(timings), {"db", "serialize", "render", "total"})
+        self.assertGreater(timings["serialize"], 0)
+        self.assertGreater(timings["render"], 0)
+        self.assertGreaterEqual(timings["total"], timings["serialize"])
+        record = logs.records[0]
+        self.assertEqual(record.queries, len(queries))
+        self.assertEqual(record.status, 200)
+
+    def test_timing_off_by_default(self):
+        """
+        Test no header is added when sampling is off
+        """
+        res = self.get_client().get(journal_detail_url(self.journal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Server-Timing", res)
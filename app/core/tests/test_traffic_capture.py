@@ -0,0 +1,240 @@
+"""
+Test for the traffic capture middleware and the replay command
+"""
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from django.test import TestCase, LiveServerTestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import Tags
+from core.traffic import anonymize, anonymize_user, read_captured
+
+TAGS_URL = reverse("journal:tags-list")
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+class CaptureDirMixin:
+    def setUp(self):
+        super().setUp()
+        self.capture_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.capture_dir)
+        settings_override = override_settings(
+            TRAFFIC_CAPTURE=True,
+            TRAFFIC_CAPTURE_DIR=self.capture_dir,
+            TRAFFIC_CAPTURE_SAMPLE_RATE=1,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = create_user(
+            email="user@example.com", username="testuser", password="Awesomeuser123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_captured(self):
+        return read_captured([f"{self.capture_dir}/*.jsonl*"])
+
+
+class TrafficCaptureTests(CaptureDirMixin, TestCase):
+    """
+    Tests for the captured requests
+    """
+
+    def test_captures_anonymized_api_requests(self):
+        """
+        Test the journal requests are captured without their free text and
+        other paths are not captured
+        """
+        res = self.client.post(
+            TAGS_URL,
+            {
+                "tag_name": "Therapy",
+                "tag_color": Tags.Colors.RED,
+                "tag_class": Tags.ColorsClasses.RED_CLASS,
+            },
+            format="json",
+        )
+        self.client.get(TAGS_URL, {"ordering": "-usage", "q": "secret"})
+        self.client.get(reverse("healthcheck"))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        post, get = self.get_captured()
+        self.assertEqual(post["method"], "POST")
+        self.assertEqual(post["path"], TAGS_URL)
+        self.assertEqual(post["status"], 201)
+        self.assertEqual(
+            post["body"],
+            {
+                "tag_name": "xxxxxxx",
+                "tag_color": Tags.Colors.RED,
+                "tag_class": Tags.ColorsClasses.RED_CLASS,
+            },
+        )
+        self.assertIsNotNone(post["user"])
+        self.assertEqual(len(post["user"]), 12)
+        self.assertEqual(get["query"], "ordering=-usage&q=xxxxxx")
+        self.assertIsNone(get["body"])
+
+    def test_anonymize_keeps_ids_and_structure(self):
+        """
+        Test anonymizing redacts credentials and keeps ids and nesting
+        """
+        body = {
+            "email": "user@example.com",
+            "password": "Awesomeuser123",
+            "activities_list": [{"ids": [1, 2], "name": "Run", "tags": ["3"]}],
+        }
+
+        self.assertEqual(
+            anonymize(body),
+            {
+                "email": "[redacted]",
+                "password": "[redacted]",
+                "activities_list": [{"ids": [1, 2], "name": "xxx", "tags": ["3"]}],
+            },
+        )
+
+    @override_settings(TRAFFIC_CAPTURE=False)
+    def test_capture_disabled(self):
+        """
+        Test nothing is captured when the capture is off
+        """
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.client.get(TAGS_URL)
+
+        self.assertEqual(self.get_captured(), [])
+
+    def test_replay_tokens_maps_pseudonyms_to_valid_tokens(self):
+        """
+        Test the tokens file maps the pseudonyms of the given and captured
+        users to valid tokens, replacing the expired ones
+        """
+        other_user = create_user(
+            email="other@example.com", username="otheruser", password="Awesomeuser123"
+        )
+        create_user(
+            email="idle@example.com", username="idleuser", password="Awesomeuser123"
+        )
+        expired = Token.objects.create(user=other_user)
+        Token.objects.filter(pk=expired.pk).update(
+            created=timezone.now() - timedelta(days=4)
+        )
+        self.client.force_authenticate(other_user)
+        self.client.get(TAGS_URL)
+        out = StringIO()
+
+        call_command(
+            "replay_tokens",
+            "user@example.com",
+            captured=[f"{self.capture_dir}/*.jsonl"],
+            stdout=out,
+        )
+
+        tokens = json.loads(out.getvalue())
+        self.assertEqual(
+            tokens,
+            {
+                anonymize_user(self.user): Token.objects.get(user=self.user).key,
+                anonymize_user(other_user): Token.objects.get(user=other_user).key,
+            },
+        )
+        self.assertNotEqual(tokens[anonymize_user(other_user)], expired.key)
+
+
+class ReplayTrafficTests(CaptureDirMixin, LiveServerTestCase):
+    """
+    Tests for replaying the captured requests against a running server
+    """
+
+    def test_replay_captured_requests(self):
+        """
+        Test the replay command re-issues the captured requests
+        """
+        for name in ["Work", "Family"]:
+            self.client.post(
+                TAGS_URL,
+                {
+                    "tag_name": name,
+                    "tag_color": Tags.Colors.RED,
+                    "tag_class": Tags.ColorsClasses.RED_CLASS,
+                },
+                format="json",
+            )
+        self.client.get(TAGS_URL)
+        out = StringIO()
+
+        with override_settings(TRAFFIC_CAPTURE=False):
+            call_command(
+                "replay_traffic",
+                f"{self.capture_dir}/*.jsonl",
+                base_url=self.live_server_url,
+                token=Token.objects.create(user=self.user).key,
+                speedup=0,
+                concurrency=2,
+                stdout=out,
+                stderr=StringIO(),
+            )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["requests"], 3)
+        routes = report["routes"]
+        self.assertEqual(routes["POST api/journal/tags/$"]["statuses"], {"201": 2})
+        self.assertEqual(routes["GET api/journal/tags/$"]["statuses"], {"200": 1})
+        self.assertEqual(Tags.objects.filter(tag_name="Xxxx").count(), 1)
+
+    def test_replay_maps_captured_users_to_tokens(self):
+        """
+        Test the requests of each captured user are replayed with its token
+        and the users without one are reported
+        """
+        self.client.get(TAGS_URL)
+        other_user = create_user(
+            email="other@example.com", username="otheruser", password="Awesomeuser123"
+        )
+        self.client.force_authenticate(other_user)
+        self.client.get(TAGS_URL)
+        self.client.get(TAGS_URL)
+        tokens_path = f"{self.capture_dir}/tokens.json"
+        with open(tokens_path, "w") as tokens_file:
+            json.dump(
+                {anonymize_user(self.user): Token.objects.create(user=self.user).key},
+                tokens_file,
+            )
+        out = StringIO()
+
+        with override_settings(TRAFFIC_CAPTURE=False):
+            call_command(
+                "replay_traffic",
+                f"{self.capture_dir}/*.jsonl",
+                base_url=self.live_server_url,
+                tokens=tokens_path,
+                speedup=0,
+                stdout=out,
+                stderr=StringIO(),
+            )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(
+            report["routes"]["GET api/journal/tags/$"]["statuses"],
+            {"200": 1, "401": 2},
+        )
+        self.assertEqual(
+            report["unmapped"],
+            {"requests": 2, "users": {anonymize_user(other_user): 2}},
+        )
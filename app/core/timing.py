@@ -0,0 +1,93 @@
+"""
+Per request timing of the database, serialization and rendering, reported
+by the ServerTimingMiddleware
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+TIMED_PHASES = ["db", "serialize", "render"]
+
+current_timer = ContextVar("current_timer", default=None)
+
+
+class RequestTimer:
+    """
+    Accumulates the time a request spends in each phase
+    """
+
+    def __init__(self):
+        self.durations = dict.fromkeys(TIMED_PHASES, 0.0)
+        self.queries = 0
+        self.total = 0.0
+        self.running = set()
+
+    def time_query(self, execute, sql, params, many, context):
+        """
+        Execute wrapper timing and counting the queries
+        """
+        start_time = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations["db"] += time.perf_counter() - start_time
+            self.queries += 1
+
+    def get_header(self):
+        """
+        Return the Server-Timing header value, durations in ms
+        """
+        metrics = [
+            f"{phase};dur={self.durations[phase] * 1000:.3f}" for phase in TIMED_PHASES
+        ]
+        metrics[0] += f';desc="{self.queries} queries"'
+        return ", ".join(metrics + [f"total;dur={self.total * 1000:.3f}"])
+
+    def get_log_fields(self):
+        fields = {
+            f"{phase}_ms": round(self.durations[phase] * 1000, 3)
+            for phase in TIMED_PHASES
+        }
+        fields.update(queries=self.queries, total_ms=round(self.total * 1000, 3))
+        return fields
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in the block to the current request's phase, nested
+    blocks of the same phase are only counted once
+    """
+    timer = current_timer.get()
+    if timer is None or phase in timer.running:
+        yield
+        return
+
+    timer.running.add(phase)
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.durations[phase] += time.perf_counter() - start_time
+        timer.running.discard(phase)
+
+
+class TimedRepresentationMixin:
+    """
+    Serializer mixin timing the representation of the instances, including
+    the queries it runs
+    """
+
+    def to_representation(self, instance):
+        with timed("serialize"):
+            return super().to_representation(instance)
+
+
+class TimedRendererMixin:
+    """
+    Renderer mixin timing the rendering of the responses
+    """
+
+    def render(self, *args, **kwargs):
+        with timed("render"):
+            return super().render(*args, **kwargs)
@@ -0,0 +1,118 @@
+"""
+Capture of sampled API traffic to rotating JSONL files for offline replay
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+from logging.handlers import RotatingFileHandler
+from urllib.parse import parse_qsl, urlencode
+from django.conf import settings
+
+CAPTURE_PATH_PREFIXES = ("/api/journal/", "/api/user/")
+
+CAPTURE_MAX_BODY_SIZE = 64 * 1024
+
+# values sent under these keys never reach the capture files
+REDACTED_FIELDS = {
+    "password",
+    "password1",
+    "password2",
+    "old_password",
+    "new_password1",
+    "new_password2",
+    "email",
+    "username",
+    "first_name",
+    "last_name",
+    "token",
+    "key",
+    "uid",
+}
+
+# enum like values kept as is so the replayed calls still validate, every
+# other string is replaced by a placeholder of the same length
+KEPT_FIELDS = {
+    "tag_color",
+    "tag_class",
+    "type",
+    "file_type",
+    "ordering",
+    "tags_match",
+    "stream",
+    "checked",
+    "created_after",
+    "created_before",
+}
+
+REDACTED_VALUE = "[redacted]"
+
+
+def anonymize(value, key=None):
+    """
+    Return a copy of a decoded JSON body without its personal data, keeping
+    its structure, ids and sizes
+    """
+    if key in REDACTED_FIELDS:
+        return REDACTED_VALUE
+    if isinstance(value, dict):
+        return {k: anonymize(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [anonymize(item, key) for item in value]
+    if isinstance(value, str) and key not in KEPT_FIELDS and not value.isdigit():
+        return "x" * len(value)
+    return value
+
+
+def anonymize_query(query_string):
+    return urlencode(
+        [
+            (key, anonymize(value, key))
+            for key, value in parse_qsl(query_string, keep_blank_values=True)
+        ]
+    )
+
+
+def anonymize_user(user):
+    """
+    Return a stable pseudonym of an authenticated user, so replays can tell
+    the captured users apart
+    """
+    if user is None or not user.is_authenticated:
+        return None
+    return hashlib.sha256(f"{settings.SECRET_KEY}:{user.pk}".encode()).hexdigest()[:12]
+
+
+def get_capture_logger():
+    """
+    Return the logger writing the capture file of this worker, each uWSGI
+    worker rotates its own file
+    """
+    path = os.path.join(settings.TRAFFIC_CAPTURE_DIR, f"capture.{os.getpid()}.jsonl")
+    logger = logging.getLogger(f"core.traffic.{path}")
+    if not logger.handlers:
+        os.makedirs(settings.TRAFFIC_CAPTURE_DIR, exist_ok=True)
+        logger.addHandler(
+            RotatingFileHandler(
+                path,
+                maxBytes=settings.TRAFFIC_CAPTURE_MAX_BYTES,
+                backupCount=settings.TRAFFIC_CAPTURE_BACKUP_COUNT,
+            )
+        )
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def read_captured(paths):
+    """
+    Return the captured requests of the capture files matching `paths`
+    ordered by their capture time
+    """
+    records = []
+    for pattern in paths:
+        for path in glob.glob(pattern):
+            with open(path) as capture_file:
+                records += [json.loads(line) for line in capture_file if line.strip()]
+    return sorted(records, key=lambda record: record["timestamp"])
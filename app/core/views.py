@@ -1,5 +1,15 @@
-from rest_framework.decorators import api_view
+import hmac
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
+from core import memory
+from core.health import get_readiness
+from core.metrics import registry, render_metrics
+
 
 # Create your views here.
 @api_view(["GET"])
@@ -8,3 +18,88 @@ def health_check(request):
     Ping the API to know if its up
     """
     return Response({"healthy": True})
+
+
+@api_view(["GET"])
+def readiness_check(request):
+    """
+    Probe the database, the migrations and the cache to know if the API can
+    serve requests, the results are cached for a few seconds
+    """
+    readiness = get_readiness()
+    return Response(
+        readiness,
+        status=status.HTTP_200_OK
+        if readiness["healthy"]
+        else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def metrics(request):
+    """
+    Expose the metrics of all the workers in the Prometheus text format to
+    the holders of the METRICS_TOKEN bearer token, or to the admins when no
+    token is set
+    """
+    if settings.METRICS_TOKEN:
+        authorized = hmac.compare_digest(
+            request.headers.get("Authorization", ""),
+            f"Bearer {settings.METRICS_TOKEN}",
+        )
+    else:
+        authorized = request.user.is_staff
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(registry.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def check_memory_profiling():
+    if not settings.MEMORY_PROFILING:
+        raise ValidationError("Memory profiling is disabled")
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def memory_reports(request):
+    """
+    Return the memory profiling status of the worker and the latest reports
+    of all the workers
+    """
+    check_memory_profiling()
+    return Response({"worker": memory.get_status(), "reports": memory.read_reports()})
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def memory_start(request):
+    """
+    Start tracing the allocations of the worker handling the request and
+    report the allocation sites that grew after the next `requests` requests
+    """
+    check_memory_profiling()
+    try:
+        requests = int(request.data.get("requests", 100))
+        frames = int(request.data.get("frames", 1))
+    except (TypeError, ValueError):
+        raise ValidationError("`requests` and `frames` should be integers")
+    if requests < 1 or frames < 1:
+        raise ValidationError("`requests` and `frames` should be positive")
+
+    memory.start_session(requests, frames)
+    return Response(memory.get_status(), status=status.HTTP_201_CREATED)
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def memory_stop(request):
+    """
+    Stop tracing the allocations of the worker without a report
+    """
+    check_memory_profiling()
+    memory.stop_session()
+    return Response(memory.get_status())
@@ -0,0 +1,189 @@
+"""
+Vectorized analytics over the activities of a journal
+
+Each metric is computed from a few column arrays pulled with `values_list`
+queries, no per activity python loop is involved. The per day metrics read
+the daily rollups so they fetch one row per active day instead of one per
+activity.
+"""
+from itertools import chain
+from django.utils import timezone
+import numpy as np
+from core.models import (
+    Activities,
+    Intentions,
+    Happenings,
+    GratefulFor,
+    JournalDailyRollups,
+    JournalTables,
+)
+from journal.config import ANALYTICS_FETCH_CHUNK_SIZE, ANALYTICS_TOP_TAG_PAIRS
+
+WEEKDAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
+
+# the submodels with the field left empty in the default one every activity
+# is created with, which is not counted
+AVERAGED_SUBMODELS = [
+    (Intentions, "intention", "intentions"),
+    (Happenings, "happening", "happenings"),
+    (GratefulFor, "grateful_for", "grateful_for"),
+]
+
+
+def fetch_columns(queryset, fields, dtype):
+    """
+    Return the `fields` of every row of `queryset` as the columns of an array
+    """
+    values = queryset.values_list(*fields).order_by()
+    flat = chain.from_iterable(values.iterator(chunk_size=ANALYTICS_FETCH_CHUNK_SIZE))
+    return np.fromiter(flat, dtype=dtype).reshape(-1, len(fields)).T
+
+
+def get_daily_columns(journal):
+    """
+    Return the day ordinals with their activities, action items and checked
+    action items counts
+    """
+    rollups = JournalDailyRollups.objects.filter(journal=journal)
+    days = [
+        (day.toordinal(), activities, action_items, checked)
+        for day, activities, action_items, checked in rollups.values_list(
+            "day",
+            "activities_count",
+            "action_items_count",
+            "action_items_checked_count",
+        ).order_by()
+    ]
+    return np.array(days, dtype=np.int64).reshape(-1, 4).T
+
+
+def get_streaks(days, today):
+    """
+    Return the longest and current runs of consecutive days with activities
+    """
+    active_days = np.unique(days)
+    if active_days.size == 0:
+        return {"longest": 0, "current": 0, "active_days": 0}
+
+    # a run starts wherever the gap to the previous active day is not one day
+    run_starts = np.flatnonzero(np.diff(active_days, prepend=active_days[0] - 2) != 1)
+    run_lengths = np.diff(np.append(run_starts, active_days.size))
+
+    current = 0
+    if today - active_days[-1] <= 1:
+        current = int(run_lengths[-1])
+
+    return {
+        "longest": int(run_lengths.max()),
+        "current": current,
+        "active_days": int(active_days.size),
+    }
+
+
+def get_entries_per_weekday(days, activities):
+    # ordinal 1 (0001-01-01) was a monday
+    weekdays = (days - 1) % 7
+    counts = np.bincount(weekdays, weights=activities, minlength=7)
+    return dict(zip(WEEKDAYS, counts.astype(np.int64).tolist()))
+
+
+def get_submodels_per_activity(table_ids, activities_count, action_items_count):
+    """
+    Return the average number of filled in submodels per activity, the
+    action items are counted by the rollups
+    """
+    counts = {
+        name: submodel.objects.filter(activity__journal_table_id__in=table_ids)
+        .exclude(**{field: ""})
+        .count()
+        for submodel, field, name in AVERAGED_SUBMODELS
+    }
+    counts["action_items"] = action_items_count
+    return {
+        name: round(count / activities_count, 3) if activities_count else 0
+        for name, count in counts.items()
+    }
+
+
+def get_action_items_completion(action_items, checked):
+    total = int(action_items.sum())
+    checked_count = int(checked.sum())
+    return {
+        "total": total,
+        "checked": checked_count,
+        "completion_rate": round(checked_count / total, 3) if total else 0,
+    }
+
+
+def get_tag_co_occurrence(table_ids, limit=ANALYTICS_TOP_TAG_PAIRS):
+    """
+    Return the pairs of tags most often set on the same activity
+    """
+    ActivitiesTags = Activities.tags.through
+    activity_ids, tag_ids = fetch_columns(
+        ActivitiesTags.objects.filter(activities__journal_table_id__in=table_ids),
+        ["activities_id", "tags_id"],
+        np.int64,
+    )
+    if activity_ids.size < 2:
+        return []
+
+    order = np.lexsort((tag_ids, activity_ids))
+    activity_ids, tag_ids = activity_ids[order], tag_ids[order]
+    tags, tag_index = np.unique(tag_ids, return_inverse=True)
+
+    # tags of an activity are adjacent once sorted, pairing every row with the
+    # rows `offset` after it that share its activity yields each pair once
+    max_tags = np.unique(activity_ids, return_counts=True)[1].max()
+
+    first, second = [], []
+    for offset in range(1, int(max_tags)):
+        same_activity = activity_ids[:-offset] == activity_ids[offset:]
+        first.append(tag_index[:-offset][same_activity])
+        second.append(tag_index[offset:][same_activity])
+    if not first:
+        return []
+
+    pair_codes = np.concatenate(first) * tags.size + np.concatenate(second)
+    codes, counts = np.unique(pair_codes, return_counts=True)
+    top = np.argsort(-counts, kind="stable")[:limit]
+
+    return [
+        {
+            "tags": [int(tags[code // tags.size]), int(tags[code % tags.size])],
+            "count": int(count),
+        }
+        for code, count in zip(codes[top], counts[top])
+    ]
+
+
+def get_journal_stats(journal):
+    """
+    Return the streaks, entries per weekday, submodels per activity, action
+    items completion and tag co-occurrence of `journal`
+    """
+    days, activities, action_items, checked = get_daily_columns(journal)
+    activities_count = int(activities.sum())
+    # filtering by the table ids saves joining the tables in every query
+    table_ids = list(
+        JournalTables.objects.filter(journal=journal).values_list("id", flat=True)
+    )
+
+    return {
+        "activities_count": activities_count,
+        "streaks": get_streaks(days[activities > 0], timezone.localdate().toordinal()),
+        "entries_per_weekday": get_entries_per_weekday(days, activities),
+        "submodels_per_activity": get_submodels_per_activity(
+            table_ids, activities_count, int(action_items.sum())
+        ),
+        "action_items": get_action_items_completion(action_items, checked),
+        "tag_co_occurrence": get_tag_co_occurrence(table_ids),
+    }
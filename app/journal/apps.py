@@ -2,5 +2,8 @@ from django.apps import AppConfig
 
 
 class JournalConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'journal'
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "journal"
+
+    def ready(self):
+        from journal import signals  # noqa: F401
@@ -0,0 +1,231 @@
+"""
+Prefix and fuzzy autocomplete for tag names and activity names
+"""
+import threading
+import time
+from collections import deque, Counter, OrderedDict
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, When, Value, IntegerField, Q
+from core.metrics import registry
+from journal.config import (
+    AUTOCOMPLETE_LIMIT,
+    AUTOCOMPLETE_TRIE_DEPTH,
+    AUTOCOMPLETE_TRIE_TTL,
+    AUTOCOMPLETE_TRIE_CACHE_SIZE,
+    AUTOCOMPLETE_FUZZY_THRESHOLD,
+)
+
+
+_trigram_available = {}
+# (built, trie) by (kind, user id), least recently used first
+_trie_cache = OrderedDict()
+_trie_cache_lock = threading.Lock()
+
+
+def trigram_available():
+    """
+    Whether the pg_trgm extension is installed on the default database
+    """
+    if connection.alias not in _trigram_available:
+        available = False
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                available = cursor.fetchone() is not None
+        _trigram_available[connection.alias] = available
+    return _trigram_available[connection.alias]
+
+
+def tokenize(text):
+    text = (text or "").lower()
+    tokens = text.split()
+    if text and text not in tokens:
+        tokens.append(text)
+    return tokens
+
+
+def get_trigrams(word):
+    """
+    Return the trigrams of a word padded like pg_trgm pads them
+    """
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class Trie:
+    """
+    Prefix tree over the words of an autocomplete field. Nodes are only
+    created `depth` characters deep, longer prefixes are resolved by checking
+    the candidates found at that depth. The words are also indexed by
+    trigram for the fuzzy completions
+    """
+
+    def __init__(self, depth=AUTOCOMPLETE_TRIE_DEPTH):
+        self.depth = depth
+        self.root = {}
+        self.entries = []
+        self.word_entries = {}
+        self.trigram_words = {}
+
+    def insert(self, text, payload):
+        entry_index = len(self.entries)
+        tokens = tokenize(text)
+        self.entries.append((tokens, payload))
+
+        for token in tokens:
+            node = self.root
+            for char in token[: self.depth]:
+                node = node.setdefault(char, {})
+            node.setdefault(None, []).append(entry_index)
+
+            # the whole text of multi word entries is only for the prefixes
+            if " " in token:
+                continue
+            if token not in self.word_entries:
+                self.word_entries[token] = []
+                for trigram in get_trigrams(token):
+                    self.trigram_words.setdefault(trigram, []).append(token)
+            self.word_entries[token].append(entry_index)
+
+    def search(self, text, limit=AUTOCOMPLETE_LIMIT):
+        """
+        Return the payloads of the entries with a word starting with `text`,
+        then of those with a word similar to it
+        """
+        matches = self.prefix_matches(text, limit)
+        if len(matches) < limit:
+            matches += self.fuzzy_matches(text, limit - len(matches), set(matches))
+        return [self.entries[entry_index][1] for entry_index in matches]
+
+    def prefix_matches(self, prefix, limit):
+        prefix = prefix.lower()
+        node = self.root
+        for char in prefix[: self.depth]:
+            node = node.get(char)
+            if node is None:
+                return []
+
+        check_tokens = len(prefix) > self.depth
+        matches = []
+        seen = set()
+        # breadth first so shorter completions come first
+        nodes = deque([node])
+        while nodes and len(matches) < limit:
+            node = nodes.popleft()
+            for entry_index in node.get(None, []):
+                if entry_index in seen:
+                    continue
+                tokens = self.entries[entry_index][0]
+                if check_tokens and not any(t.startswith(prefix) for t in tokens):
+                    continue
+                seen.add(entry_index)
+                matches.append(entry_index)
+                if len(matches) == limit:
+                    break
+            nodes.extend(child for char, child in node.items() if char is not None)
+        return matches
+
+    def fuzzy_matches(self, text, limit, seen):
+        """
+        Return the entries with a word whose trigram similarity to `text`
+        reaches `AUTOCOMPLETE_FUZZY_THRESHOLD`, most similar first
+        """
+        trigrams = get_trigrams(text.lower())
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self.trigram_words.get(trigram, ()))
+
+        similar = []
+        for word, count in shared.items():
+            similarity = count / (len(trigrams) + len(get_trigrams(word)) - count)
+            if similarity >= AUTOCOMPLETE_FUZZY_THRESHOLD:
+                similar.append((-similarity, word))
+
+        matches = []
+        for _, word in sorted(similar):
+            for entry_index in self.word_entries[word]:
+                if entry_index in seen:
+                    continue
+                seen.add(entry_index)
+                matches.append(entry_index)
+                if len(matches) == limit:
+                    return matches
+        return matches
+
+
+def get_trie(cache_key, queryset, field, fields):
+    """
+    Return the trie of `cache_key` from the worker's cache, which keeps the
+    `AUTOCOMPLETE_TRIE_CACHE_SIZE` most recently used tries for
+    `AUTOCOMPLETE_TRIE_TTL` seconds
+    """
+    with _trie_cache_lock:
+        cached = _trie_cache.get(cache_key)
+        if cached is not None:
+            if time.monotonic() - cached[0] < AUTOCOMPLETE_TRIE_TTL:
+                _trie_cache.move_to_end(cache_key)
+                registry.inc(
+                    "journal_cache_requests_total", cache="autocomplete", result="hit"
+                )
+                return cached[1]
+            del _trie_cache[cache_key]
+    registry.inc("journal_cache_requests_total", cache="autocomplete", result="miss")
+
+    trie = Trie()
+    for row in queryset.values(*fields).iterator():
+        trie.insert(row[field], row)
+
+    now = time.monotonic()
+    with _trie_cache_lock:
+        _trie_cache[cache_key] = (now, trie)
+        _trie_cache.move_to_end(cache_key)
+        while len(_trie_cache) > AUTOCOMPLETE_TRIE_CACHE_SIZE:
+            _trie_cache.popitem(last=False)
+        # the expired tries of the users not looked up since
+        expired = [
+            key
+            for key, (built, _) in _trie_cache.items()
+            if now - built >= AUTOCOMPLETE_TRIE_TTL
+        ]
+        for key in expired:
+            del _trie_cache[key]
+    return trie
+
+
+def invalidate_trie(kind, user_id):
+    with _trie_cache_lock:
+        _trie_cache.pop((kind, user_id), None)
+
+
+def has_cached_tries():
+    return bool(_trie_cache)
+
+
+def get_completions(
+    kind, user_id, queryset, field, fields, text, limit=AUTOCOMPLETE_LIMIT
+):
+    """
+    Return up to `limit` rows of `queryset` whose `field` starts with or is
+    similar to `text`. Uses the pg_trgm indexes when available and an in
+    process trie with a trigram index otherwise
+    """
+    if trigram_available():
+        return list(
+            queryset.filter(
+                Q(**{f"{field}__istartswith": text})
+                | Q(**{f"{field}__trigram_word_similar": text})
+            )
+            .annotate(
+                is_prefix=Case(
+                    When(**{f"{field}__istartswith": text}, then=Value(1)),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ),
+                similarity=TrigramWordSimilarity(text, field),
+            )
+            .order_by("-is_prefix", "-similarity", field)
+            .values(*fields)[:limit]
+        )
+
+    return get_trie((kind, user_id), queryset, field, fields).search(text, limit)
@@ -0,0 +1,201 @@
+"""
+Batch deletes and duplicates of activities and submodels in a constant number
+of queries, the denormalized journal data is updated once for the whole batch
+instead of by the per row signal receivers
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import transaction
+from django.db.models import Max
+from core.models import Activities, ActionItems, Journal
+from journal.autocomplete import has_cached_tries, invalidate_trie
+from journal.config import SUBMODELS_LIST
+from journal.counters import (
+    ActivitiesTags,
+    apply_table_delta,
+    apply_tags_usage_delta,
+    is_open_action_item,
+    reconcile_table_counters,
+    reconcile_tags_usage,
+)
+from journal.rollups import (
+    apply_rollup_delta,
+    count_action_item,
+    get_rollup_day,
+    rebuild_daily_rollups,
+)
+from journal.search import refresh_search_documents
+
+_bulk_write = ContextVar("bulk_write", default=False)
+
+# the fields a duplicated submodel gets from its copied activity
+SUBMODEL_COPY_EXCLUDE = ["id", "activity", "ordering"]
+
+
+def is_bulk_write():
+    return _bulk_write.get()
+
+
+@contextmanager
+def bulk_write():
+    """
+    Make the per row delete receivers skip the rows deleted in the block, the
+    caller reconciles their journals afterwards
+    """
+    token = _bulk_write.set(True)
+    try:
+        yield
+    finally:
+        _bulk_write.reset(token)
+
+
+def reconcile_journals(journal_ids):
+    """
+    Recompute the rollups, table counters and tags usage of whole journals
+    """
+    journal_ids = list(journal_ids)
+    if not journal_ids:
+        return
+    rebuild_daily_rollups(journal_ids)
+    reconcile_table_counters(journal_ids)
+    reconcile_tags_usage(Journal.objects.filter(id__in=journal_ids).values("user_id"))
+
+
+def delete_in_bulk(queryset):
+    """
+    Delete the activities or submodels of `queryset`, reconciling the journals
+    they belong to and refreshing the search documents of the activities that
+    lost submodels
+    """
+    queryset = queryset.prefetch_related(None).order_by()
+    if queryset.model is Activities:
+        rows = queryset.values_list("journal_table__journal_id", "id")
+    else:
+        rows = queryset.values_list(
+            "activity__journal_table__journal_id", "activity_id"
+        )
+    journal_ids, activity_ids = set(), set()
+    for journal_id, activity_id in rows:
+        journal_ids.add(journal_id)
+        activity_ids.add(activity_id)
+    journal_ids.discard(None)
+    activity_ids.discard(None)
+
+    with transaction.atomic(), bulk_write():
+        queryset.delete()
+        # only the activities and action items are counted
+        if queryset.model in [Activities, ActionItems]:
+            reconcile_journals(journal_ids)
+    if queryset.model is not Activities:
+        refresh_search_documents(activity_ids)
+
+
+def get_duplicate_submodels(model, field, pairs):
+    for activity, duplicate in pairs:
+        for ordering, submodel in enumerate(getattr(activity, field).all(), 1):
+            yield model(
+                activity=duplicate,
+                ordering=ordering,
+                **{
+                    submodel_field.attname: getattr(submodel, submodel_field.attname)
+                    for submodel_field in model._meta.concrete_fields
+                    if submodel_field.name not in SUBMODEL_COPY_EXCLUDE
+                },
+            )
+
+
+def duplicate_activities(activities, journal_table=None):
+    """
+    Duplicate the `activities` queryset with their submodels and tags, after
+    the last activity of `journal_table` or else of their own tables, and
+    return the duplicates
+    """
+    activities = list(
+        activities.select_related("journal_table")
+        .prefetch_related("tags", *SUBMODELS_LIST)
+        .order_by("journal_table_id", "ordering", "id")
+    )
+    if not activities:
+        return []
+
+    tables = {
+        activity.journal_table_id: activity.journal_table for activity in activities
+    }
+    if journal_table is not None:
+        tables = {journal_table.id: journal_table}
+    last_ordering = dict(
+        Activities.objects.filter(journal_table_id__in=tables)
+        .order_by()
+        .values("journal_table_id")
+        .annotate(last=Max("ordering"))
+        .values_list("journal_table_id", "last")
+    )
+
+    duplicates = []
+    for activity in activities:
+        table = journal_table or activity.journal_table
+        last_ordering[table.id] = (last_ordering.get(table.id) or 0) + 1
+        duplicates.append(
+            Activities(
+                name=activity.name,
+                journal_table=table,
+                owner_id=activity.owner_id,
+                ordering=last_ordering[table.id],
+            )
+        )
+    pairs = list(zip(activities, duplicates))
+
+    with transaction.atomic():
+        Activities.objects.bulk_create(duplicates)
+        for field in SUBMODELS_LIST:
+            model = Activities._meta.get_field(field).related_model
+            model.objects.bulk_create(get_duplicate_submodels(model, field, pairs))
+        ActivitiesTags.objects.bulk_create(
+            ActivitiesTags(activities_id=duplicate.id, tags_id=tag.id)
+            for activity, duplicate in pairs
+            for tag in activity.tags.all()
+        )
+
+        duplicate_ids = [duplicate.id for duplicate in duplicates]
+        apply_tags_usage_delta(
+            ActivitiesTags.objects.filter(activities_id__in=duplicate_ids), 1
+        )
+
+        table_deltas = Counter()
+        rollup_deltas = Counter()
+        for activity, duplicate in pairs:
+            action_items = activity.action_items.all()
+            table_deltas[duplicate.journal_table_id, "activities"] += 1
+            table_deltas[duplicate.journal_table_id, "open_action_items"] += sum(
+                is_open_action_item(item.checked, item.action_item)
+                for item in action_items
+            )
+            bucket = (
+                duplicate.journal_table.journal_id,
+                get_rollup_day(duplicate.created),
+            )
+            rollup_deltas[bucket, "activities"] += 1
+            for item in action_items:
+                counted, checked = count_action_item(item.checked, item.action_item)
+                rollup_deltas[bucket, "action_items"] += counted
+                rollup_deltas[bucket, "action_items_checked"] += checked
+        for table_id in tables:
+            apply_table_delta(
+                table_id,
+                table_deltas[table_id, "activities"],
+                table_deltas[table_id, "open_action_items"],
+            )
+        for bucket in {bucket for bucket, _ in rollup_deltas}:
+            apply_rollup_delta(
+                *bucket,
+                activities=rollup_deltas[bucket, "activities"],
+                action_items=rollup_deltas[bucket, "action_items"],
+                action_items_checked=rollup_deltas[bucket, "action_items_checked"],
+            )
+        refresh_search_documents(duplicate_ids)
+
+    if has_cached_tries():
+        for owner_id in {duplicate.owner_id for duplicate in duplicates}:
+            invalidate_trie("activities", owner_id)
+    return duplicates
@@ -9,6 +9,40 @@ entries by a specific category such as daily or personal.
 
 DEFAULT_JOURNAL_NAME = "Untitled"
 
+EXPORT_CHUNK_SIZE = 500
+
+STREAM_CHUNK_SIZE = 200
+
+SEARCH_CONFIG = "english"
+
+SEARCH_PAGE_SIZE = 20
+
+AUTOCOMPLETE_LIMIT = 10
+
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+AUTOCOMPLETE_TRIE_DEPTH = 8
+
+# seconds a worker keeps its autocomplete trie before reloading it, bounds how
+# long writes handled by other workers stay invisible
+AUTOCOMPLETE_TRIE_TTL = 30
+
+# users whose autocomplete tries a worker keeps, the least recently used are
+# evicted past it
+AUTOCOMPLETE_TRIE_CACHE_SIZE = 128
+
+# trigram similarity, as pg_trgm computes it, of the fuzzy completions of the
+# trie, pg_trgm's default threshold
+AUTOCOMPLETE_FUZZY_THRESHOLD = 0.3
+
+TABLE_VIEW_CACHE_SIZE = 256
+
+TABLE_PAGE_SIZE = 50
+
+ANALYTICS_FETCH_CHUNK_SIZE = 50000
+
+ANALYTICS_TOP_TAG_PAIRS = 20
+
 SUBMODELS_LIST = [
     "intentions",
     "happenings",
@@ -19,7 +53,7 @@ SUBMODELS_LIST = [
 
 def get_table_defaults(journal):
     return [
-        {"journal": journal, "table_name": "All entries"},
+        {"journal": journal, "table_name": "All entries", "is_virtual": True},
         {"journal": journal, "table_name": "Daily entries"},
         {"journal": journal, "table_name": "Personal entries"},
     ]
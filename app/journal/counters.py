@@ -0,0 +1,145 @@
+"""
+Maintains the denormalized activity and open action item counters of the
+journal tables and the usage counts of the tags
+
+A virtual table counts the activities of every table of its journal, so each
+delta applied to a table is applied to the virtual tables of its journal in
+the same UPDATE. The empty action item every activity is created with is not
+counted as open.
+"""
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from core.models import Activities, ActionItems, JournalTables, Tags
+
+ActivitiesTags = Activities.tags.through
+
+OPEN_ACTION_ITEMS = Q(checked=False) & ~Q(action_item="")
+
+
+def is_open_action_item(checked, action_item):
+    return not checked and action_item != ""
+
+
+def get_activity_table(activity_id):
+    """
+    Return a subquery of the table of an activity to apply its deltas without
+    fetching it first
+    """
+    return Subquery(
+        Activities.objects.filter(id=activity_id).values("journal_table_id")
+    )
+
+
+def get_counted_tables(table_id):
+    journal_id = Subquery(
+        JournalTables.objects.filter(id=table_id).values("journal_id")
+    )
+    return Q(id=table_id) | Q(is_virtual=True, journal_id=journal_id)
+
+
+def apply_table_delta(table_id, activities=0, open_action_items=0):
+    """
+    Add the deltas to the counters of the table `table_id`, which can be an id
+    or a subquery, and of its journal's virtual tables
+    """
+    if table_id is None or not (activities or open_action_items):
+        return
+
+    JournalTables.objects.filter(get_counted_tables(table_id)).update(
+        activities_count=F("activities_count") + activities,
+        open_action_items_count=F("open_action_items_count") + open_action_items,
+    )
+
+
+def count_open_action_items(activity_id):
+    return ActionItems.objects.filter(
+        OPEN_ACTION_ITEMS, activity_id=activity_id
+    ).count()
+
+
+def count_subquery(queryset, group_by):
+    counts = queryset.order_by().values(group_by).annotate(count=Count("id"))
+    return Coalesce(Subquery(counts.values("count")), 0)
+
+
+def get_expected_counters(is_virtual):
+    """
+    Return the expressions counting the activities and open action items of a
+    table, or of its whole journal for virtual tables
+    """
+    if is_virtual:
+        activities = Activities.objects.filter(
+            journal_table__journal_id=OuterRef("journal_id")
+        )
+        action_items = ActionItems.objects.filter(
+            activity__journal_table__journal_id=OuterRef("journal_id")
+        )
+        table_field = "journal_table__journal_id"
+    else:
+        activities = Activities.objects.filter(journal_table_id=OuterRef("pk"))
+        action_items = ActionItems.objects.filter(
+            activity__journal_table_id=OuterRef("pk")
+        )
+        table_field = "journal_table_id"
+
+    return {
+        "activities_count": count_subquery(activities, table_field),
+        "open_action_items_count": count_subquery(
+            action_items.filter(OPEN_ACTION_ITEMS), f"activity__{table_field}"
+        ),
+    }
+
+
+def reconcile_table_counters(journal_ids=None):
+    """
+    Recompute the counters that drifted from the tables' rows, returns the
+    number of repaired tables
+    """
+    repaired = 0
+    for is_virtual in [False, True]:
+        tables = JournalTables.objects.filter(is_virtual=is_virtual)
+        if journal_ids is not None:
+            tables = tables.filter(journal_id__in=journal_ids)
+
+        expected = get_expected_counters(is_virtual)
+        drifted_ids = list(
+            tables.annotate(
+                **{f"expected_{field}": value for field, value in expected.items()}
+            )
+            .filter(
+                ~Q(activities_count=F("expected_activities_count"))
+                | ~Q(open_action_items_count=F("expected_open_action_items_count"))
+            )
+            .values_list("id", flat=True)
+        )
+        if drifted_ids:
+            JournalTables.objects.filter(id__in=drifted_ids).update(**expected)
+        repaired += len(drifted_ids)
+    return repaired
+
+
+def apply_tags_usage_delta(assignments, delta):
+    """
+    Add `delta` to the usage count of the tags of the `assignments`, a
+    queryset of the tags and activities through table, in a single UPDATE
+    """
+    usage = assignments.order_by().values("tags_id").annotate(count=Count("id"))
+    Tags.objects.filter(id__in=usage.values("tags_id")).update(
+        usage_count=F("usage_count")
+        + delta * Subquery(usage.filter(tags_id=OuterRef("pk")).values("count")[:1])
+    )
+
+
+def reconcile_tags_usage(user_ids=None):
+    """
+    Recompute the usage counts that drifted from the tags assignments in one
+    aggregate UPDATE, returns the number of repaired tags
+    """
+    tags = Tags.objects.all()
+    if user_ids is not None:
+        tags = tags.filter(tag_user_id__in=user_ids)
+
+    expected = count_subquery(
+        ActivitiesTags.objects.filter(tags_id=OuterRef("pk")), "tags_id"
+    )
+    return tags.filter(~Q(usage_count=expected)).update(usage_count=expected)
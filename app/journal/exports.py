@@ -0,0 +1,165 @@
+"""
+Streaming exports for a Journal
+"""
+import csv
+from django.db.models import Prefetch
+from rest_framework.utils.encoders import JSONEncoder
+from core.models import JournalTables, Activities, Tags
+from journal.config import SUBMODELS_LIST, EXPORT_CHUNK_SIZE
+
+
+EXPORT_CSV_HEADER = [
+    "record_type",
+    "id",
+    "parent_id",
+    "name",
+    "value",
+    "checked",
+    "ordering",
+    "created",
+    "tags",
+]
+
+
+class Echo:
+    """
+    Pseudo buffer that returns the written value instead of storing it
+    """
+
+    def write(self, value):
+        return value
+
+
+def get_submodel_value_field(submodel_type):
+    if submodel_type == "grateful_for":
+        return submodel_type
+    return submodel_type[:-1]
+
+
+def get_export_tags(journal):
+    return Tags.objects.filter(tag_user=journal.user_id).order_by("id")
+
+
+def get_export_tables(journal):
+    return JournalTables.objects.filter(journal=journal).order_by("id")
+
+
+def get_export_activities(journal):
+    """
+    Return the activities of a journal with every relation the export needs
+    prefetched so iterating in chunks does not trigger per row queries
+    """
+    return (
+        Activities.objects.filter(journal_table__journal=journal)
+        .order_by("journal_table_id", "ordering", "id")
+        .prefetch_related(
+            Prefetch("tags", queryset=Tags.objects.only("id")),
+            *SUBMODELS_LIST,
+        )
+    )
+
+
+def serialize_activity(activity):
+    record = {
+        "type": "activity",
+        "id": activity.id,
+        "journal_table": activity.journal_table_id,
+        "name": activity.name,
+        "ordering": activity.ordering,
+        "created": activity.created,
+        "tags": [tag.id for tag in activity.tags.all()],
+    }
+    for submodel_type in SUBMODELS_LIST:
+        value_field = get_submodel_value_field(submodel_type)
+        submodels = []
+        for submodel in getattr(activity, submodel_type).all():
+            submodel_record = {
+                "id": submodel.id,
+                value_field: getattr(submodel, value_field),
+                "ordering": submodel.ordering,
+            }
+            if submodel_type == "action_items":
+                submodel_record["checked"] = submodel.checked
+            submodels.append(submodel_record)
+        record[submodel_type] = submodels
+    return record
+
+
+def iter_journal_records(journal, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield every record of a journal as a dict, tags and tables first
+    """
+    for tag in get_export_tags(journal).iterator(chunk_size=chunk_size):
+        yield {
+            "type": "tag",
+            "id": tag.id,
+            "tag_name": tag.tag_name,
+            "tag_color": tag.tag_color,
+            "tag_class": tag.tag_class,
+        }
+
+    for table in get_export_tables(journal).iterator(chunk_size=chunk_size):
+        yield {"type": "table", "id": table.id, "table_name": table.table_name}
+
+    activities = get_export_activities(journal)
+    for activity in activities.iterator(chunk_size=chunk_size):
+        yield serialize_activity(activity)
+
+
+def stream_ndjson(journal, chunk_size=EXPORT_CHUNK_SIZE):
+    encoder = JSONEncoder(ensure_ascii=False)
+    for record in iter_journal_records(journal, chunk_size):
+        yield encoder.encode(record) + "\n"
+
+
+def get_csv_rows(record):
+    record_type = record["type"]
+
+    if record_type == "tag":
+        return [["tag", record["id"], "", record["tag_name"], record["tag_color"]]]
+
+    if record_type == "table":
+        return [["table", record["id"], "", record["table_name"]]]
+
+    rows = [
+        [
+            "activity",
+            record["id"],
+            record["journal_table"],
+            record["name"],
+            "",
+            "",
+            record["ordering"],
+            record["created"].isoformat(),
+            ";".join(str(tag_id) for tag_id in record["tags"]),
+        ]
+    ]
+    for submodel_type in SUBMODELS_LIST:
+        value_field = get_submodel_value_field(submodel_type)
+        for submodel in record[submodel_type]:
+            rows.append(
+                [
+                    value_field,
+                    submodel["id"],
+                    record["id"],
+                    "",
+                    submodel[value_field],
+                    submodel.get("checked", ""),
+                    submodel["ordering"],
+                ]
+            )
+    return rows
+
+
+def stream_csv(journal, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_CSV_HEADER)
+    for record in iter_journal_records(journal, chunk_size):
+        for row in get_csv_rows(record):
+            yield writer.writerow(row)
+
+
+EXPORT_FORMATS = {
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+    "csv": (stream_csv, "text/csv"),
+}
@@ -0,0 +1,195 @@
+"""
+Filters for the Journal APIs
+"""
+from datetime import datetime, time
+from django.db.models import Exists, OuterRef, Q
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from core.models import Activities, ActionItems
+from journal.counters import OPEN_ACTION_ITEMS
+
+
+ActivitiesTags = Activities.tags.through
+
+TAGS_MATCHES = ["any", "all", "none"]
+
+TRUE_VALUES = ["1", "true", "True"]
+FALSE_VALUES = ["0", "false", "False"]
+
+
+def parse_id_list(value, param):
+    try:
+        return [int(i) for i in value.split(",") if i.strip()]
+    except ValueError:
+        raise ValidationError(f"`{param}` should be a comma separated list of ids")
+
+
+def parse_boolean(value, param):
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError(f"`{param}` should be true or false")
+
+
+def parse_created(value, param, end_of_day=False):
+    """
+    Parse a datetime or a date, dates cover the whole day
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValidationError(f"`{param}` should be an ISO 8601 date or datetime")
+        parsed = datetime.combine(date, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def get_tags_filters(tag_ids, match="any"):
+    """
+    Return the filter expressions keeping activities tagged with any, all or
+    none of `tag_ids`
+    """
+    if match == "all":
+        return [
+            Exists(
+                ActivitiesTags.objects.filter(
+                    activities_id=OuterRef("pk"), tags_id=tag_id
+                )
+            )
+            for tag_id in tag_ids
+        ]
+
+    tagged = Exists(
+        ActivitiesTags.objects.filter(activities_id=OuterRef("pk"), tags_id__in=tag_ids)
+    )
+    return [~tagged] if match == "none" else [tagged]
+
+
+def get_checked_filter(checked):
+    """
+    Return the filter expression keeping activities having at least one
+    action item in the checked state, the empty action item every activity
+    is created with is not counted as unchecked
+    """
+    action_items = ActionItems.objects.filter(activity=OuterRef("pk"))
+    if checked:
+        action_items = action_items.filter(~Q(action_item=""), checked=True)
+    else:
+        action_items = action_items.filter(OPEN_ACTION_ITEMS)
+    return Exists(action_items)
+
+
+def filter_activities(queryset, params):
+    """
+    Apply the activity filters supplied in `params` to `queryset`
+    """
+    journal_table = params.get("journal_table")
+    if journal_table:
+        queryset = queryset.filter(
+            journal_table_id__in=parse_id_list(journal_table, "journal_table")
+        )
+
+    created_after = params.get("created_after")
+    if created_after:
+        queryset = queryset.filter(
+            created__gte=parse_created(created_after, "created_after")
+        )
+
+    created_before = params.get("created_before")
+    if created_before:
+        queryset = queryset.filter(
+            created__lte=parse_created(created_before, "created_before", True)
+        )
+
+    tags = params.get("tags")
+    if tags:
+        tags_match = params.get("tags_match", "any")
+        if tags_match not in TAGS_MATCHES:
+            raise ValidationError("`tags_match` should be any, all or none")
+        queryset = queryset.filter(
+            *get_tags_filters(parse_id_list(tags, "tags"), tags_match)
+        )
+
+    checked = params.get("checked")
+    if checked:
+        queryset = queryset.filter(
+            get_checked_filter(parse_boolean(checked, "checked"))
+        )
+
+    return queryset
+
+
+class ActivitiesFilterBackend(BaseFilterBackend):
+    """
+    Filter backend for listing activities by tags, created date range,
+    journal table and action items checked state
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if view.action != "list":
+            return queryset
+        return filter_activities(queryset, request.query_params)
+
+    def get_schema_operation_parameters(self, view):
+        def parameter(name, description, schema_type="string"):
+            return {
+                "name": name,
+                "required": False,
+                "in": "query",
+                "description": description,
+                "schema": {"type": schema_type},
+            }
+
+        return [
+            parameter("journal_table", "Comma separated journal table ids"),
+            parameter("tags", "Comma separated tag ids"),
+            parameter(
+                "tags_match",
+                "Whether activities match `any`, `all` or `none` of the tags",
+            ),
+            parameter("created_after", "ISO 8601 date or datetime, inclusive"),
+            parameter("created_before", "ISO 8601 date or datetime, inclusive"),
+            parameter(
+                "checked",
+                "Only activities with a checked (true) or unchecked (false) action item",
+                "boolean",
+            ),
+        ]
+
+
+TAGS_ORDERINGS = {
+    "usage": ["usage_count", "id"],
+    "-usage": ["-usage_count", "id"],
+}
+
+
+class TagsOrderingFilterBackend(BaseFilterBackend):
+    """
+    Filter backend for ordering the listed tags by their usage count
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = request.query_params.get("ordering")
+        if view.action != "list" or ordering is None:
+            return queryset
+        if ordering not in TAGS_ORDERINGS:
+            raise ValidationError(
+                f"`ordering` should be one of {', '.join(TAGS_ORDERINGS)}"
+            )
+        return queryset.order_by(*TAGS_ORDERINGS[ordering])
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": "ordering",
+                "required": False,
+                "in": "query",
+                "description": "`-usage` lists the most used tags first",
+                "schema": {"type": "string", "enum": list(TAGS_ORDERINGS)},
+            }
+        ]
@@ -3,7 +3,9 @@ from rest_framework.response import Response
 from rest_framework import exceptions
 from rest_framework.exceptions import ValidationError
 from rest_framework import status
+from core.metrics import registry
 from core.models import Intentions, GratefulFor, Happenings, ActionItems
+from journal.bulk import delete_in_bulk
 
 
 class BatchSerializerMixin:
@@ -119,6 +121,9 @@ class BatchRouteMixin:
             context[self.action] = True
         return context
 
+    def record_batch_size(self, size):
+        registry.observe("journal_batch_size", size, action=self.action)
+
     def validate_ids(self, data, field="id", unique=True):
         if isinstance(data, list):
             id_list = [int(i) for i in data]
@@ -325,6 +330,7 @@ class BatchTagRouteMixin:
                     True if request_method != "DELETE" else False,
                 )
 
+            self.record_batch_size(len(request.data["tags_list"]))
             if request_method == "POST":
                 queryset = self.get_object()
 
@@ -380,6 +386,7 @@ class BatchSubmodelRouteMixin:
                     True if request_method != "DELETE" else False,
                 )
 
+            self.record_batch_size(len(request.data["tags_list"]))
             if request_method == "POST":
                 queryset = self.get_object()
 
@@ -388,7 +395,7 @@ class BatchSubmodelRouteMixin:
 
             # delete the queryset if DEL req
             if request_method == "DELETE":
-                queryset.delete()
+                delete_in_bulk(queryset)
                 return Response(
                     self.serializer_class(queryset, many=True).data,
                     status=status.HTTP_204_NO_CONTENT,
@@ -422,6 +429,7 @@ class BatchUpdateActivitiesRouteMixin:
     def batch_update_activities(self, request, *args, **kwargs):
         try:
             ids = self.validate_ids(request.data["activities_list"][0]["ids"])
+            self.record_batch_size(len(ids))
             val_tags = self.validate_tag_ids(request.data["activities_list"][0]["tags"])
 
             queryset = self.filter_queryset(self.get_queryset(ids=ids))
@@ -451,9 +459,10 @@ class BatchDeleteActivitiesRouteMixin:
     def batch_delete_activities(self, request, *args, **kwargs):
         try:
             ids = self.validate_ids(request.data["delete_list"])
+            self.record_batch_size(len(ids))
 
             queryset = self.filter_queryset(self.get_queryset(ids=ids))
-            queryset.delete()
+            delete_in_bulk(queryset)
             return Response(
                 self.serializer_class(queryset, many=True).data,
                 status=status.HTTP_204_NO_CONTENT,
@@ -472,6 +481,7 @@ class BatchDuplicateActivitiesRouteMixin:
     def batch_duplicate_activities(self, request, *args, **kwargs):
         try:
             ids = self.validate_ids(request.data["duplicate_list"][0]["ids"])
+            self.record_batch_size(len(ids))
             queryset = self.get_object()
 
             serializer = self.get_serializer(
@@ -488,61 +498,3 @@ class BatchDuplicateActivitiesRouteMixin:
 
         except Exception as e:
             raise ValidationError(e)
-
-
-class CloneModelMixin:
-    def duplicate_model(self, instance, callback=None, create_instance=None):
-        related_objects_to_copy = []
-        relations_to_set = {}
-
-        for field in instance._meta.get_fields():
-            if field.name == "id" or field.name == "ordering":
-                continue
-
-            elif (
-                field.name == "ordering" and instance.__class__.__name__ == "Activities"
-            ):
-                continue
-
-            elif field.one_to_many:
-                related_object_manager = getattr(instance, field.get_accessor_name())
-                related_objects = list(related_object_manager.all())
-
-                if related_objects:
-                    related_objects_to_copy += related_objects
-
-            elif field.many_to_many and hasattr(field, "field"):
-                related_object_manager = getattr(instance, field.name)
-
-                relations = list(related_object_manager.all())
-                if relations:
-                    relations_to_set[field.name] = relations
-            else:
-                pass
-        instance.pk = None
-
-        if callback and callable(callback):
-            instance = callback(instance)
-
-        if instance.__class__.__name__ == "Activities":
-            instance.ordering = None
-        instance.save()
-
-        for related_object in related_objects_to_copy:
-            for related_object_field in related_object._meta.fields:
-                if related_object_field.related_model == instance.__class__:
-                    setattr(related_object, related_object_field.name, instance)
-                    new_related_object = self.duplicate_model(
-                        related_object, None, True
-                    )
-
-                    new_related_object.ordering = None
-                    new_related_object.save()
-
-        for field_name, relations in relations_to_set.items():
-            field = getattr(instance, field_name)
-            field.set(relations)
-            text_relations = []
-            for relation in relations:
-                text_relations.append(str(relation))
-        return instance
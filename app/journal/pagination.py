@@ -0,0 +1,39 @@
+"""
+Pagination for the Journal APIs
+"""
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from journal.config import SEARCH_PAGE_SIZE, TABLE_PAGE_SIZE
+
+
+class SearchResultsPagination(PageNumberPagination):
+    page_size = SEARCH_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class TableActivitiesPagination(PageNumberPagination):
+    """
+    Paginates the activities of a journal table, keeping the table fields
+    at the top level of the response
+    """
+
+    page_size = TABLE_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def is_requested(self, request):
+        return (
+            self.page_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def get_paginated_table_response(self, table_data):
+        return Response(
+            {
+                "count": self.page.paginator.count,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                **table_data,
+            }
+        )
@@ -0,0 +1,126 @@
+"""
+Maintains the per day rollups of a journal's activities and action items
+
+Like the table counters, the rollups leave out the empty action item every
+activity is created with.
+"""
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from core.models import Activities, ActionItems, JournalDailyRollups
+
+COUNTED_ACTION_ITEMS = ~Q(action_item="")
+
+
+def get_rollup_day(created):
+    return timezone.localdate(created)
+
+
+def count_action_item(checked, action_item):
+    """
+    Return what an action item adds to the action items and checked action
+    items counts of its rollup
+    """
+    counted = action_item != ""
+    return int(counted), int(counted and checked)
+
+
+def get_activity_bucket(activity_id):
+    """
+    Return the journal id and rollup day of an activity, None when the activity
+    is not in a table
+    """
+    bucket = (
+        Activities.objects.filter(id=activity_id, journal_table__isnull=False)
+        .values_list("journal_table__journal_id", "created")
+        .first()
+    )
+    if bucket is None:
+        return None
+    journal_id, created = bucket
+    return journal_id, get_rollup_day(created)
+
+
+def apply_rollup_delta(
+    journal_id, day, activities=0, action_items=0, action_items_checked=0
+):
+    """
+    Add the deltas to the rollup of `day`, creating it when missing
+    """
+    if not (activities or action_items or action_items_checked):
+        return
+
+    rollup = JournalDailyRollups.objects.filter(journal_id=journal_id, day=day)
+    deltas = {
+        "activities_count": F("activities_count") + activities,
+        "action_items_count": F("action_items_count") + action_items,
+        "action_items_checked_count": F("action_items_checked_count")
+        + action_items_checked,
+    }
+    if rollup.update(**deltas):
+        return
+
+    try:
+        with transaction.atomic():
+            JournalDailyRollups.objects.create(
+                journal_id=journal_id,
+                day=day,
+                activities_count=activities,
+                action_items_count=action_items,
+                action_items_checked_count=action_items_checked,
+            )
+    except IntegrityError:
+        # created by a concurrent write since the update
+        rollup.update(**deltas)
+
+
+def rebuild_daily_rollups(journal_ids):
+    """
+    Recompute the rollups of `journal_ids` from their activities and action
+    items, used for backfills and after deleting whole tables
+    """
+    tzinfo = timezone.get_current_timezone()
+    counts = defaultdict(lambda: [0, 0, 0])
+
+    activities = (
+        Activities.objects.filter(journal_table__journal_id__in=journal_ids)
+        .annotate(day=TruncDate("created", tzinfo=tzinfo))
+        .values("journal_table__journal_id", "day")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    for row in activities:
+        counts[(row["journal_table__journal_id"], row["day"])][0] = row["total"]
+
+    action_items = (
+        ActionItems.objects.filter(
+            COUNTED_ACTION_ITEMS, activity__journal_table__journal_id__in=journal_ids
+        )
+        .annotate(day=TruncDate("activity__created", tzinfo=tzinfo))
+        .values("activity__journal_table__journal_id", "day")
+        .annotate(total=Count("id"), checked=Count("id", filter=Q(checked=True)))
+        .order_by()
+    )
+    for row in action_items:
+        bucket = counts[(row["activity__journal_table__journal_id"], row["day"])]
+        bucket[1] = row["total"]
+        bucket[2] = row["checked"]
+
+    with transaction.atomic():
+        JournalDailyRollups.objects.filter(journal_id__in=journal_ids).delete()
+        JournalDailyRollups.objects.bulk_create(
+            JournalDailyRollups(
+                journal_id=journal_id,
+                day=day,
+                activities_count=activities_count,
+                action_items_count=action_items_count,
+                action_items_checked_count=action_items_checked_count,
+            )
+            for (journal_id, day), (
+                activities_count,
+                action_items_count,
+                action_items_checked_count,
+            ) in counts.items()
+        )
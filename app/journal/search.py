@@ -0,0 +1,105 @@
+"""
+Full text search over a journal's activities and their submodels
+"""
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce, Concat
+from core.models import Activities, Intentions, Happenings, GratefulFor, ActionItems
+from journal.config import SEARCH_CONFIG
+
+
+SEARCH_SUBMODELS = [
+    (Intentions, "intention"),
+    (Happenings, "happening"),
+    (GratefulFor, "grateful_for"),
+    (ActionItems, "action_item"),
+]
+
+
+def is_postgres():
+    return connection.vendor == "postgresql"
+
+
+def get_search_document_parts():
+    """
+    Return the expressions making up an activity's search document, one for
+    the activity name and one aggregated text per submodel
+    """
+    parts = [Coalesce(F("name"), Value(""), output_field=TextField())]
+    for model, field in SEARCH_SUBMODELS:
+        submodel_text = (
+            model.objects.filter(activity=OuterRef("pk"))
+            .order_by()
+            .values("activity")
+            .annotate(text=StringAgg(field, " "))
+            .values("text")
+        )
+        parts.append(
+            Coalesce(Subquery(submodel_text), Value(""), output_field=TextField())
+        )
+    return parts
+
+
+def build_search_documents(activities):
+    """
+    Return the search document of each of `activities` by id, with one query
+    per submodel for all of them
+    """
+    texts = {activity.id: [activity.name or ""] for activity in activities}
+    for model, field in SEARCH_SUBMODELS:
+        submodel_texts = model.objects.filter(activity_id__in=texts).values_list(
+            "activity_id", field
+        )
+        for activity_id, text in submodel_texts:
+            texts[activity_id].append(text)
+    return {
+        activity_id: " ".join(text for text in activity_texts if text)
+        for activity_id, activity_texts in texts.items()
+    }
+
+
+def refresh_search_documents(activity_ids):
+    """
+    Rebuild the search document, and on PostgreSQL the tsvector, of the
+    given activities
+    """
+    activities = Activities.objects.filter(id__in=activity_ids)
+
+    if is_postgres():
+        parts = get_search_document_parts()
+        separated_parts = []
+        for part in parts:
+            separated_parts.extend([part, Value(" ")])
+        activities.update(
+            search_document=Concat(*separated_parts[:-1], output_field=TextField()),
+            search_vector=SearchVector(*parts, config=SEARCH_CONFIG),
+        )
+        return
+
+    activities = list(activities.only("id", "name"))
+    documents = build_search_documents(activities)
+    for activity in activities:
+        activity.search_document = documents[activity.id].lower()
+    Activities.objects.bulk_update(activities, ["search_document"])
+
+
+def search_activities(queryset, search_text):
+    """
+    Filter and rank `queryset` against `search_text`. The tsvector column is
+    used on PostgreSQL, other backends match every term against the
+    search document and leave the results unranked, every result gets the
+    same rank and they are ordered by creation
+    """
+    if is_postgres():
+        query = SearchQuery(search_text, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-created", "id")
+        )
+
+    for term in search_text.lower().split():
+        queryset = queryset.filter(search_document__contains=term)
+    return queryset.annotate(rank=Value(1.0)).order_by("-created", "id")
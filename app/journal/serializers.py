@@ -11,28 +11,46 @@ from core.models import (
     Happenings,
     Intentions,
     GratefulFor,
+    JournalDailyRollups,
 )
+from core.timing import TimedRepresentationMixin
 from journal.mixins import (
     BatchUpdateActivitiesSerializerMixin,
     BatchDuplicateActivitiesSerializerMixin,
     BatchTagSerializerMixin,
     BatchSubmodelSerializerMixin,
-    CloneModelMixin,
     TagsValidatorMixin,
     SubmodelMixin,
 )
 
 
 from django.db.models import Q
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.http import QueryDict
 import copy
 from journal.config import get_table_defaults, SUBMODELS_LIST
+from journal.counters import apply_tags_usage_delta
+from journal.table_views import compile_view_spec
+from journal.bulk import duplicate_activities
 import copy
 from collections import OrderedDict
 import time
 
 
+def get_stored_table(journal_table):
+    """
+    Return the table, or table id, activities are stored in, virtual tables
+    only show the activities of the other tables
+    """
+    if isinstance(journal_table, int):
+        journal_table = JournalTables.objects.get(id=journal_table)
+    if journal_table is not None and journal_table.is_virtual:
+        raise serializers.ValidationError(
+            "Activities cannot be stored in a virtual table"
+        )
+    return journal_table
+
+
 class BatchUpdateActivitiesSerializer(
     serializers.ListSerializer, BatchUpdateActivitiesSerializerMixin
 ):
@@ -44,14 +62,29 @@ class BatchUpdateActivitiesSerializer(
         """
         Update Activities Items
         """
+        if "journal_table" in validated_data[0]:
+            get_stored_table(validated_data[0]["journal_table"])
         tag_list = validated_data[0].pop("tags", None)
-        tags_instance = Tags.objects.filter(id__in=tag_list)
-        obj_result = []
-        for i, instance_obj in enumerate(instance):
-            instance_obj.tags.clear()
-            instance_obj.tags.add(*tags_instance)
+        tag_ids = list(Tags.objects.filter(id__in=tag_list).values_list("id", flat=True))
+        activity_ids = [instance_obj.id for instance_obj in instance]
+
+        # replaced in bulk, the m2m signals would run per activity so the usage
+        # counts are applied here
+        ActivitiesTags = Activities.tags.through
+        assignments = ActivitiesTags.objects.filter(activities_id__in=activity_ids)
+        with transaction.atomic():
+            apply_tags_usage_delta(assignments, -1)
+            assignments.delete()
+            ActivitiesTags.objects.bulk_create(
+                ActivitiesTags(activities_id=activity_id, tags_id=tag_id)
+                for activity_id in activity_ids
+                for tag_id in tag_ids
+            )
+            apply_tags_usage_delta(assignments, 1)
 
-        return instance
+        return Activities.objects.filter(id__in=activity_ids).prefetch_related(
+            "tags", *SUBMODELS_LIST
+        )
 
     class Meta:
         fields = [
@@ -133,7 +166,6 @@ class BatchSubmodelSerializer(
 
 
 class BatchDuplicateActivitiesSerializer(
-    CloneModelMixin,
     BatchDuplicateActivitiesSerializerMixin,
     serializers.ListSerializer,
 ):
@@ -145,17 +177,15 @@ class BatchDuplicateActivitiesSerializer(
         """
         Create Duplicated Activities Items
         """
+        # the duplicates are stored in the tables of their activities, which
+        # cannot be virtual ones
         activities_to_duplicate = Activities.objects.filter(
-            id__in=validated_data[0]["ids"]
+            id__in=validated_data[0]["ids"], journal_table__is_virtual=False
         )
-        start_time = time.time()
-        duplicates_to_create = [
-            self.duplicate_model(activity) for activity in activities_to_duplicate
-        ]
-
-        end_time = time.time()
-        total = end_time - start_time
-        return duplicates_to_create
+        duplicates = duplicate_activities(activities_to_duplicate)
+        return Activities.objects.filter(
+            id__in=[duplicate.id for duplicate in duplicates]
+        ).prefetch_related("tags", *SUBMODELS_LIST)
 
     class Meta:
         fields = [
@@ -188,7 +218,9 @@ class ListSerializerClassInitMixin:
             ]
 
 
-class TagsSerializer(TagsValidatorMixin, serializers.ModelSerializer):
+class TagsSerializer(
+    TimedRepresentationMixin, TagsValidatorMixin, serializers.ModelSerializer
+):
     """
     Serializer for serializing the Tags
     """
@@ -213,8 +245,8 @@ class TagsSerializer(TagsValidatorMixin, serializers.ModelSerializer):
     class Meta:
         list_serializer_class = BatchTagSerializer
         model = Tags
-        fields = ["id", "tag_user", "tag_name", "tag_color", "tag_class"]
-        read_only_fields = ["id"]
+        fields = ["id", "tag_user", "tag_name", "tag_color", "tag_class", "usage_count"]
+        read_only_fields = ["id", "usage_count"]
         validators = []
 
 
@@ -237,11 +269,22 @@ class JournalJournalTableSerializer(serializers.ModelSerializer):
     class Meta:
         model = JournalTables
         #  "journal",
-        fields = ["id", "table_name"]
-        read_only_fields = ["id"]
+        fields = [
+            "id",
+            "table_name",
+            "is_virtual",
+            "activities_count",
+            "open_action_items_count",
+        ]
+        read_only_fields = [
+            "id",
+            "is_virtual",
+            "activities_count",
+            "open_action_items_count",
+        ]
 
 
-class JournalSerializer(serializers.ModelSerializer):
+class JournalSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for Journal
     """
@@ -355,7 +398,9 @@ class JournalSerializer(serializers.ModelSerializer):
             raise exceptions.ValidationError(detail=e)
 
 
-class BaseSubModelsSerializer(serializers.ModelSerializer):
+class BaseSubModelsSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
     """
     Base submodel serializer for other submodel serializers to inherit
     """
@@ -418,7 +463,10 @@ class ActivitiesTagsSerializer(serializers.ModelSerializer):
 
 
 class ActivitiesSerializer(
-    ListSerializerClassInitMixin, SubmodelMixin, serializers.ModelSerializer
+    TimedRepresentationMixin,
+    ListSerializerClassInitMixin,
+    SubmodelMixin,
+    serializers.ModelSerializer,
 ):
     """
     Serializer for serializing the Activities
@@ -503,12 +551,7 @@ class ActivitiesSerializer(
         try:
             tags = validated_data.pop("tags", [])
             activities_ordering_list = validated_data.pop("ordering_list", None)
-            journal_table_data = validated_data.pop("journal_table", None)
-            journal_table = (
-                JournalTables.objects.get(id=journal_table_data)
-                if isinstance(journal_table_data, int)
-                else journal_table_data
-            )
+            journal_table = get_stored_table(validated_data.pop("journal_table", None))
 
             create_payload = {
                 "name": validated_data["name"],
@@ -551,6 +594,11 @@ class ActivitiesSerializer(
                     submodels_data, None
                 )
 
+            if "journal_table" in validated_data:
+                validated_data["journal_table"] = get_stored_table(
+                    validated_data["journal_table"]
+                )
+
             for attr, value in validated_data.items():
                 setattr(instance, attr, value)
 
@@ -633,7 +681,42 @@ class ActivitiesSerializer(
         read_only_fields = ["id"]
 
 
-class JournalTableActivitiesSerializer(serializers.ModelSerializer):
+class ActivitiesSearchSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
+    """
+    Serializer for returning the ranked activities matching a search
+    """
+
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Activities
+        fields = ["id", "name", "journal_table", "created", "rank"]
+        read_only_fields = fields
+
+
+class JournalDailyRollupsSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
+    """
+    Serializer for the daily counts of a journal's calendar
+    """
+
+    class Meta:
+        model = JournalDailyRollups
+        fields = [
+            "day",
+            "activities_count",
+            "action_items_count",
+            "action_items_checked_count",
+        ]
+        read_only_fields = fields
+
+
+class JournalTableActivitiesSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
     """
     Serializer for serializing the Activities
     """
@@ -660,7 +743,7 @@ class JournalTableActivitiesSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
-class JournalTableSerializer(CloneModelMixin, serializers.ModelSerializer):
+class JournalTableSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for Journal Table
     """
@@ -680,17 +763,24 @@ class JournalTableSerializer(CloneModelMixin, serializers.ModelSerializer):
             ret["duplicate"] = duplicate
             ret["journal_table"] = journal_table
             return ret
+        except serializers.ValidationError:
+            raise
         except Exception as e:
             raise serializers.ValidationError(detail=e)
 
+    def validate_table_view(self, value):
+        compile_view_spec(value)
+        return value
+
     class Meta:
         model = JournalTables
         #  "journal",
-        fields = ["id", "table_name", "activities"]
+        fields = ["id", "table_name", "table_view", "is_virtual", "activities"]
         optional_fields = [
             "table_name",
+            "table_view",
         ]
-        read_only_fields = ["id", "activities"]
+        read_only_fields = ["id", "is_virtual", "activities"]
 
     def create_clone_table_name(self, table_name, name_count):
         return f"{table_name} ({name_count})"
@@ -729,9 +819,15 @@ class JournalTableSerializer(CloneModelMixin, serializers.ModelSerializer):
                     journal_table_with_similar_name_count,
                 )
 
-                clone_table = self.duplicate_model(journal_table_to_duplicate)
-                clone_table.table_name = clone_table_name
-                clone_table.save()
+                clone_table = JournalTables.objects.create(
+                    journal=journal_table_to_duplicate.journal,
+                    table_name=clone_table_name,
+                    table_view=journal_table_to_duplicate.table_view,
+                    is_virtual=journal_table_to_duplicate.is_virtual,
+                )
+                duplicate_activities(
+                    journal_table_to_duplicate.activities.all(), clone_table
+                )
 
                 return clone_table
 
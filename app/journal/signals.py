@@ -0,0 +1,304 @@
+"""
+Signal receivers keeping the denormalized journal data in sync
+"""
+from django.db.models import Count, Q, QuerySet
+from django.db.models.signals import (
+    m2m_changed,
+    post_save,
+    post_delete,
+    pre_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from core.models import Activities, ActionItems, Journal, JournalTables, Tags
+from journal.search import SEARCH_SUBMODELS, refresh_search_documents
+from journal.bulk import is_bulk_write, reconcile_journals
+from journal.autocomplete import has_cached_tries, invalidate_trie
+from journal.counters import (
+    ActivitiesTags,
+    apply_table_delta,
+    apply_tags_usage_delta,
+    count_open_action_items,
+    get_activity_table,
+    is_open_action_item,
+    reconcile_tags_usage,
+)
+from journal.rollups import (
+    COUNTED_ACTION_ITEMS,
+    apply_rollup_delta,
+    count_action_item,
+    get_activity_bucket,
+    get_rollup_day,
+)
+
+
+SEARCH_SUBMODEL_FIELDS = dict(SEARCH_SUBMODELS)
+
+
+def get_delete_origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else origin.__class__
+
+
+def is_reconciled_delete(sender, origin):
+    """
+    Return whether a deleted row is accounted for by reconciling its journal,
+    when the delete cascades from above the sender or is a bulk write
+    """
+    return is_bulk_write() or get_delete_origin_model(origin) is not sender
+
+
+@receiver(post_save, sender=Activities)
+def refresh_activity_search_document(sender, instance, raw=False, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if raw or (update_fields is not None and "name" not in update_fields):
+        return
+    refresh_search_documents([instance.id])
+
+
+def refresh_submodel_search_document(sender, instance, created=False, **kwargs):
+    if kwargs.get("raw") or instance.activity_id is None:
+        return
+    # default submodels are created empty and add nothing to the document
+    if created and not getattr(instance, SEARCH_SUBMODEL_FIELDS[sender]):
+        return
+    refresh_search_documents([instance.activity_id])
+
+
+def refresh_deleted_submodel_search_document(sender, instance, origin=None, **kwargs):
+    # skip cascades from deleting the activity or anything above it
+    if instance.activity_id is None or is_reconciled_delete(sender, origin):
+        return
+    refresh_search_documents([instance.activity_id])
+
+
+for submodel in SEARCH_SUBMODEL_FIELDS:
+    post_save.connect(refresh_submodel_search_document, sender=submodel)
+    post_delete.connect(refresh_deleted_submodel_search_document, sender=submodel)
+
+
+@receiver(post_save, sender=Tags)
+@receiver(post_delete, sender=Tags)
+def invalidate_tags_autocomplete(sender, instance, **kwargs):
+    if has_cached_tries():
+        invalidate_trie("tags", instance.tag_user_id)
+
+
+@receiver(post_save, sender=Activities)
+@receiver(post_delete, sender=Activities)
+def invalidate_activities_autocomplete(sender, instance, **kwargs):
+    if has_cached_tries() and instance.owner_id is not None:
+        invalidate_trie("activities", instance.owner_id)
+
+
+@receiver(post_save, sender=Activities)
+def count_created_activity(sender, instance, created=False, raw=False, **kwargs):
+    if raw or not created or instance.journal_table_id is None:
+        return
+    apply_rollup_delta(
+        instance.journal_table.journal_id,
+        get_rollup_day(instance.created),
+        activities=1,
+    )
+
+
+@receiver(pre_delete, sender=Activities)
+def uncount_deleted_activity(sender, instance, origin=None, **kwargs):
+    # deleting a table rebuilds the rollups of its journal instead
+    if is_reconciled_delete(sender, origin):
+        return
+    bucket = get_activity_bucket(instance.id)
+    if bucket is None:
+        return
+    action_items = ActionItems.objects.filter(
+        COUNTED_ACTION_ITEMS, activity=instance
+    ).aggregate(total=Count("id"), checked=Count("id", filter=Q(checked=True)))
+    apply_rollup_delta(
+        *bucket,
+        activities=-1,
+        action_items=-action_items["total"],
+        action_items_checked=-action_items["checked"],
+    )
+
+
+@receiver(pre_save, sender=ActionItems)
+def remember_action_item_state(sender, instance, raw=False, **kwargs):
+    instance._previous_state = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_state = (
+        ActionItems.objects.filter(pk=instance.pk)
+        .values_list("activity_id", "checked", "action_item")
+        .first()
+    )
+
+
+@receiver(post_save, sender=ActionItems)
+def count_saved_action_item(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_state", None)
+    previous_activity_id = previous[0] if previous is not None else None
+    was_counted = count_action_item(*previous[1:]) if previous else (0, 0)
+    is_counted = count_action_item(instance.checked, instance.action_item)
+
+    if previous_activity_id == instance.activity_id:
+        if was_counted == is_counted or instance.activity_id is None:
+            return
+        bucket = get_activity_bucket(instance.activity_id)
+        if bucket is not None:
+            apply_rollup_delta(
+                *bucket,
+                action_items=is_counted[0] - was_counted[0],
+                action_items_checked=is_counted[1] - was_counted[1],
+            )
+        return
+
+    if previous_activity_id is not None and any(was_counted):
+        bucket = get_activity_bucket(previous_activity_id)
+        if bucket is not None:
+            apply_rollup_delta(
+                *bucket,
+                action_items=-was_counted[0],
+                action_items_checked=-was_counted[1],
+            )
+    if instance.activity_id is not None and any(is_counted):
+        bucket = get_activity_bucket(instance.activity_id)
+        if bucket is not None:
+            apply_rollup_delta(
+                *bucket, action_items=is_counted[0], action_items_checked=is_counted[1]
+            )
+
+
+@receiver(post_delete, sender=ActionItems)
+def uncount_deleted_action_item(sender, instance, origin=None, **kwargs):
+    if instance.activity_id is None or is_reconciled_delete(sender, origin):
+        return
+    action_items, action_items_checked = count_action_item(
+        instance.checked, instance.action_item
+    )
+    if not action_items:
+        return
+    bucket = get_activity_bucket(instance.activity_id)
+    if bucket is not None:
+        apply_rollup_delta(
+            *bucket,
+            action_items=-action_items,
+            action_items_checked=-action_items_checked,
+        )
+
+
+@receiver(post_delete, sender=JournalTables)
+def rebuild_deleted_table_rollups(sender, instance, origin=None, **kwargs):
+    if get_delete_origin_model(origin) is sender:
+        reconcile_journals([instance.journal_id])
+
+
+@receiver(pre_save, sender=Activities)
+def remember_activity_table(sender, instance, raw=False, **kwargs):
+    instance._previous_table_id = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_table_id = (
+        Activities.objects.filter(pk=instance.pk)
+        .values_list("journal_table_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Activities)
+def count_saved_activity_in_table(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        apply_table_delta(instance.journal_table_id, activities=1)
+        return
+
+    previous_table_id = getattr(instance, "_previous_table_id", None)
+    if previous_table_id != instance.journal_table_id:
+        open_action_items = count_open_action_items(instance.id)
+        apply_table_delta(previous_table_id, -1, -open_action_items)
+        apply_table_delta(instance.journal_table_id, 1, open_action_items)
+
+
+@receiver(pre_delete, sender=Activities)
+def uncount_deleted_activity_in_table(sender, instance, origin=None, **kwargs):
+    # deleting a table reconciles the counters of its journal instead
+    if is_reconciled_delete(sender, origin):
+        return
+    apply_table_delta(
+        instance.journal_table_id, -1, -count_open_action_items(instance.id)
+    )
+
+
+@receiver(post_save, sender=ActionItems)
+def count_saved_action_item_in_table(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_state", None)
+    was_open = previous is not None and is_open_action_item(*previous[1:])
+    is_open = is_open_action_item(instance.checked, instance.action_item)
+
+    if previous is not None and previous[0] == instance.activity_id:
+        if was_open != is_open:
+            apply_table_delta(
+                get_activity_table(instance.activity_id),
+                open_action_items=1 if is_open else -1,
+            )
+        return
+
+    if was_open and previous[0] is not None:
+        apply_table_delta(get_activity_table(previous[0]), open_action_items=-1)
+    if is_open and instance.activity_id is not None:
+        apply_table_delta(get_activity_table(instance.activity_id), open_action_items=1)
+
+
+@receiver(post_delete, sender=ActionItems)
+def uncount_deleted_action_item_in_table(sender, instance, origin=None, **kwargs):
+    if instance.activity_id is None or is_reconciled_delete(sender, origin):
+        return
+    if is_open_action_item(instance.checked, instance.action_item):
+        apply_table_delta(
+            get_activity_table(instance.activity_id), open_action_items=-1
+        )
+
+
+@receiver(m2m_changed, sender=ActivitiesTags)
+def count_tags_usage(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Count the added assignments once they exist and the removed ones while
+    they still do, add only reports the missing ids while remove reports the
+    requested ones
+    """
+    if action == "post_add":
+        delta = 1
+    elif action in ["pre_remove", "pre_clear"]:
+        delta = -1
+    else:
+        return
+    if pk_set is not None and not pk_set:
+        return
+
+    # reverse when the assignments are changed from the activity's side
+    if reverse:
+        assignments = ActivitiesTags.objects.filter(activities_id=instance.pk)
+        if pk_set is not None:
+            assignments = assignments.filter(tags_id__in=pk_set)
+    else:
+        assignments = ActivitiesTags.objects.filter(tags_id=instance.pk)
+        if pk_set is not None:
+            assignments = assignments.filter(activities_id__in=pk_set)
+    apply_tags_usage_delta(assignments, delta)
+
+
+@receiver(pre_delete, sender=Activities)
+def uncount_deleted_activity_tags(sender, instance, origin=None, **kwargs):
+    # deleting a table or a journal reconciles the usage of the user's tags
+    if is_reconciled_delete(sender, origin):
+        return
+    apply_tags_usage_delta(ActivitiesTags.objects.filter(activities_id=instance.id), -1)
+
+
+@receiver(post_delete, sender=Journal)
+def reconcile_deleted_journal_tags(sender, instance, origin=None, **kwargs):
+    if get_delete_origin_model(origin) is sender:
+        reconcile_tags_usage([instance.user_id])
@@ -0,0 +1,71 @@
+"""
+Incremental JSON streaming for large list responses
+"""
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+from journal.config import STREAM_CHUNK_SIZE
+
+
+STREAM_TRUE_VALUES = ["1", "true", "True"]
+
+
+def is_stream_requested(request):
+    """
+    Streaming is opt-in through the `stream` query param
+    """
+    return request.query_params.get("stream") in STREAM_TRUE_VALUES
+
+
+def stream_json_array(
+    queryset,
+    serializer_class,
+    context,
+    prefix="",
+    suffix="",
+    chunk_size=STREAM_CHUNK_SIZE,
+    collector=None,
+):
+    """
+    Yield a JSON array one serialized element at a time, fetching the
+    queryset in chunks so only a chunk of instances is held in memory.
+    Every element is passed to the `add` of the `collector` and a callable
+    `suffix` is called once the array is complete
+    """
+    encoder = JSONEncoder(ensure_ascii=False)
+    separator = ""
+
+    yield prefix + "["
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        data = serializer_class(instance, context=context).data
+        if collector is not None:
+            collector.add(data)
+        yield separator + encoder.encode(data)
+        separator = ","
+    yield "]" + (suffix() if callable(suffix) else suffix)
+
+
+def stream_json_object_with_array(
+    data, key, queryset, serializer_class, context, collector=None
+):
+    """
+    Yield `data` as a JSON object whose `key` member is streamed as an array,
+    followed by the members returned by the `get_data` of the `collector`
+    once it has seen every element
+    """
+    encoder = JSONEncoder(ensure_ascii=False)
+    head = encoder.encode(data)
+    prefix = head[:-1] + ("," if data else "") + encoder.encode(key) + ":"
+
+    def suffix():
+        tail = collector.get_data() if collector is not None else {}
+        return ("," + encoder.encode(tail)[1:]) if tail else "}"
+
+    return stream_json_array(
+        queryset, serializer_class, context, prefix, suffix, collector=collector
+    )
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    def __init__(self, streaming_content, *args, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(streaming_content, *args, **kwargs)
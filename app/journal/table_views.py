@@ -0,0 +1,208 @@
+"""
+Compiles the declarative view spec of a journal table into an ORM query
+
+A view spec looks like:
+
+    {
+        "filters": [
+            {"field": "tags", "op": "any", "value": [1, 2]},
+            {"field": "created", "op": "gte", "value": "2024-01-01"},
+            {"field": "name", "op": "contains", "value": "run"},
+            {"field": "checked", "op": "eq", "value": false}
+        ],
+        "sorts": [{"field": "created", "direction": "desc"}],
+        "group_by": "tags"
+    }
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from core.metrics import registry
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from journal.config import TABLE_VIEW_CACHE_SIZE
+from journal.filters import get_tags_filters, get_checked_filter, parse_created
+
+
+def compile_name_filter(op, value):
+    if not isinstance(value, str):
+        raise ValidationError("The name filter value should be a string")
+    lookup = {
+        "eq": "name",
+        "contains": "name__icontains",
+        "starts_with": "name__istartswith",
+    }
+    return [Q(**{lookup[op]: value})]
+
+
+def compile_created_filter(op, value):
+    if not isinstance(value, str):
+        raise ValidationError("The created filter value should be a date string")
+    end_of_day = op in ["lte", "gt"]
+    return [Q(**{f"created__{op}": parse_created(value, "created", end_of_day)})]
+
+
+def compile_tags_filter(op, value):
+    if not isinstance(value, list) or not all(isinstance(i, int) for i in value):
+        raise ValidationError("The tags filter value should be a list of ids")
+    return get_tags_filters(value, op)
+
+
+def compile_checked_filter(op, value):
+    if not isinstance(value, bool):
+        raise ValidationError("The checked filter value should be a boolean")
+    return [get_checked_filter(value)]
+
+
+FILTER_COMPILERS = {
+    "name": (["eq", "contains", "starts_with"], compile_name_filter),
+    "created": (["gte", "lte", "gt", "lt"], compile_created_filter),
+    "tags": (["any", "all", "none"], compile_tags_filter),
+    "checked": (["eq"], compile_checked_filter),
+}
+
+SORT_FIELDS = ["name", "created", "ordering", "id"]
+
+GROUP_BY_FIELDS = ["tags"]
+
+
+class CompiledTableView:
+    """
+    The filters, sorts and grouping of a table view ready to apply to an
+    activities queryset
+    """
+
+    def __init__(self, filters, order_by, group_by):
+        self.filters = filters
+        self.order_by = order_by
+        self.group_by = group_by
+
+    def apply(self, queryset):
+        if self.filters:
+            queryset = queryset.filter(*self.filters)
+        if self.order_by:
+            queryset = queryset.order_by(*self.order_by)
+        return queryset
+
+
+def compile_filters(filters):
+    if not isinstance(filters, list):
+        raise ValidationError("The view filters should be a list")
+
+    expressions = []
+    for view_filter in filters:
+        if not isinstance(view_filter, dict):
+            raise ValidationError("Each view filter should be an object")
+        field = view_filter.get("field")
+        op = view_filter.get("op")
+
+        if field not in FILTER_COMPILERS:
+            raise ValidationError(f"Cannot filter the view by `{field}`")
+        ops, compiler = FILTER_COMPILERS[field]
+        if op not in ops:
+            raise ValidationError(f"Invalid operation `{op}` for the `{field}` filter")
+        expressions.extend(compiler(op, view_filter.get("value")))
+    return expressions
+
+
+def compile_sorts(sorts):
+    if not isinstance(sorts, list):
+        raise ValidationError("The view sorts should be a list")
+
+    order_by = []
+    for sort in sorts:
+        if not isinstance(sort, dict) or sort.get("field") not in SORT_FIELDS:
+            raise ValidationError(f"Sort fields should be one of {SORT_FIELDS}")
+        direction = sort.get("direction", "asc")
+        if direction not in ["asc", "desc"]:
+            raise ValidationError("Sort direction should be asc or desc")
+        order_by.append(("-" if direction == "desc" else "") + sort["field"])
+
+    if order_by:
+        # keep the order stable between requests
+        order_by.append("id")
+    return order_by
+
+
+def compile_view_spec(spec):
+    """
+    Validate `spec` and compile it, raises a ValidationError for invalid specs
+    """
+    if not isinstance(spec, dict):
+        raise ValidationError("The table view should be an object")
+
+    group_by = spec.get("group_by")
+    if group_by is not None and group_by not in GROUP_BY_FIELDS:
+        raise ValidationError(f"Views can only be grouped by {GROUP_BY_FIELDS}")
+
+    return CompiledTableView(
+        compile_filters(spec.get("filters", [])),
+        compile_sorts(spec.get("sorts", [])),
+        group_by,
+    )
+
+
+_compiled_views = OrderedDict()
+_compiled_views_lock = threading.Lock()
+
+
+def get_spec_hash(spec):
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+def get_compiled_view(spec):
+    """
+    Return the compiled view of `spec`, compiled views are cached in process
+    by spec hash with the least recently used dropped first
+    """
+    spec_hash = get_spec_hash(spec)
+    with _compiled_views_lock:
+        compiled = _compiled_views.get(spec_hash)
+        if compiled is not None:
+            _compiled_views.move_to_end(spec_hash)
+            registry.inc(
+                "journal_cache_requests_total", cache="table_view", result="hit"
+            )
+            return compiled
+    registry.inc("journal_cache_requests_total", cache="table_view", result="miss")
+
+    compiled = compile_view_spec(spec)
+    with _compiled_views_lock:
+        _compiled_views[spec_hash] = compiled
+        if len(_compiled_views) > TABLE_VIEW_CACHE_SIZE:
+            _compiled_views.popitem(last=False)
+    return compiled
+
+
+class TagGroups:
+    """
+    Ids of serialized activities grouped by tag as they are added, untagged
+    activities are grouped under a null tag
+    """
+
+    def __init__(self):
+        self.groups = OrderedDict()
+
+    def add(self, activity):
+        tag_ids = [tag["id"] for tag in activity["tags"]] or [None]
+        for tag_id in tag_ids:
+            self.groups.setdefault(tag_id, []).append(activity["id"])
+
+    def get_data(self):
+        return {
+            "groups": [
+                {"tag": tag, "activities": ids} for tag, ids in self.groups.items()
+            ]
+        }
+
+
+def group_activities_by_tags(activities):
+    """
+    Return the ids of the serialized `activities` grouped by tag
+    """
+    groups = TagGroups()
+    for activity in activities:
+        groups.add(activity)
+    return groups.get_data()["groups"]
@@ -390,6 +390,45 @@ class PrivateActivitiesApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(payload["name"], activities.name)
 
+    def test_create_activities_in_virtual_table_fails(self):
+        """
+        Test activities cannot be created in a virtual table
+        """
+        virtual_table = JournalTables.objects.create(
+            table_name="All entries", journal=self.journal, is_virtual=True
+        )
+
+        payload = {"name": "ldskjfafd", "journal_table": virtual_table.id}
+        res = self.client.post(ACTIVITIES_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Activities.objects.filter(journal_table=virtual_table))
+
+    def test_partial_update_of_an_activity_to_virtual_table_fails(self):
+        """
+        Test activities cannot be moved to a virtual table
+        """
+        journal_table = JournalTables.objects.create(
+            table_name="New Table", journal=self.journal
+        )
+        virtual_table = JournalTables.objects.create(
+            table_name="All entries", journal=self.journal, is_virtual=True
+        )
+        activities = Activities.objects.create(
+            name="Kdf sfsdf",
+            journal_table=journal_table,
+        )
+
+        res = self.client.patch(
+            detail_url(activities.id),
+            {"journal_table": virtual_table.id},
+            format="json",
+        )
+
+        activities.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(activities.journal_table, journal_table)
+
     def test_partial_update_of_a_submodel_activity(self):
         """
         Test a patch update of an activity submodel
@@ -659,6 +698,37 @@ class PrivateActivitiesApiTests(TestCase):
         for i in [activities1, activities2, activities3]:
             self.assertEqual(list(i.tags.all()), [tag1, tag2, tag3])
 
+    def test_batch_update_activities_to_virtual_table_fails(self):
+        """
+        Test a batch update naming a virtual table is rejected
+        """
+        journal_table = JournalTables.objects.create(
+            table_name="New Table", journal=self.journal
+        )
+        virtual_table = JournalTables.objects.create(
+            table_name="All entries", journal=self.journal, is_virtual=True
+        )
+        activities = Activities.objects.create(
+            name="Kdf sfsdf",
+            journal_table=journal_table,
+        )
+
+        batch_update_payload = {
+            "activities_list": [
+                {
+                    "ids": [activities.id],
+                    "tags": [self.tag1.id],
+                    "journal_table": virtual_table.id,
+                }
+            ]
+        }
+        res = self.client.patch(
+            BATCH_UPDATE_ACTIVITIES_URL, batch_update_payload, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(activities.tags.exists())
+
     def test_batch_delete_activities(self):
         """
         Test a batch delete of multiple activities
@@ -883,3 +953,27 @@ class PrivateActivitiesApiTests(TestCase):
         self.assertEqual(
             other_activity_1.tags.all().count(), other_activity_2.tags.all().count()
         )
+
+    def test_list_activities_streamed_matches_serialized_response(self):
+        """
+        Test listing activities with streaming enabled returns the same payload
+        as the non streamed response
+        """
+        journal_table = JournalTables.objects.create(
+            table_name="New Table", journal=self.journal
+        )
+        for i in range(3):
+            activity = Activities.objects.create(
+                name=f"activity {i}", journal_table=journal_table
+            )
+            activity.tags.add(self.tag1)
+            ActionItems.objects.create(activity=activity, action_item=f"item {i}")
+
+        res = self.client.get(ACTIVITIES_URL)
+        streamed_res = self.client.get(ACTIVITIES_URL, {"stream": "true"})
+
+        self.assertEqual(streamed_res.status_code, status.HTTP_200_OK)
+        self.assertTrue(streamed_res.streaming)
+        streamed_data = json.loads(b"".join(streamed_res.streaming_content))
+        self.assertEqual(streamed_data, json.loads(res.content))
+        self.assertEqual(len(streamed_data), 3)
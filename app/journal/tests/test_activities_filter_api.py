@@ -0,0 +1,319 @@
+"""
+Test for filtering the Activities API
+"""
+from unittest import skipUnless
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import timedelta
+from core.models import Journal, JournalTables, Activities, ActionItems, Tags
+
+ACTIVITIES_URL = reverse("journal:activities-list")
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+def create_tag(user, tag_name):
+    """
+    Create and return a tag
+    """
+    return Tags.objects.create(
+        tag_name=tag_name,
+        tag_user=user,
+        tag_color=Tags.Colors.RED,
+        tag_class=Tags.ColorsClasses.RED_CLASS,
+    )
+
+
+def create_activity(journal_table, name, created=None, tags=()):
+    """
+    Create and return an activity, optionally backdated
+    """
+    activity = Activities.objects.create(name=name, journal_table=journal_table)
+    if created is not None:
+        Activities.objects.filter(id=activity.id).update(created=created)
+    activity.tags.add(*tags)
+    return activity
+
+
+class PrivateActivitiesFilterApiTests(TestCase):
+    """
+    Private tests for filtering activities
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            first_name="Test",
+            last_name="User",
+            email="user@example.com",
+            username="testuser",
+            password="Awesomeuser123",
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        self.daily_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+        self.personal_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Personal entries"
+        )
+        self.daily_tag = create_tag(self.user, "Daily")
+        self.work_tag = create_tag(self.user, "Work")
+        self.client.force_authenticate(self.user)
+
+    def get_ids(self, params):
+        res = self.client.get(ACTIVITIES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return sorted(activity["id"] for activity in res.data)
+
+    def test_filter_activities_by_any_and_all_tags(self):
+        """
+        Test filtering activities by tags matches any or all of the tags
+        """
+        daily = create_activity(self.daily_table, "daily", tags=[self.daily_tag])
+        both = create_activity(
+            self.daily_table, "both", tags=[self.daily_tag, self.work_tag]
+        )
+        create_activity(self.daily_table, "untagged")
+        tags = f"{self.daily_tag.id},{self.work_tag.id}"
+
+        self.assertEqual(self.get_ids({"tags": tags}), [daily.id, both.id])
+        self.assertEqual(self.get_ids({"tags": tags, "tags_match": "all"}), [both.id])
+
+    def test_filter_activities_by_none_of_the_tags(self):
+        """
+        Test filtering activities by tags with the none match excludes the
+        activities tagged with any of the tags
+        """
+        create_activity(self.daily_table, "daily", tags=[self.daily_tag])
+        work = create_activity(self.daily_table, "work", tags=[self.work_tag])
+        untagged = create_activity(self.daily_table, "untagged")
+
+        params = {"tags": self.daily_tag.id, "tags_match": "none"}
+        self.assertEqual(self.get_ids(params), [work.id, untagged.id])
+
+    def test_filter_activities_by_created_range(self):
+        """
+        Test filtering activities by a created date range includes both ends
+        """
+        now = timezone.now()
+        old = create_activity(self.daily_table, "old", now - timedelta(days=40))
+        recent = create_activity(self.daily_table, "recent", now - timedelta(days=3))
+        create_activity(self.daily_table, "today", now)
+
+        params = {
+            "created_after": (now - timedelta(days=3)).date().isoformat(),
+            "created_before": (now - timedelta(days=1)).date().isoformat(),
+        }
+        self.assertEqual(self.get_ids(params), [recent.id])
+
+        params = {"created_before": (now - timedelta(days=30)).isoformat()}
+        self.assertEqual(self.get_ids(params), [old.id])
+
+    def test_filter_activities_by_journal_table(self):
+        """
+        Test filtering activities by journal table
+        """
+        personal = create_activity(self.personal_table, "personal")
+        create_activity(self.daily_table, "daily")
+
+        params = {"journal_table": self.personal_table.id}
+        self.assertEqual(self.get_ids(params), [personal.id])
+
+    def test_filter_activities_by_action_items_checked_state(self):
+        """
+        Test filtering activities created through the API by the checked
+        state of their action items ignores the empty default action item
+        """
+        ids = []
+        for name in ["checked", "unchecked", "empty"]:
+            res = self.client.post(
+                ACTIVITIES_URL, {"name": name, "journal_table": self.daily_table.id}
+            )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            ids.append(res.data["id"])
+        checked, unchecked, _ = ids
+        ActionItems.objects.create(activity_id=checked, action_item="a", checked=True)
+        ActionItems.objects.create(activity_id=unchecked, action_item="b")
+
+        self.assertEqual(self.get_ids({"checked": "true"}), [checked])
+        self.assertEqual(self.get_ids({"checked": "false"}), [unchecked])
+
+    def test_filter_activities_combines_filters(self):
+        """
+        Test the filters are combined
+        """
+        now = timezone.now()
+        match = create_activity(self.daily_table, "match", tags=[self.work_tag])
+        create_activity(
+            self.daily_table, "old", now - timedelta(days=10), [self.work_tag]
+        )
+        create_activity(self.personal_table, "other table", tags=[self.work_tag])
+
+        params = {
+            "tags": self.work_tag.id,
+            "journal_table": self.daily_table.id,
+            "created_after": (now - timedelta(days=1)).isoformat(),
+        }
+        self.assertEqual(self.get_ids(params), [match.id])
+
+    def test_filter_activities_with_invalid_values_fails(self):
+        """
+        Test filtering with invalid values fails
+        """
+        for params in [
+            {"tags": "daily"},
+            {"tags": "1", "tags_match": "some"},
+            {"created_after": "yesterday"},
+            {"checked": "maybe"},
+        ]:
+            res = self.client.get(ACTIVITIES_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN JSON plans of PostgreSQL")
+class ActivitiesFilterQueryPlanTests(TestCase):
+    """
+    Tests that every activities filter is backed by an index
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            create_user(
+                email=f"user{i}@example.com",
+                username=f"testuser{i}",
+                password="Awesomeuser123",
+            )
+            for i in range(3)
+        ]
+        for user in users:
+            journal = Journal.objects.create(user=user)
+            tables = [
+                JournalTables.objects.create(journal=journal, table_name=f"Table {i}")
+                for i in range(2)
+            ]
+            tag = create_tag(user, "Daily")
+            activities = Activities.objects.bulk_create(
+                Activities(
+                    journal_table=table,
+                    owner=user,
+                    name=f"activity {i}",
+                    ordering=i,
+                )
+                for table in tables
+                for i in range(150)
+            )
+            ActionItems.objects.bulk_create(
+                ActionItems(activity=activity, owner=user, action_item="item")
+                for activity in activities
+            )
+            Activities.tags.through.objects.bulk_create(
+                Activities.tags.through(activities_id=activity.id, tags_id=tag.id)
+                for activity in activities[::10]
+            )
+            # most activities are older than the filtered ranges
+            Activities.objects.filter(
+                id__in=[activity.id for activity in activities[10:]]
+            ).update(created=timezone.now() - timedelta(days=90))
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        cls.user = users[0]
+        cls.table = JournalTables.objects.filter(journal__user=cls.user).first()
+        cls.tag = Tags.objects.get(tag_user=cls.user)
+
+    def explain(self, params):
+        """
+        Return the plan of the activities query the list endpoint runs with
+        the filters of `params`
+        """
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            res = client.get(ACTIVITIES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        sql = next(
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('SELECT "core_activities"."id"')
+        )
+        with connection.cursor() as cursor:
+            # make the planner prefer any usable index over a sequential scan
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}")
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def assertIndexPlan(self, params, index_names, tables):
+        plan = self.explain(params)
+        self.assertTrue(
+            any(index_name in plan for index_name in index_names),
+            f"None of {index_names} in {plan}",
+        )
+        for table in tables:
+            self.assertNotIn(f"Seq Scan on {table}", plan)
+
+    def test_journal_table_and_created_filters_use_composite_index(self):
+        """
+        Test filtering by table and created range uses (journal_table, created)
+        """
+        now = timezone.now()
+        self.assertIndexPlan(
+            {
+                "journal_table": str(self.table.id),
+                "created_after": (now - timedelta(days=7)).isoformat(),
+                "created_before": now.isoformat(),
+            },
+            # the (journal_table, ordering) index also serves the default ordering
+            ["activities_table_created_idx", "activities_table_ordering_idx"],
+            ["core_activities"],
+        )
+
+    def test_created_filter_uses_composite_index(self):
+        """
+        Test filtering the user's activities by created range only uses the
+        (owner, created) index
+        """
+        now = timezone.now()
+        self.assertIndexPlan(
+            {"created_after": (now - timedelta(days=7)).isoformat()},
+            ["activities_owner_created_idx"],
+            ["core_activities"],
+        )
+
+    def test_checked_filter_uses_composite_index(self):
+        """
+        Test filtering by checked state uses the (activity, checked) index and
+        the partial index of the open action items
+        """
+        self.assertIndexPlan(
+            {"checked": "true"},
+            ["actionitems_act_checked_idx"],
+            ["core_activities", "core_actionitems"],
+        )
+        self.assertIndexPlan(
+            {"checked": "false"},
+            ["actionitems_open_idx", "actionitems_act_checked_idx"],
+            ["core_activities", "core_actionitems"],
+        )
+
+    def test_tags_filters_use_through_table_index(self):
+        """
+        Test filtering by any or all tags uses an index of the tags through table
+        """
+        for tags_match in ["any", "all", "none"]:
+            plan = self.explain({"tags": str(self.tag.id), "tags_match": tags_match})
+            self.assertIn("core_tags_activities", plan)
+            self.assertNotIn("Seq Scan on core_tags_activities", plan)
+            self.assertNotIn("Seq Scan on core_activities", plan)
@@ -0,0 +1,138 @@
+"""
+Test for the denormalized owner of the activities and submodels
+"""
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import (
+    Journal,
+    JournalTables,
+    Activities,
+    Intentions,
+    Happenings,
+    GratefulFor,
+    ActionItems,
+)
+
+ACTIVITIES_URL = reverse("journal:activities-list")
+BATCH_DUPLICATE_ACTIVITIES_URL = reverse(
+    "journal:activities-batch_duplicate_activities"
+)
+SUBMODELS = [Intentions, Happenings, GratefulFor, ActionItems]
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+class PrivateActivitiesOwnerApiTests(TestCase):
+    """
+    Private tests for the owner of the activities and submodels
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            first_name="Test",
+            last_name="User",
+            email="user@example.com",
+            username="testuser",
+            password="Awesomeuser123",
+        )
+        self.other_user = create_user(
+            email="other@example.com",
+            username="otheruser",
+            password="Awesomeuser123",
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        self.journal_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_create_activity_sets_owner(self):
+        """
+        Test creating an activity sets its owner and the owner of its default
+        submodels
+        """
+        res = self.client.post(
+            ACTIVITIES_URL, {"name": "Entry", "journal_table": self.journal_table.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        activity = Activities.objects.get(id=res.data["id"])
+        self.assertEqual(activity.owner, self.user)
+        for submodel in SUBMODELS:
+            owners = submodel.objects.filter(activity=activity).values_list(
+                "owner_id", flat=True
+            )
+            self.assertEqual(list(owners), [self.user.id])
+
+    def test_duplicate_activities_keep_owner(self):
+        """
+        Test duplicated activities and their submodels keep the owner
+        """
+        activity = Activities.objects.create(journal_table=self.journal_table)
+        Intentions.objects.create(activity=activity, intention="a")
+
+        res = self.client.post(
+            BATCH_DUPLICATE_ACTIVITIES_URL,
+            {"duplicate_list": [{"ids": [activity.id]}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(Activities.objects.values_list("owner_id", flat=True)), {self.user.id}
+        )
+        self.assertEqual(
+            set(Intentions.objects.values_list("owner_id", flat=True)), {self.user.id}
+        )
+
+    def test_list_activities_filters_on_owner(self):
+        """
+        Test listing activities checks the owner without joining the journal
+        and excludes the activities of other users
+        """
+        Activities.objects.create(journal_table=self.journal_table, name="Mine")
+        other_journal = Journal.objects.create(user=self.other_user)
+        other_table = JournalTables.objects.create(
+            journal=other_journal, table_name="Daily entries"
+        )
+        Activities.objects.create(journal_table=other_table, name="Theirs")
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ACTIVITIES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([activity["name"] for activity in res.data], ["Mine"])
+        activities_query = next(
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('SELECT "core_activities"')
+        )
+        self.assertIn('"core_activities"."owner_id" =', activities_query)
+        self.assertNotIn("core_journal", activities_query)
+
+    def test_other_user_submodel_is_not_found(self):
+        """
+        Test a submodel of another user's activity cannot be retrieved
+        """
+        other_journal = Journal.objects.create(user=self.other_user)
+        other_table = JournalTables.objects.create(
+            journal=other_journal, table_name="Daily entries"
+        )
+        activity = Activities.objects.create(journal_table=other_table)
+        intention = Intentions.objects.create(activity=activity, intention="a")
+
+        res = self.client.get(reverse("journal:intentions-detail", args=[intention.id]))
+
+        self.assertEqual(intention.owner, self.other_user)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
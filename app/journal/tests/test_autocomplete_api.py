@@ -0,0 +1,252 @@
+"""
+Test for the Autocomplete API
+"""
+from django.test import TestCase, SimpleTestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import Journal, JournalTables, Activities, Tags
+from journal import autocomplete
+from unittest.mock import patch
+
+TAGS_AUTOCOMPLETE_URL = reverse("journal:tags-autocomplete")
+ACTIVITIES_AUTOCOMPLETE_URL = reverse("journal:activities-autocomplete")
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+def create_tag(user, tag_name):
+    """
+    Create and return a tag
+    """
+    return Tags.objects.create(
+        tag_name=tag_name,
+        tag_user=user,
+        tag_color=Tags.Colors.RED,
+        tag_class=Tags.ColorsClasses.RED_CLASS,
+    )
+
+
+class TrieTests(SimpleTestCase):
+    """
+    Tests for the in process autocomplete trie
+    """
+
+    def test_search_matches_prefix_of_any_word(self):
+        """
+        Test the trie matches the prefix of every word of an entry
+        """
+        trie = autocomplete.Trie()
+        trie.insert("Morning run", 1)
+        trie.insert("Evening walk", 2)
+
+        self.assertEqual(trie.search("ru"), [1])
+        self.assertEqual(trie.search("Morning r"), [1])
+        self.assertEqual(trie.search("e"), [2])
+        self.assertEqual(trie.search("x"), [])
+
+    def test_search_prefix_longer_than_depth(self):
+        """
+        Test prefixes longer than the trie depth only match entries starting
+        with the whole prefix
+        """
+        trie = autocomplete.Trie(depth=3)
+        trie.insert("Meditation", 1)
+        trie.insert("Medical checkup", 2)
+
+        self.assertEqual(trie.prefix_matches("medit", 10), [0])
+        self.assertEqual(sorted(trie.prefix_matches("med", 10)), [0, 1])
+
+    def test_search_returns_shorter_completions_first_and_respects_limit(self):
+        """
+        Test shorter completions are returned first and the limit is applied
+        """
+        trie = autocomplete.Trie()
+        trie.insert("Workout", 1)
+        trie.insert("Work", 2)
+        trie.insert("Workshop", 3)
+
+        self.assertEqual(trie.search("wor", limit=2), [2, 1])
+
+    def test_search_completes_similar_words_after_prefixes(self):
+        """
+        Test the words similar to the text are returned after the prefix
+        matches, most similar first, and dissimilar words are not
+        """
+        trie = autocomplete.Trie()
+        trie.insert("Meditation", 1)
+        trie.insert("Medical checkup", 2)
+        trie.insert("Gardening", 3)
+
+        self.assertEqual(trie.search("medit"), [1, 2])
+        self.assertEqual(trie.search("meditatoin"), [1])
+        self.assertEqual(trie.search("gardnening"), [3])
+
+    def test_search_on_large_trie(self):
+        """
+        Test completing against 100k entries fills the limit with prefix
+        matches
+        """
+        trie = autocomplete.Trie()
+        for i in range(100_000):
+            trie.insert(f"Entry number {i} about topic{i % 977}", i)
+
+        for prefix in ["entry", "topic12", "entry number 9", "about"]:
+            results = trie.search(prefix)
+            self.assertEqual(len(results), 10)
+            self.assertEqual(trie.prefix_matches(prefix, 10), results)
+
+
+class TrieCacheTests(SimpleTestCase):
+    """
+    Tests for the worker's cache of autocomplete tries
+    """
+
+    def setUp(self):
+        autocomplete._trie_cache.clear()
+        self.addCleanup(autocomplete._trie_cache.clear)
+
+    def test_least_recently_used_tries_are_evicted(self):
+        """
+        Test the cache keeps at most its size of tries, evicting the least
+        recently used
+        """
+        queryset = Tags.objects.none()
+        with patch.object(autocomplete, "AUTOCOMPLETE_TRIE_CACHE_SIZE", 2):
+            first = autocomplete.get_trie(("tags", 1), queryset, "tag_name", [])
+            autocomplete.get_trie(("tags", 2), queryset, "tag_name", [])
+            # used again, the second trie is now the least recent
+            autocomplete.get_trie(("tags", 1), queryset, "tag_name", [])
+            autocomplete.get_trie(("tags", 3), queryset, "tag_name", [])
+
+        self.assertEqual(list(autocomplete._trie_cache), [("tags", 1), ("tags", 3)])
+        self.assertIs(autocomplete._trie_cache[("tags", 1)][1], first)
+
+    def test_expired_tries_are_evicted(self):
+        """
+        Test the tries older than the TTL are dropped when a trie is built
+        """
+        queryset = Tags.objects.none()
+        autocomplete.get_trie(("tags", 1), queryset, "tag_name", [])
+        with patch.object(autocomplete, "AUTOCOMPLETE_TRIE_TTL", 0):
+            autocomplete.get_trie(("tags", 2), queryset, "tag_name", [])
+
+        self.assertEqual(list(autocomplete._trie_cache), [])
+
+
+class PrivateAutocompleteApiTests(TestCase):
+    """
+    Private Tests for the Autocomplete Api
+    """
+
+    def setUp(self):
+        autocomplete._trie_cache.clear()
+        self.user_payload = {
+            "first_name": "Test",
+            "last_name": "User",
+            "email": "user@example.com",
+            "username": "testuser",
+            "password": "Awesomeuser123",
+        }
+        self.user = create_user(**self.user_payload)
+        self.journal = Journal.objects.create(user=self.user)
+        self.journal_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_autocomplete_tags_by_prefix(self):
+        """
+        Test tags starting with the text are returned
+        """
+        tag = create_tag(self.user, "Workout")
+        create_tag(self.user, "Family")
+
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL, {"q": "wor"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([t["id"] for t in res.data], [tag.id])
+        self.assertEqual(res.data[0]["tag_name"], "Workout")
+
+    def test_autocomplete_tags_sees_new_tags(self):
+        """
+        Test tags created after a completion are returned by the next one
+        """
+        create_tag(self.user, "Workout")
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL, {"q": "wor"})
+        self.assertEqual(len(res.data), 1)
+
+        create_tag(self.user, "Work")
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL, {"q": "wor"})
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_autocomplete_tags_excludes_other_users_tags(self):
+        """
+        Test tags of another non admin user are not returned
+        """
+        user_payload = self.user_payload.copy()
+        user_payload["email"] = "user2@example.com"
+        create_tag(create_user(**user_payload), "Workout")
+
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL, {"q": "wor"})
+
+        self.assertEqual(res.data, [])
+
+    def test_autocomplete_activities_by_word_prefix(self):
+        """
+        Test activities with a word starting with the text are returned
+        """
+        activity = Activities.objects.create(
+            name="Morning run", journal_table=self.journal_table
+        )
+        Activities.objects.create(name="Groceries", journal_table=self.journal_table)
+
+        res = self.client.get(ACTIVITIES_AUTOCOMPLETE_URL, {"q": "run"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([a["id"] for a in res.data], [activity.id])
+
+    def test_autocomplete_activities_sees_renamed_activities(self):
+        """
+        Test renaming an activity is reflected by the next completion
+        """
+        activity = Activities.objects.create(
+            name="Morning run", journal_table=self.journal_table
+        )
+        self.client.get(ACTIVITIES_AUTOCOMPLETE_URL, {"q": "run"})
+
+        activity.name = "Morning swim"
+        activity.save()
+        res = self.client.get(ACTIVITIES_AUTOCOMPLETE_URL, {"q": "swim"})
+
+        self.assertEqual([a["id"] for a in res.data], [activity.id])
+
+    def test_autocomplete_applies_limit(self):
+        """
+        Test the number of results is limited
+        """
+        for i in range(5):
+            Activities.objects.create(
+                name=f"Walk {i}", journal_table=self.journal_table
+            )
+
+        res = self.client.get(ACTIVITIES_AUTOCOMPLETE_URL, {"q": "walk", "limit": 3})
+
+        self.assertEqual(len(res.data), 3)
+
+    def test_autocomplete_without_text_fails(self):
+        """
+        Test completing without a text fails
+        """
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -129,6 +129,18 @@ class PrivateJournalApiTests(TestCase):
         self.assertEqual(journal_tables_count, 3)
         self.assertEqual(res.data, serializer.data)
 
+    def test_journal_default_all_entries_table_is_virtual(self):
+        """
+        Test the default "All entries" table is the only virtual table
+        """
+        self.payload["user"] = self.user.id
+        res = self.client.post(CREATE_JOURNAL_URL, self.payload)
+
+        virtual_tables = JournalTables.objects.filter(
+            journal__id=res.data["id"], is_virtual=True
+        ).values_list("table_name", flat=True)
+        self.assertEqual(list(virtual_tables), ["All entries"])
+
     def test_journal_is_created_successfully_and_sets_the_default_current_table(self):
         """
         Test that creating a journal also sets a default currenttable
@@ -0,0 +1,242 @@
+"""
+Test for the Journal calendar API
+"""
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import datetime, timedelta
+from core.models import (
+    Journal,
+    JournalTables,
+    JournalDailyRollups,
+    Activities,
+    ActionItems,
+)
+from journal.rollups import rebuild_daily_rollups
+
+
+ACTIVITIES_URL = reverse("journal:activities-list")
+
+
+def calendar_url(journal_id):
+    """
+    Return the journal calendar url
+    """
+    return reverse("journal:journal-calendar", args=[journal_id])
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+def get_rollups(journal):
+    return [
+        (
+            rollup.day,
+            rollup.activities_count,
+            rollup.action_items_count,
+            rollup.action_items_checked_count,
+        )
+        for rollup in JournalDailyRollups.objects.filter(journal=journal)
+    ]
+
+
+class PrivateJournalCalendarApiTests(TestCase):
+    """
+    Private tests for the journal daily rollups and calendar
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            first_name="Test",
+            last_name="User",
+            email="user@example.com",
+            username="testuser",
+            password="Awesomeuser123",
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        self.daily_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+        self.personal_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Personal entries"
+        )
+        self.today = timezone.localdate()
+        self.client.force_authenticate(self.user)
+
+    def test_rollups_count_created_activities_and_action_items(self):
+        """
+        Test creating activities and action items updates the day's rollup
+        """
+        activity = Activities.objects.create(journal_table=self.daily_table)
+        Activities.objects.create(journal_table=self.personal_table)
+        ActionItems.objects.create(activity=activity, action_item="a")
+        ActionItems.objects.create(activity=activity, action_item="b", checked=True)
+
+        self.assertEqual(get_rollups(self.journal), [(self.today, 2, 2, 1)])
+
+    def test_rollups_leave_out_empty_action_items(self):
+        """
+        Test the empty action item an activity is created with is only counted
+        once it is filled in
+        """
+        res = self.client.post(
+            ACTIVITIES_URL, {"name": "Walk", "journal_table": self.daily_table.id}
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(get_rollups(self.journal), [(self.today, 1, 0, 0)])
+
+        action_item = ActionItems.objects.get(activity_id=res.data["id"])
+        action_item.checked = True
+        action_item.save()
+        self.assertEqual(get_rollups(self.journal), [(self.today, 1, 0, 0)])
+
+        action_item.action_item = "Buy shoes"
+        action_item.save()
+        self.assertEqual(get_rollups(self.journal), [(self.today, 1, 1, 1)])
+
+        action_item.action_item = ""
+        action_item.save()
+        self.assertEqual(get_rollups(self.journal), [(self.today, 1, 0, 0)])
+
+        rebuild_daily_rollups([self.journal.id])
+        self.assertEqual(get_rollups(self.journal), [(self.today, 1, 0, 0)])
+
+    def test_rollups_follow_action_item_updates_and_deletes(self):
+        """
+        Test checking, moving and deleting action items updates the rollups
+        """
+        first = Activities.objects.create(journal_table=self.daily_table)
+        second = Activities.objects.create(journal_table=self.daily_table)
+        action_item = ActionItems.objects.create(activity=first, action_item="a")
+
+        action_item.checked = True
+        action_item.save()
+        self.assertEqual(get_rollups(self.journal), [(self.today, 2, 1, 1)])
+
+        action_item.activity = second
+        action_item.save()
+        self.assertEqual(get_rollups(self.journal), [(self.today, 2, 1, 1)])
+
+        action_item.delete()
+        self.assertEqual(get_rollups(self.journal), [(self.today, 2, 0, 0)])
+
+    def test_rollups_follow_deleted_activities_and_tables(self):
+        """
+        Test deleting an activity or a whole table removes its counts
+        """
+        activity = Activities.objects.create(journal_table=self.daily_table)
+        ActionItems.objects.create(activity=activity, action_item="a", checked=True)
+        Activities.objects.create(journal_table=self.personal_table)
+        personal = Activities.objects.create(journal_table=self.personal_table)
+        ActionItems.objects.create(activity=personal, action_item="b")
+
+        activity.delete()
+        self.assertEqual(get_rollups(self.journal), [(self.today, 2, 1, 0)])
+
+        self.personal_table.delete()
+        self.assertEqual(get_rollups(self.journal), [])
+
+    def test_rebuild_daily_rollups_matches_incremental_rollups(self):
+        """
+        Test rebuilding the rollups gives the incrementally maintained counts
+        """
+        activity = Activities.objects.create(journal_table=self.daily_table)
+        ActionItems.objects.create(activity=activity, action_item="a", checked=True)
+        old = Activities.objects.create(journal_table=self.personal_table)
+        Activities.objects.filter(id=old.id).update(
+            created=timezone.now() - timedelta(days=3)
+        )
+        JournalDailyRollups.objects.all().delete()
+
+        rebuild_daily_rollups([self.journal.id])
+
+        self.assertEqual(
+            get_rollups(self.journal),
+            [
+                (self.today - timedelta(days=3), 1, 0, 0),
+                (self.today, 1, 1, 1),
+            ],
+        )
+
+    def test_get_calendar_returns_the_year_rollups(self):
+        """
+        Test the calendar returns the rollups of the requested year only
+        """
+        JournalDailyRollups.objects.create(
+            journal=self.journal, day=datetime(2024, 3, 1).date(), activities_count=2
+        )
+        JournalDailyRollups.objects.create(
+            journal=self.journal,
+            day=datetime(2024, 12, 31).date(),
+            activities_count=1,
+            action_items_count=3,
+            action_items_checked_count=1,
+        )
+        JournalDailyRollups.objects.create(
+            journal=self.journal, day=datetime(2025, 1, 1).date(), activities_count=4
+        )
+
+        res = self.client.get(calendar_url(self.journal.id), {"year": 2024})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            [
+                {
+                    "day": "2024-03-01",
+                    "activities_count": 2,
+                    "action_items_count": 0,
+                    "action_items_checked_count": 0,
+                },
+                {
+                    "day": "2024-12-31",
+                    "activities_count": 1,
+                    "action_items_count": 3,
+                    "action_items_checked_count": 1,
+                },
+            ],
+        )
+
+    def test_get_calendar_defaults_to_current_year(self):
+        """
+        Test the calendar defaults to the current year
+        """
+        Activities.objects.create(journal_table=self.daily_table)
+
+        res = self.client.get(calendar_url(self.journal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]["day"], self.today.isoformat())
+
+    def test_get_calendar_invalid_year_fails(self):
+        """
+        Test an invalid year is rejected
+        """
+        res = self.client.get(calendar_url(self.journal.id), {"year": "last"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_calendar_of_another_user_journal_fails(self):
+        """
+        Test the calendar of another user's journal is not returned
+        """
+        other_user = create_user(
+            first_name="Other",
+            last_name="User",
+            email="user2@example.com",
+            username="otheruser",
+            password="Awesomeuser123",
+        )
+        other_journal = Journal.objects.create(user=other_user)
+
+        res = self.client.get(calendar_url(other_journal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
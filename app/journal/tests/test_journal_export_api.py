@@ -0,0 +1,144 @@
+"""
+Test for the Journal Export API
+"""
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import (
+    Journal,
+    JournalTables,
+    Activities,
+    Intentions,
+    ActionItems,
+    Tags,
+)
+import csv
+import io
+import json
+
+
+def export_url(journal_id):
+    """
+    Returns the url for a journal export
+    """
+    return reverse("journal:journal-export", args=[journal_id])
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+def create_journal(
+    user,
+    journal_name="new journal",
+    journal_description="kvldsjfksd sdjflsjd lfjsldjf jdlfjd sfsdff",
+):
+    """
+    Create and return a journal
+    """
+    return Journal.objects.create(
+        journal_name=journal_name, journal_description=journal_description, user=user
+    )
+
+
+class PrivateJournalExportApiTests(TestCase):
+    """
+    Private Tests for Journal Export Api
+    """
+
+    def setUp(self):
+        self.user_payload = {
+            "first_name": "Test",
+            "last_name": "User",
+            "email": "user@example.com",
+            "username": "testuser",
+            "password": "Awesomeuser123",
+        }
+        self.user = create_user(**self.user_payload)
+        self.journal = create_journal(self.user)
+        self.journal_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+        self.tag = Tags.objects.create(
+            tag_name="Daily",
+            tag_user=self.user,
+            tag_color=Tags.Colors.RED,
+            tag_class=Tags.ColorsClasses.RED_CLASS,
+        )
+        self.activity = Activities.objects.create(
+            name="Morning run", journal_table=self.journal_table
+        )
+        self.activity.tags.add(self.tag)
+        Intentions.objects.create(intention="Run 5k", activity=self.activity)
+        ActionItems.objects.create(
+            action_item="Stretch", activity=self.activity, checked=True
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_streamed_content(self, res):
+        return b"".join(res.streaming_content).decode()
+
+    def test_export_journal_as_ndjson_streams_all_records(self):
+        """
+        Test exporting a journal streams its tags, tables and activities as ndjson
+        """
+        res = self.client.get(export_url(self.journal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+
+        records = [
+            json.loads(line) for line in self.get_streamed_content(res).splitlines()
+        ]
+        record_types = [record["type"] for record in records]
+        self.assertEqual(record_types, ["tag", "table", "activity"])
+
+        activity = records[2]
+        self.assertEqual(activity["name"], "Morning run")
+        self.assertEqual(activity["tags"], [self.tag.id])
+        self.assertEqual(activity["intentions"][0]["intention"], "Run 5k")
+        self.assertTrue(activity["action_items"][0]["checked"])
+
+    def test_export_journal_as_csv_streams_all_records(self):
+        """
+        Test exporting a journal as csv streams a row per record and submodel
+        """
+        res = self.client.get(export_url(self.journal.id), {"file_type": "csv"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+
+        rows = list(csv.reader(io.StringIO(self.get_streamed_content(res))))
+        self.assertEqual(rows[0][0], "record_type")
+        record_types = [row[0] for row in rows[1:]]
+        self.assertEqual(
+            record_types, ["tag", "table", "activity", "intention", "action_item"]
+        )
+
+    def test_export_journal_with_invalid_file_type_fails(self):
+        """
+        Test exporting a journal with an unsupported file type fails
+        """
+        res = self.client.get(export_url(self.journal.id), {"file_type": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_journal_of_another_user_fails(self):
+        """
+        Test exporting a journal the user does not own is not found
+        """
+        user_payload = self.user_payload.copy()
+        user_payload["email"] = "user2@example.com"
+        other_journal = create_journal(create_user(**user_payload))
+
+        res = self.client.get(export_url(other_journal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
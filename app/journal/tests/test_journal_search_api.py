@@ -0,0 +1,190 @@
+"""
+Test for the Journal Search API
+"""
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import (
+    Journal,
+    JournalTables,
+    Activities,
+    Intentions,
+    Happenings,
+    GratefulFor,
+    ActionItems,
+)
+
+
+def search_url(journal_id):
+    """
+    Returns the url for a journal search
+    """
+    return reverse("journal:journal-search", args=[journal_id])
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+def create_journal(
+    user,
+    journal_name="new journal",
+    journal_description="kvldsjfksd sdjflsjd lfjsldjf jdlfjd sfsdff",
+):
+    """
+    Create and return a journal
+    """
+    return Journal.objects.create(
+        journal_name=journal_name, journal_description=journal_description, user=user
+    )
+
+
+class PrivateJournalSearchApiTests(TestCase):
+    """
+    Private Tests for Journal Search Api
+    """
+
+    def setUp(self):
+        self.user_payload = {
+            "first_name": "Test",
+            "last_name": "User",
+            "email": "user@example.com",
+            "username": "testuser",
+            "password": "Awesomeuser123",
+        }
+        self.user = create_user(**self.user_payload)
+        self.journal = create_journal(self.user)
+        self.journal_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_result_ids(self, res):
+        return [activity["id"] for activity in res.data["results"]]
+
+    def test_search_matches_activity_name(self):
+        """
+        Test searching a journal matches the activity names
+        """
+        activity = Activities.objects.create(
+            name="Morning swimming", journal_table=self.journal_table
+        )
+        Activities.objects.create(name="Groceries", journal_table=self.journal_table)
+
+        res = self.client.get(search_url(self.journal.id), {"q": "swim"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_result_ids(res), [activity.id])
+
+    def test_search_matches_every_submodel(self):
+        """
+        Test searching a journal matches the text of every submodel
+        """
+        submodels = [
+            (Intentions, "intention"),
+            (Happenings, "happening"),
+            (GratefulFor, "grateful_for"),
+            (ActionItems, "action_item"),
+        ]
+        for model, field in submodels:
+            activity = Activities.objects.create(
+                name="Untitled", journal_table=self.journal_table
+            )
+            model.objects.create(**{"activity": activity, field: f"{field} hiking"})
+
+            res = self.client.get(search_url(self.journal.id), {"q": field})
+
+            self.assertEqual(self.get_result_ids(res), [activity.id])
+
+    def test_search_document_follows_submodel_updates_and_deletes(self):
+        """
+        Test the search results follow submodels being updated and deleted
+        """
+        activity = Activities.objects.create(
+            name="Untitled", journal_table=self.journal_table
+        )
+        intention = Intentions.objects.create(activity=activity, intention="")
+        intention.intention = "Learn guitar"
+        intention.save()
+
+        res = self.client.get(search_url(self.journal.id), {"q": "guitar"})
+        self.assertEqual(self.get_result_ids(res), [activity.id])
+
+        intention.delete()
+
+        res = self.client.get(search_url(self.journal.id), {"q": "guitar"})
+        self.assertEqual(self.get_result_ids(res), [])
+
+    @skipUnless(
+        connection.vendor == "postgresql", "other backends return unranked results"
+    )
+    def test_search_results_are_ranked(self):
+        """
+        Test activities matching the search text more often are ranked higher
+        """
+        weak_match = Activities.objects.create(
+            name="Reading", journal_table=self.journal_table
+        )
+        strong_match = Activities.objects.create(
+            name="Reading", journal_table=self.journal_table
+        )
+        Happenings.objects.create(activity=strong_match, happening="Reading a book")
+        Intentions.objects.create(activity=strong_match, intention="Keep reading")
+
+        res = self.client.get(search_url(self.journal.id), {"q": "reading"})
+
+        self.assertEqual(self.get_result_ids(res), [strong_match.id, weak_match.id])
+        self.assertGreater(
+            res.data["results"][0]["rank"], res.data["results"][1]["rank"]
+        )
+
+    def test_search_results_are_paginated(self):
+        """
+        Test the search results are paginated
+        """
+        for i in range(3):
+            Activities.objects.create(
+                name=f"Walk {i}", journal_table=self.journal_table
+            )
+
+        res = self.client.get(
+            search_url(self.journal.id), {"q": "walk", "page_size": 2}
+        )
+
+        self.assertEqual(res.data["count"], 3)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNotNone(res.data["next"])
+
+    def test_search_is_scoped_to_the_user_journal(self):
+        """
+        Test searching does not return activities of another user's journal
+        and searching another user's journal is not found
+        """
+        user_payload = self.user_payload.copy()
+        user_payload["email"] = "user2@example.com"
+        other_journal = create_journal(create_user(**user_payload))
+        other_table = JournalTables.objects.create(journal=other_journal)
+        Activities.objects.create(name="Cooking", journal_table=other_table)
+
+        res = self.client.get(search_url(self.journal.id), {"q": "cooking"})
+        self.assertEqual(self.get_result_ids(res), [])
+
+        res = self.client.get(search_url(other_journal.id), {"q": "cooking"})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_without_text_fails(self):
+        """
+        Test searching without a search text fails
+        """
+        res = self.client.get(search_url(self.journal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
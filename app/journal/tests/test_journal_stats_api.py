@@ -0,0 +1,219 @@
+"""
+Test for the Journal stats API
+"""
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase, SimpleTestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import date, timedelta
+from io import StringIO
+import numpy as np
+from core.models import (
+    Journal,
+    JournalTables,
+    Activities,
+    ActionItems,
+    Intentions,
+    Tags,
+)
+from journal import analytics
+from journal.rollups import rebuild_daily_rollups
+
+
+ACTIVITIES_URL = reverse("journal:activities-list")
+
+
+def stats_url(journal_id):
+    """
+    Return the journal stats url
+    """
+    return reverse("journal:journal-stats", args=[journal_id])
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+def create_tag(user, tag_name):
+    """
+    Create and return a tag
+    """
+    return Tags.objects.create(
+        tag_name=tag_name,
+        tag_user=user,
+        tag_color=Tags.Colors.RED,
+        tag_class=Tags.ColorsClasses.RED_CLASS,
+    )
+
+
+class AnalyticsTests(SimpleTestCase):
+    """
+    Tests for the vectorized analytics helpers
+    """
+
+    def test_get_streaks(self):
+        """
+        Test the longest and current streaks of active days
+        """
+        days = np.array([1, 2, 3, 5, 5, 9, 10])
+
+        self.assertEqual(
+            analytics.get_streaks(days, today=11),
+            {"longest": 3, "current": 2, "active_days": 6},
+        )
+        self.assertEqual(analytics.get_streaks(days, today=12)["current"], 0)
+        self.assertEqual(
+            analytics.get_streaks(np.array([], dtype=np.int64), today=1),
+            {"longest": 0, "current": 0, "active_days": 0},
+        )
+
+    def test_get_entries_per_weekday(self):
+        """
+        Test activities are counted on the weekday of their day
+        """
+        monday = date(2024, 1, 1).toordinal()
+        days = np.array([monday, monday + 2, monday + 7])
+
+        counts = analytics.get_entries_per_weekday(days, np.array([2, 1, 3]))
+
+        self.assertEqual(counts["monday"], 5)
+        self.assertEqual(counts["wednesday"], 1)
+        self.assertEqual(sum(counts.values()), 6)
+
+
+class PrivateJournalStatsApiTests(TestCase):
+    """
+    Private tests for the journal stats
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            first_name="Test",
+            last_name="User",
+            email="user@example.com",
+            username="testuser",
+            password="Awesomeuser123",
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        self.journal_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_get_journal_stats(self):
+        """
+        Test the stats of a journal's activities
+        """
+        work, family, health = [
+            create_tag(self.user, name) for name in ["Work", "Family", "Health"]
+        ]
+        tags = [[work, family], [work, family, health], [work], []]
+        activities = [
+            Activities.objects.create(journal_table=self.journal_table, name=str(i))
+            for i in range(4)
+        ]
+        for activity, activity_tags in zip(activities, tags):
+            activity.tags.add(*activity_tags)
+        ActionItems.objects.create(
+            activity=activities[0], action_item="a", checked=True
+        )
+        ActionItems.objects.create(activity=activities[0], action_item="b")
+        ActionItems.objects.create(
+            activity=activities[1], action_item="c", checked=True
+        )
+        ActionItems.objects.create(activity=activities[2], action_item="d")
+        Intentions.objects.create(activity=activities[0], intention="a")
+        Intentions.objects.create(activity=activities[3], intention="b")
+
+        res = self.client.get(stats_url(self.journal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["activities_count"], 4)
+        self.assertEqual(
+            res.data["streaks"], {"longest": 1, "current": 1, "active_days": 1}
+        )
+        weekday = analytics.WEEKDAYS[timezone.localdate().weekday()]
+        self.assertEqual(res.data["entries_per_weekday"][weekday], 4)
+        self.assertEqual(
+            res.data["submodels_per_activity"],
+            {"intentions": 0.5, "happenings": 0, "grateful_for": 0, "action_items": 1},
+        )
+        self.assertEqual(
+            res.data["action_items"],
+            {"total": 4, "checked": 2, "completion_rate": 0.5},
+        )
+        self.assertEqual(
+            res.data["tag_co_occurrence"][0], {"tags": [work.id, family.id], "count": 2}
+        )
+        self.assertEqual(len(res.data["tag_co_occurrence"]), 3)
+
+    def test_get_journal_stats_streak_over_days(self):
+        """
+        Test activities of consecutive days make a streak
+        """
+        now = timezone.now()
+        for days_ago in [0, 1, 2, 5]:
+            activity = Activities.objects.create(journal_table=self.journal_table)
+            Activities.objects.filter(id=activity.id).update(
+                created=now - timedelta(days=days_ago)
+            )
+        rebuild_daily_rollups([self.journal.id])
+
+        res = self.client.get(stats_url(self.journal.id))
+
+        self.assertEqual(
+            res.data["streaks"], {"longest": 3, "current": 3, "active_days": 4}
+        )
+
+    def test_stats_leave_out_empty_default_submodels(self):
+        """
+        Test the empty submodels an activity is created with are not counted
+        """
+        res = self.client.post(
+            ACTIVITIES_URL, {"name": "Walk", "journal_table": self.journal_table.id}
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.get(stats_url(self.journal.id))
+
+        self.assertEqual(res.data["activities_count"], 1)
+        self.assertEqual(
+            res.data["submodels_per_activity"],
+            {"intentions": 0, "happenings": 0, "grateful_for": 0, "action_items": 0},
+        )
+        self.assertEqual(
+            res.data["action_items"], {"total": 0, "checked": 0, "completion_rate": 0}
+        )
+
+    def test_get_empty_journal_stats(self):
+        """
+        Test the stats of a journal without activities
+        """
+        res = self.client.get(stats_url(self.journal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["activities_count"], 0)
+        self.assertEqual(res.data["tag_co_occurrence"], [])
+        self.assertEqual(res.data["action_items"]["completion_rate"], 0)
+
+    @skipUnless(connection.vendor == "postgresql", "generates PostgreSQL data")
+    def test_benchmark_stats_command(self):
+        """
+        Test the benchmark command computes the stats of a generated journal
+        and rolls it back
+        """
+        out = StringIO()
+
+        call_command("benchmark_stats", activities=200, tags=5, repeat=1, stdout=out)
+
+        self.assertIn("Activities: 200", out.getvalue())
+        self.assertFalse(Journal.objects.filter(journal_name="Benchmark").exists())
@@ -9,6 +9,7 @@ from rest_framework.test import APIClient
 from rest_framework import status
 from django.utils import timezone
 from datetime import datetime, timedelta
+import json
 from core.models import (
     Journal,
     JournalTables,
@@ -328,3 +329,56 @@ class PrivateJournalTableApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         journal_table.refresh_from_db()
         self.assertEqual(res.data["table_name"], payload["table_name"])
+
+    def test_retrieve_journal_table_streamed_matches_serialized_response(self):
+        """
+        Test retrieving a journal table with streaming enabled returns the same
+        payload as the non streamed response
+        """
+        journal_table = JournalTables.objects.create(
+            table_name="New Table", journal=self.journal
+        )
+        tag = Tags.objects.create(
+            tag_name="Daily",
+            tag_user=self.user,
+            tag_color=Tags.Colors.RED,
+            tag_class=Tags.ColorsClasses.RED_CLASS,
+        )
+        for i in range(3):
+            activity = Activities.objects.create(
+                name=f"activity {i}", journal_table=journal_table
+            )
+            activity.tags.add(tag)
+            Intentions.objects.create(activity=activity, intention=f"intention {i}")
+
+        url = detail_url(journal_table.id)
+        res = self.client.get(url)
+        streamed_res = self.client.get(url, {"stream": "true"})
+
+        self.assertEqual(streamed_res.status_code, status.HTTP_200_OK)
+        self.assertTrue(streamed_res.streaming)
+        streamed_data = json.loads(b"".join(streamed_res.streaming_content))
+        self.assertEqual(streamed_data, json.loads(res.content))
+        self.assertEqual(len(streamed_data["activities"]), 3)
+
+    def test_retrieve_empty_journal_table_streamed_returns_empty_activities(self):
+        """
+        Test streaming a journal table without activities returns valid json
+        """
+        journal_table = JournalTables.objects.create(
+            table_name="New Table", journal=self.journal
+        )
+
+        res = self.client.get(detail_url(journal_table.id), {"stream": "1"})
+
+        streamed_data = json.loads(b"".join(res.streaming_content))
+        self.assertEqual(
+            streamed_data,
+            {
+                "id": journal_table.id,
+                "table_name": "New Table",
+                "table_view": {},
+                "is_virtual": False,
+                "activities": [],
+            },
+        )
@@ -0,0 +1,266 @@
+"""
+Test for the Journal tables counters
+"""
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from io import StringIO
+from unittest.mock import patch
+from core.models import (
+    Journal,
+    JournalTables,
+    Activities,
+    ActionItems,
+)
+from journal.counters import apply_table_delta, reconcile_table_counters
+
+ACTIVITIES_URL = reverse("journal:activities-list")
+BATCH_DELETE_ACTIVITIES_URL = reverse("journal:activities-batch_delete_activities")
+JOURNAL_TABLES_URL = reverse("journal:journaltables-list")
+
+
+def activity_detail_url(activity_id):
+    """
+    Return the activity detail url
+    """
+    return reverse("journal:activities-detail", args=[activity_id])
+
+
+def journal_detail_url(journal_id):
+    """
+    Return the journal detail url
+    """
+    return reverse("journal:journal-detail", args=[journal_id])
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+def get_counters(table):
+    table.refresh_from_db()
+    return (table.activities_count, table.open_action_items_count)
+
+
+class PrivateJournalTableCountersApiTests(TestCase):
+    """
+    Private tests for the journal tables activities and open action items
+    counters
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            first_name="Test",
+            last_name="User",
+            email="user@example.com",
+            username="testuser",
+            password="Awesomeuser123",
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        self.all_table = JournalTables.objects.create(
+            journal=self.journal, table_name="All entries", is_virtual=True
+        )
+        self.daily_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+        self.personal_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Personal entries"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_create_activity_counts_in_table_and_virtual_table(self):
+        """
+        Test creating an activity counts it in its table and the virtual table
+        but not its empty default action item
+        """
+        res = self.client.post(
+            ACTIVITIES_URL, {"name": "Entry", "journal_table": self.daily_table.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(get_counters(self.daily_table), (1, 0))
+        self.assertEqual(get_counters(self.all_table), (1, 0))
+        self.assertEqual(get_counters(self.personal_table), (0, 0))
+
+    def test_action_items_update_open_counter(self):
+        """
+        Test named unchecked action items count as open until checked or
+        deleted
+        """
+        activity = Activities.objects.create(journal_table=self.daily_table)
+        first = ActionItems.objects.create(activity=activity, action_item="a")
+        second = ActionItems.objects.create(activity=activity, action_item="b")
+        ActionItems.objects.create(activity=activity, action_item="c", checked=True)
+        self.assertEqual(get_counters(self.daily_table), (1, 2))
+
+        res = self.client.patch(
+            activity_detail_url(activity.id),
+            {
+                "action_items": {
+                    "activity": activity.id,
+                    "update_action_item_checked": {
+                        "checked": True,
+                        "id": first.id,
+                        "update_checked": True,
+                        "type": "action_items",
+                    },
+                }
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_counters(self.daily_table), (1, 1))
+        second.delete()
+        self.assertEqual(get_counters(self.daily_table), (1, 0))
+        self.assertEqual(get_counters(self.all_table), (1, 0))
+
+    def test_move_activity_moves_counters(self):
+        """
+        Test moving an activity to another table moves its counts
+        """
+        activity = Activities.objects.create(journal_table=self.daily_table)
+        ActionItems.objects.create(activity=activity, action_item="a")
+
+        res = self.client.patch(
+            activity_detail_url(activity.id),
+            {"journal_table": self.personal_table.id},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_counters(self.daily_table), (0, 0))
+        self.assertEqual(get_counters(self.personal_table), (1, 1))
+        self.assertEqual(get_counters(self.all_table), (1, 1))
+
+    def test_failed_move_rolls_back_activity_and_counters(self):
+        """
+        Test a move failing between its counter updates leaves the activity
+        and the counters of both tables as they were
+        """
+        activity = Activities.objects.create(journal_table=self.daily_table)
+        ActionItems.objects.create(activity=activity, action_item="a")
+        applied = []
+
+        def fail_second_delta(*args, **kwargs):
+            if applied:
+                raise RuntimeError("counter update failed")
+            applied.append(args)
+            return apply_table_delta(*args, **kwargs)
+
+        with patch("journal.signals.apply_table_delta", fail_second_delta):
+            res = self.client.patch(
+                activity_detail_url(activity.id),
+                {"journal_table": self.personal_table.id},
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        activity.refresh_from_db()
+        self.assertEqual(activity.journal_table, self.daily_table)
+        self.assertEqual(get_counters(self.daily_table), (1, 1))
+        self.assertEqual(get_counters(self.personal_table), (0, 0))
+
+    def test_delete_activities_uncounts_them(self):
+        """
+        Test deleting and batch deleting activities uncounts them
+        """
+        activities = [
+            Activities.objects.create(journal_table=self.daily_table) for _ in range(3)
+        ]
+        for activity in activities:
+            ActionItems.objects.create(activity=activity, action_item="a")
+
+        res = self.client.delete(activity_detail_url(activities[0].id))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(get_counters(self.daily_table), (2, 2))
+
+        res = self.client.delete(
+            BATCH_DELETE_ACTIVITIES_URL,
+            {"delete_list": [activity.id for activity in activities[1:]]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(get_counters(self.daily_table), (0, 0))
+        self.assertEqual(get_counters(self.all_table), (0, 0))
+
+    def test_duplicate_and_rename_table_keep_counters(self):
+        """
+        Test a duplicated table counts its copied activities and renaming a
+        table does not overwrite its counters
+        """
+        activity = Activities.objects.create(journal_table=self.daily_table)
+        ActionItems.objects.create(activity=activity, action_item="a")
+        stale_table = JournalTables.objects.get(id=self.daily_table.id)
+        Activities.objects.create(journal_table=self.daily_table)
+
+        stale_table.table_name = "Renamed"
+        stale_table.save()
+        self.assertEqual(get_counters(self.daily_table), (2, 1))
+
+        res = self.client.post(
+            JOURNAL_TABLES_URL,
+            {
+                "journal": self.journal.id,
+                "journal_table": self.daily_table.id,
+                "duplicate": True,
+                "table_name": "",
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        duplicate = JournalTables.objects.exclude(
+            id__in=[self.all_table.id, self.daily_table.id, self.personal_table.id]
+        ).get()
+        self.assertEqual(get_counters(duplicate), (2, 1))
+        self.assertEqual(get_counters(self.all_table), (4, 2))
+
+    def test_delete_table_reconciles_virtual_table(self):
+        """
+        Test deleting a table removes its activities from the virtual table
+        """
+        Activities.objects.create(journal_table=self.daily_table)
+        Activities.objects.create(journal_table=self.personal_table)
+
+        self.daily_table.delete()
+
+        self.assertEqual(get_counters(self.all_table), (1, 0))
+
+    def test_reconcile_counters_command_repairs_drift(self):
+        """
+        Test the reconcile command recomputes counters that drifted
+        """
+        activity = Activities.objects.create(journal_table=self.daily_table)
+        ActionItems.objects.create(activity=activity, action_item="a")
+        JournalTables.objects.filter(journal=self.journal).update(
+            activities_count=7, open_action_items_count=3
+        )
+        out = StringIO()
+
+        call_command("reconcile_counters", journal_ids=[self.journal.id], stdout=out)
+
+        self.assertIn("Repaired the counters of 3 tables", out.getvalue())
+        self.assertEqual(get_counters(self.daily_table), (1, 1))
+        self.assertEqual(get_counters(self.personal_table), (0, 0))
+        self.assertEqual(get_counters(self.all_table), (1, 1))
+        self.assertEqual(reconcile_table_counters(), 0)
+
+    def test_journal_lists_table_counters(self):
+        """
+        Test the journal response includes its tables counters
+        """
+        Activities.objects.create(journal_table=self.daily_table)
+
+        res = self.client.get(journal_detail_url(self.journal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tables = {table["id"]: table for table in res.data["journal_tables"]}
+        self.assertEqual(tables[self.daily_table.id]["activities_count"], 1)
+        self.assertEqual(tables[self.all_table.id]["activities_count"], 1)
+        self.assertEqual(tables[self.personal_table.id]["open_action_items_count"], 0)
@@ -0,0 +1,238 @@
+"""
+Query plan regression tests for the queries of the journal endpoints
+"""
+import json
+from datetime import timedelta
+from unittest import skipUnless
+from urllib.parse import quote
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.models import (
+    Journal,
+    JournalTables,
+    JournalDailyRollups,
+    Activities,
+    Intentions,
+    Happenings,
+    GratefulFor,
+    ActionItems,
+    Tags,
+)
+
+ActivitiesTags = Activities.tags.through
+
+SUBMODELS = [Intentions, Happenings, GratefulFor, ActionItems]
+SUBMODEL_FIELDS = {
+    Intentions: "intention",
+    Happenings: "happening",
+    GratefulFor: "grateful_for",
+    ActionItems: "action_item",
+}
+
+# the tables growing with the journals, small lookup tables such as the
+# users' may be read whole
+JOURNAL_TABLES = {
+    model._meta.db_table
+    for model in [
+        JournalTables,
+        JournalDailyRollups,
+        Activities,
+        ActivitiesTags,
+        Tags,
+        *SUBMODELS,
+    ]
+}
+
+# the full scans and the joins reading their inner side whole, which the
+# planner prefers on a seed this small
+DISABLED_PLAN_TYPES = ["enable_seqscan", "enable_hashjoin", "enable_mergejoin"]
+
+USERS_COUNT = 20
+TABLES_PER_JOURNAL = 3
+ACTIVITIES_PER_TABLE = 50
+
+
+def get_full_scans(plan):
+    """
+    Return the relations an EXPLAIN json plan reads whole, with a sequential
+    scan or an index scan without an index condition
+    """
+    scanned = []
+    node_type = plan.get("Node Type")
+    if node_type == "Seq Scan" or (
+        node_type in ["Index Scan", "Index Only Scan"] and "Index Cond" not in plan
+    ):
+        scanned.append(plan.get("Relation Name"))
+    for subplan in plan.get("Plans", []):
+        scanned += get_full_scans(subplan)
+    return scanned
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN JSON plans of PostgreSQL")
+class QueryPlansTests(TestCase):
+    """
+    Tests the queries the journal endpoints run are served by an index, the
+    queries are captured while calling the endpoints and explained. Sequential
+    scans, hash and merge joins are disabled so the planner only falls back to
+    a full scan when no index can serve the query, whatever the seed size.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        users = [
+            get_user_model().objects.create_user(
+                email=f"user{i}@example.com", username=f"user{i}", password=None
+            )
+            for i in range(USERS_COUNT)
+        ]
+        activities = []
+        for user in users:
+            journal = Journal.objects.create(user=user)
+            JournalDailyRollups.objects.bulk_create(
+                JournalDailyRollups(journal=journal, day=(now - timedelta(days=i)))
+                for i in range(30)
+            )
+            for table_index in range(TABLES_PER_JOURNAL):
+                table = JournalTables.objects.create(
+                    journal=journal, table_name=f"Table {table_index}"
+                )
+                activities += [
+                    Activities(
+                        journal_table=table,
+                        owner=user,
+                        name=f"Activity {i}",
+                        ordering=i,
+                    )
+                    for i in range(ACTIVITIES_PER_TABLE)
+                ]
+            Tags.objects.bulk_create(
+                Tags(
+                    tag_user=user,
+                    tag_name=f"Tag {i}",
+                    tag_color=Tags.Colors.GRAY,
+                    tag_class=Tags.ColorsClasses.GRAY_CLASS,
+                )
+                for i in range(10)
+            )
+        activities = Activities.objects.bulk_create(activities)
+        for submodel in SUBMODELS:
+            submodel.objects.bulk_create(
+                submodel(
+                    activity=activity,
+                    owner_id=activity.owner_id,
+                    ordering=1,
+                    **{SUBMODEL_FIELDS[submodel]: f"Item {activity.id}"},
+                )
+                for activity in activities
+            )
+        tags = {}
+        for tag in Tags.objects.all():
+            tags.setdefault(tag.tag_user_id, []).append(tag.id)
+        ActivitiesTags.objects.bulk_create(
+            ActivitiesTags(activities_id=activity.id, tags_id=tag_id)
+            for activity in activities
+            for tag_id in tags[activity.owner_id][: activity.ordering % 3]
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        cls.user = users[0]
+        cls.journal = Journal.objects.get(user=cls.user)
+        cls.table = JournalTables.objects.filter(journal=cls.journal).first()
+        cls.activity_ids = list(
+            Activities.objects.filter(journal_table=cls.table).values_list(
+                "id", flat=True
+            )[:50]
+        )
+        cls.tag = Tags.objects.filter(tag_user=cls.user).first()
+        cls.virtual_table = JournalTables.objects.create(
+            journal=cls.journal, table_name="All entries", is_virtual=True
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        with connection.cursor() as cursor:
+            for plan_type in DISABLED_PLAN_TYPES:
+                cursor.execute(f"SET LOCAL {plan_type} = off")
+
+    def get_requests(self):
+        """
+        Return the urls of the read endpoints, with their filters, search and
+        export
+        """
+        journal_id = self.journal.id
+        table_id = self.table.id
+        week_ago = (timezone.now() - timedelta(days=7)).isoformat()
+        activities_url = reverse("journal:activities-list")
+        requests = {
+            "journal detail": reverse("journal:journal-detail", args=[journal_id]),
+            "journal export": reverse("journal:journal-export", args=[journal_id]),
+            "journal search": reverse("journal:journal-search", args=[journal_id])
+            + "?q=activity",
+            "journal calendar": reverse("journal:journal-calendar", args=[journal_id]),
+            "journal stats": reverse("journal:journal-stats", args=[journal_id]),
+            "journal tables": reverse("journal:journaltables-list"),
+            "table detail": reverse("journal:journaltables-detail", args=[table_id])
+            + "?page=1",
+            "virtual table detail": reverse(
+                "journal:journaltables-detail", args=[self.virtual_table.id]
+            )
+            + "?page=1",
+            "tags list": reverse("journal:tags-list"),
+            "activities list": activities_url,
+            "activities detail": reverse(
+                "journal:activities-detail", args=[self.activity_ids[0]]
+            ),
+            "activities filtered by table and created": activities_url
+            + f"?journal_table={table_id}&created_after={quote(week_ago)}",
+            "activities filtered by created": activities_url
+            + f"?created_after={quote(week_ago)}",
+            "activities filtered by tags": activities_url
+            + f"?tags={self.tag.id}&tags_match=all",
+            "activities filtered by checked": activities_url + "?checked=false",
+        }
+        for name in ["intentions", "happenings", "gratefulfor", "actionitems"]:
+            requests[f"{name} list"] = reverse(f"journal:{name}-list")
+        return requests
+
+    def capture_queries(self, url):
+        """
+        Return the SELECT queries the endpoint at `url` runs, with those run
+        while a streamed response is consumed
+        """
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+            if res.streaming:
+                b"".join(res.streaming_content)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, url)
+        return [query["sql"] for query in queries if query["sql"].startswith("SELECT")]
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+        return (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+    def test_endpoint_queries_use_an_index(self):
+        """
+        Test none of the queries the read endpoints run reads a whole journal
+        table
+        """
+        for name, url in self.get_requests().items():
+            for sql in self.capture_queries(url):
+                with self.subTest(endpoint=name, sql=sql):
+                    full_scans = JOURNAL_TABLES.intersection(
+                        get_full_scans(self.explain(sql))
+                    )
+                    self.assertFalse(
+                        full_scans, f"{name} reads the whole {full_scans}:\n{sql}"
+                    )
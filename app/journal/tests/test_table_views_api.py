@@ -0,0 +1,371 @@
+"""
+Test for the Journal Table views
+"""
+from django.test import TestCase, SimpleTestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import timedelta
+import json
+from core.models import Journal, JournalTables, Activities, ActionItems, Tags
+from journal import table_views
+
+
+def detail_url(journal_table_id):
+    """
+    Return the journal table detail url
+    """
+    return reverse("journal:journaltables-detail", args=[journal_table_id])
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+def create_tag(user, tag_name):
+    """
+    Create and return a tag
+    """
+    return Tags.objects.create(
+        tag_name=tag_name,
+        tag_user=user,
+        tag_color=Tags.Colors.RED,
+        tag_class=Tags.ColorsClasses.RED_CLASS,
+    )
+
+
+class CompileTableViewTests(SimpleTestCase):
+    """
+    Tests for compiling table view specs
+    """
+
+    def test_compile_sorts_appends_id(self):
+        """
+        Test sorted views are ordered by id last to stay stable
+        """
+        compiled = table_views.compile_view_spec(
+            {"sorts": [{"field": "created", "direction": "desc"}]}
+        )
+
+        self.assertEqual(compiled.order_by, ["-created", "id"])
+
+    def test_compile_invalid_specs_fails(self):
+        """
+        Test compiling invalid specs raises a validation error
+        """
+        for spec in [
+            [],
+            {"filters": [{"field": "journal", "op": "eq", "value": 1}]},
+            {"filters": [{"field": "name", "op": "gte", "value": "run"}]},
+            {"filters": [{"field": "tags", "op": "any", "value": "1"}]},
+            {"filters": [{"field": "created", "op": "gte", "value": "today"}]},
+            {"sorts": [{"field": "journal_table"}]},
+            {"sorts": [{"field": "name", "direction": "up"}]},
+            {"group_by": "name"},
+        ]:
+            with self.assertRaises(ValidationError):
+                table_views.compile_view_spec(spec)
+
+    def test_compiled_views_are_cached_by_spec(self):
+        """
+        Test equal specs share one compiled view and the cache is bounded
+        """
+        table_views._compiled_views.clear()
+        spec = {"sorts": [{"field": "name"}], "group_by": "tags"}
+
+        compiled = table_views.get_compiled_view(spec)
+
+        self.assertIs(
+            table_views.get_compiled_view(dict(reversed(spec.items()))), compiled
+        )
+        for i in range(table_views.TABLE_VIEW_CACHE_SIZE):
+            table_views.get_compiled_view(
+                {"filters": [{"field": "name", "op": "eq", "value": str(i)}]}
+            )
+        self.assertEqual(
+            len(table_views._compiled_views), table_views.TABLE_VIEW_CACHE_SIZE
+        )
+        self.assertIsNot(table_views.get_compiled_view(spec), compiled)
+
+
+class PrivateTableViewsApiTests(TestCase):
+    """
+    Private tests for retrieving journal tables through their view
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            first_name="Test",
+            last_name="User",
+            email="user@example.com",
+            username="testuser",
+            password="Awesomeuser123",
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        self.journal_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+        self.work_tag = create_tag(self.user, "Work")
+        self.client.force_authenticate(self.user)
+
+    def create_activity(self, name, created=None, tags=()):
+        activity = Activities.objects.create(
+            name=name, journal_table=self.journal_table
+        )
+        if created is not None:
+            Activities.objects.filter(id=activity.id).update(created=created)
+        activity.tags.add(*tags)
+        return activity
+
+    def test_update_table_view(self):
+        """
+        Test saving a valid view on a table
+        """
+        spec = {
+            "filters": [{"field": "tags", "op": "any", "value": [self.work_tag.id]}],
+            "sorts": [{"field": "name"}],
+        }
+
+        res = self.client.patch(
+            detail_url(self.journal_table.id), {"table_view": spec}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.journal_table.refresh_from_db()
+        self.assertEqual(self.journal_table.table_view, spec)
+
+    def test_update_invalid_table_view_fails(self):
+        """
+        Test saving an invalid view is rejected
+        """
+        spec = {"filters": [{"field": "name", "op": "like", "value": "run"}]}
+
+        res = self.client.patch(
+            detail_url(self.journal_table.id), {"table_view": spec}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.journal_table.refresh_from_db()
+        self.assertEqual(self.journal_table.table_view, {})
+
+    def test_retrieve_applies_table_view(self):
+        """
+        Test only the activities matching the view are returned in its order
+        """
+        now = timezone.now()
+        older = self.create_activity("run", now - timedelta(days=2), [self.work_tag])
+        newer = self.create_activity("walk", now - timedelta(days=1), [self.work_tag])
+        self.create_activity("untagged")
+        old = self.create_activity("old", now - timedelta(days=30), [self.work_tag])
+        checked = ActionItems.objects.create(activity=older, checked=True)
+        self.journal_table.table_view = {
+            "filters": [
+                {"field": "tags", "op": "all", "value": [self.work_tag.id]},
+                {
+                    "field": "created",
+                    "op": "gte",
+                    "value": (now - timedelta(days=7)).isoformat(),
+                },
+            ],
+            "sorts": [{"field": "created", "direction": "desc"}],
+        }
+        self.journal_table.save()
+
+        res = self.client.get(detail_url(self.journal_table.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [a["id"] for a in res.data["activities"]], [newer.id, older.id]
+        )
+        self.assertNotIn(old.id, [a["id"] for a in res.data["activities"]])
+        self.assertEqual(res.data["activities"][1]["action_items"][0]["id"], checked.id)
+
+    def test_retrieve_groups_activities_by_tags(self):
+        """
+        Test views grouped by tags return the activity ids of each tag
+        """
+        family_tag = create_tag(self.user, "Family")
+        work = self.create_activity("work", tags=[self.work_tag])
+        both = self.create_activity("both", tags=[self.work_tag, family_tag])
+        untagged = self.create_activity("untagged")
+        self.journal_table.table_view = {
+            "sorts": [{"field": "name"}],
+            "group_by": "tags",
+        }
+        self.journal_table.save()
+
+        res = self.client.get(detail_url(self.journal_table.id))
+
+        groups = {group["tag"]: group["activities"] for group in res.data["groups"]}
+        self.assertEqual(groups[self.work_tag.id], [both.id, work.id])
+        self.assertEqual(groups[family_tag.id], [both.id])
+        self.assertEqual(groups[None], [untagged.id])
+
+    def test_stream_retrieve_groups_activities_by_tags(self):
+        """
+        Test streaming a view grouped by tags emits the groups after the
+        activities
+        """
+        work = self.create_activity("work", tags=[self.work_tag])
+        untagged = self.create_activity("untagged")
+        self.journal_table.table_view = {
+            "sorts": [{"field": "name"}],
+            "group_by": "tags",
+        }
+        self.journal_table.save()
+
+        res = self.client.get(detail_url(self.journal_table.id), {"stream": "true"})
+
+        content = b"".join(res.streaming_content)
+        data = json.loads(content)
+        self.assertEqual([a["id"] for a in data["activities"]], [untagged.id, work.id])
+        self.assertEqual(
+            data["groups"],
+            [
+                {"tag": None, "activities": [untagged.id]},
+                {"tag": self.work_tag.id, "activities": [work.id]},
+            ],
+        )
+        self.assertLess(content.index(b'"activities"'), content.index(b'"groups"'))
+
+    def test_stream_retrieve_applies_table_view(self):
+        """
+        Test streaming a table returns the activities matching its view
+        """
+        self.create_activity("run")
+        walk = self.create_activity("walk")
+        self.journal_table.table_view = {
+            "filters": [{"field": "name", "op": "starts_with", "value": "wa"}]
+        }
+        self.journal_table.save()
+
+        res = self.client.get(detail_url(self.journal_table.id), {"stream": "true"})
+
+        data = json.loads(b"".join(res.streaming_content))
+        self.assertEqual([a["id"] for a in data["activities"]], [walk.id])
+        self.assertEqual(data["table_view"], self.journal_table.table_view)
+
+
+class PrivateVirtualTableApiTests(TestCase):
+    """
+    Private tests for retrieving virtual journal tables
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            first_name="Test",
+            last_name="User",
+            email="user@example.com",
+            username="testuser",
+            password="Awesomeuser123",
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        self.all_entries = JournalTables.objects.create(
+            journal=self.journal, table_name="All entries", is_virtual=True
+        )
+        self.daily_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+        self.personal_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Personal entries"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_retrieve_virtual_table_returns_activities_of_every_table(self):
+        """
+        Test a virtual table returns the activities of all the journal's tables
+        without storing them
+        """
+        stored = Activities.objects.create(name="a", journal_table=self.all_entries)
+        daily = Activities.objects.create(name="b", journal_table=self.daily_table)
+        personal = Activities.objects.create(
+            name="c", journal_table=self.personal_table
+        )
+        other_user = create_user(
+            first_name="Other",
+            last_name="User",
+            email="user2@example.com",
+            username="otheruser",
+            password="Awesomeuser123",
+        )
+        other_table = JournalTables.objects.create(
+            journal=Journal.objects.create(user=other_user), is_virtual=False
+        )
+        Activities.objects.create(name="d", journal_table=other_table)
+
+        res = self.client.get(detail_url(self.all_entries.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data["is_virtual"])
+        self.assertEqual(
+            [a["id"] for a in res.data["activities"]],
+            [stored.id, daily.id, personal.id],
+        )
+        self.assertEqual(Activities.objects.count(), 4)
+
+    def test_retrieve_virtual_table_applies_table_view(self):
+        """
+        Test the view of a virtual table applies across all the tables
+        """
+        Activities.objects.create(name="run", journal_table=self.daily_table)
+        walk = Activities.objects.create(name="walk", journal_table=self.personal_table)
+        self.all_entries.table_view = {
+            "filters": [{"field": "name", "op": "eq", "value": "walk"}]
+        }
+        self.all_entries.save()
+
+        res = self.client.get(detail_url(self.all_entries.id))
+
+        self.assertEqual([a["id"] for a in res.data["activities"]], [walk.id])
+
+    def test_retrieve_virtual_table_paginated(self):
+        """
+        Test the activities of a virtual table are paginated when requested
+        """
+        activities = [
+            Activities.objects.create(
+                name=f"entry {i}",
+                journal_table=[self.daily_table, self.personal_table][i % 2],
+            )
+            for i in range(5)
+        ]
+
+        res = self.client.get(detail_url(self.all_entries.id), {"page_size": 2})
+        second_page = self.client.get(
+            detail_url(self.all_entries.id), {"page_size": 2, "page": 2}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 5)
+        self.assertIsNotNone(res.data["next"])
+        self.assertEqual(res.data["table_name"], "All entries")
+        self.assertEqual(
+            [a["id"] for a in res.data["activities"]],
+            [activities[0].id, activities[1].id],
+        )
+        self.assertEqual(
+            [a["id"] for a in second_page.data["activities"]],
+            [activities[2].id, activities[3].id],
+        )
+
+    def test_stream_virtual_table(self):
+        """
+        Test streaming a virtual table returns the activities of every table
+        """
+        daily = Activities.objects.create(name="a", journal_table=self.daily_table)
+        personal = Activities.objects.create(
+            name="b", journal_table=self.personal_table
+        )
+
+        res = self.client.get(detail_url(self.all_entries.id), {"stream": "true"})
+
+        data = json.loads(b"".join(res.streaming_content))
+        self.assertEqual([a["id"] for a in data["activities"]], [daily.id, personal.id])
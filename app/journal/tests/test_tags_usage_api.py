@@ -0,0 +1,221 @@
+"""
+Test for the Tags usage counts
+"""
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from io import StringIO
+from core.models import (
+    Journal,
+    JournalTables,
+    Activities,
+    Tags,
+)
+from journal.counters import reconcile_tags_usage
+
+TAGS_URL = reverse("journal:tags-list")
+BATCH_UPDATE_ACTIVITIES_URL = reverse("journal:activities-batch_update_activities")
+BATCH_DELETE_ACTIVITIES_URL = reverse("journal:activities-batch_delete_activities")
+BATCH_DUPLICATE_ACTIVITIES_URL = reverse(
+    "journal:activities-batch_duplicate_activities"
+)
+
+
+def create_user(**params):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(**params)
+
+
+def create_tag(user, tag_name):
+    """
+    Create and return a tag
+    """
+    return Tags.objects.create(
+        tag_name=tag_name,
+        tag_user=user,
+        tag_color=Tags.Colors.RED,
+        tag_class=Tags.ColorsClasses.RED_CLASS,
+    )
+
+
+def get_usage(*tags):
+    return [Tags.objects.get(id=tag.id).usage_count for tag in tags]
+
+
+class PrivateTagsUsageApiTests(TestCase):
+    """
+    Private tests for the tags usage counts
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            first_name="Test",
+            last_name="User",
+            email="user@example.com",
+            username="testuser",
+            password="Awesomeuser123",
+        )
+        self.journal = Journal.objects.create(user=self.user)
+        self.journal_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Daily entries"
+        )
+        self.work = create_tag(self.user, "Work")
+        self.family = create_tag(self.user, "Family")
+        self.health = create_tag(self.user, "Health")
+        self.client.force_authenticate(self.user)
+
+    def create_activities(self, count):
+        return [
+            Activities.objects.create(journal_table=self.journal_table, name=str(i))
+            for i in range(count)
+        ]
+
+    def test_assignments_update_usage(self):
+        """
+        Test adding, removing and clearing tags from either side updates the
+        usage counts
+        """
+        first, second = self.create_activities(2)
+
+        first.tags.add(self.work, self.family)
+        first.tags.add(self.work)
+        self.work.activities.add(second)
+        self.assertEqual(get_usage(self.work, self.family, self.health), [2, 1, 0])
+
+        first.tags.remove(self.work, self.health)
+        self.assertEqual(get_usage(self.work, self.family, self.health), [1, 1, 0])
+
+        first.tags.set([self.health])
+        self.assertEqual(get_usage(self.work, self.family, self.health), [1, 0, 1])
+
+        self.work.activities.clear()
+        self.assertEqual(get_usage(self.work, self.family, self.health), [0, 0, 1])
+
+    def test_batch_update_and_duplicate_update_usage(self):
+        """
+        Test the batch update and duplicate paths count the tags they assign
+        """
+        activities = self.create_activities(3)
+        activities[0].tags.add(self.work)
+
+        res = self.client.patch(
+            BATCH_UPDATE_ACTIVITIES_URL,
+            {
+                "activities_list": [
+                    {
+                        "ids": [activity.id for activity in activities],
+                        "tags": [self.family.id, self.health.id],
+                    }
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_usage(self.work, self.family, self.health), [0, 3, 3])
+
+        res = self.client.post(
+            BATCH_DUPLICATE_ACTIVITIES_URL,
+            {"duplicate_list": [{"ids": [activities[0].id, activities[1].id]}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(get_usage(self.work, self.family, self.health), [0, 5, 5])
+
+    def test_deletes_update_usage(self):
+        """
+        Test deleting activities, tables and journals uncounts their tags
+        """
+        activities = self.create_activities(3)
+        for activity in activities:
+            activity.tags.add(self.work, self.family)
+
+        res = self.client.delete(
+            BATCH_DELETE_ACTIVITIES_URL,
+            {"delete_list": [activities[0].id]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(get_usage(self.work, self.family), [2, 2])
+
+        other_table = JournalTables.objects.create(
+            journal=self.journal, table_name="Personal entries"
+        )
+        Activities.objects.create(journal_table=other_table).tags.add(self.work)
+        self.journal_table.delete()
+        self.assertEqual(get_usage(self.work, self.family), [1, 0])
+
+        self.journal.delete()
+        self.assertEqual(get_usage(self.work, self.family), [0, 0])
+
+    def test_saving_tag_keeps_usage(self):
+        """
+        Test updating a tag does not overwrite its usage count
+        """
+        activity = self.create_activities(1)[0]
+        stale_tag = Tags.objects.get(id=self.work.id)
+        activity.tags.add(self.work)
+
+        res = self.client.patch(
+            reverse("journal:tags-detail", args=[self.work.id]),
+            {
+                "tag_name": "Office",
+                "tag_color": Tags.Colors.RED,
+                "tag_class": Tags.ColorsClasses.RED_CLASS,
+            },
+        )
+        stale_tag.tag_name = "Work"
+        stale_tag.save()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["usage_count"], 1)
+        self.assertEqual(get_usage(self.work), [1])
+
+    def test_list_tags_ordered_by_usage(self):
+        """
+        Test listing the tags by descending and ascending usage
+        """
+        activities = self.create_activities(2)
+        for activity in activities:
+            activity.tags.add(self.family)
+        activities[0].tags.add(self.health)
+
+        res = self.client.get(TAGS_URL, {"ordering": "-usage"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag["id"] for tag in res.data],
+            [self.family.id, self.health.id, self.work.id],
+        )
+        self.assertEqual([tag["usage_count"] for tag in res.data], [2, 1, 0])
+
+        res = self.client.get(TAGS_URL, {"ordering": "usage"})
+        self.assertEqual(res.data[0]["id"], self.work.id)
+
+    def test_list_tags_invalid_ordering(self):
+        """
+        Test an unknown ordering is rejected
+        """
+        res = self.client.get(TAGS_URL, {"ordering": "tag_name"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reconcile_counters_command_repairs_usage(self):
+        """
+        Test the reconcile command recomputes drifted usage counts
+        """
+        activity = self.create_activities(1)[0]
+        activity.tags.add(self.work)
+        Tags.objects.filter(tag_user=self.user).update(usage_count=5)
+        out = StringIO()
+
+        call_command("reconcile_counters", stdout=out)
+
+        self.assertIn("Repaired the usage counts of 3 tags", out.getvalue())
+        self.assertEqual(get_usage(self.work, self.family, self.health), [1, 0, 0])
+        self.assertEqual(reconcile_tags_usage([self.user.id]), 0)
@@ -6,16 +6,22 @@ from drf_spectacular.utils import (
     extend_schema,
     extend_schema_view,
     OpenApiExample,
+    OpenApiParameter,
     OpenApiResponse,
 )
+from drf_spectacular.types import OpenApiTypes
 from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
+from datetime import date
 from core.models import (
     Journal,
     JournalTables,
@@ -25,6 +31,7 @@ from core.models import (
     ActionItems,
     Happenings,
     GratefulFor,
+    JournalDailyRollups,
 )
 from journal import serializers
 from journal.mixins import (
@@ -36,8 +43,101 @@ from journal.mixins import (
     BatchSubmodelRouteMixin,
 )
 from journal.exceptions import RequestDenied
+from journal.exports import EXPORT_FORMATS
+from journal.streaming import (
+    is_stream_requested,
+    stream_json_array,
+    stream_json_object_with_array,
+    StreamingJSONResponse,
+)
+from journal.config import SUBMODELS_LIST
+from journal.pagination import SearchResultsPagination, TableActivitiesPagination
+from journal.filters import ActivitiesFilterBackend, TagsOrderingFilterBackend
+from journal.table_views import (
+    TagGroups,
+    get_compiled_view,
+    group_activities_by_tags,
+)
+from journal.search import search_activities
+from journal.analytics import get_journal_stats
+from journal.autocomplete import get_completions
+from journal.config import AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_MAX_LIMIT
+
+
+AUTOCOMPLETE_PARAMETERS = [
+    OpenApiParameter(
+        "q", OpenApiTypes.STR, required=True, description="The text to complete"
+    ),
+    OpenApiParameter(
+        "limit",
+        OpenApiTypes.INT,
+        description=f"Maximum number of results, defaults to {AUTOCOMPLETE_LIMIT}",
+    ),
+]
+
+
+def get_autocomplete_params(request):
+    """
+    Validate and return the autocomplete text and limit of a request
+    """
+    text = request.query_params.get("q", "").strip()
+    if not text:
+        raise ValidationError("The autocomplete text `q` was not provided")
+
+    try:
+        limit = int(request.query_params.get("limit", AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        raise ValidationError("The limit should be a number")
 
+    return text, max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
 
+
+ACTIVITY_RELATIONS = ["tags", *SUBMODELS_LIST]
+TABLE_ACTIVITY_RELATIONS = [
+    f"activities__{relation}" for relation in ACTIVITY_RELATIONS
+]
+
+
+@extend_schema_view(
+    export=extend_schema(
+        description="Endpoint for streaming an export of a journal's tables, activities, submodels and tags as NDJSON or CSV",
+        parameters=[
+            OpenApiParameter(
+                "file_type",
+                OpenApiTypes.STR,
+                enum=list(EXPORT_FORMATS.keys()),
+                description="The export format, defaults to ndjson",
+            )
+        ],
+        responses={(200, "application/x-ndjson"): OpenApiTypes.STR},
+    ),
+    search=extend_schema(
+        description="Endpoint for searching the activities of a journal by their name and submodels, results are ranked by relevance",
+        parameters=[
+            OpenApiParameter(
+                "q", OpenApiTypes.STR, required=True, description="The search text"
+            ),
+            OpenApiParameter("page", OpenApiTypes.INT),
+            OpenApiParameter("page_size", OpenApiTypes.INT),
+        ],
+        responses=serializers.ActivitiesSearchSerializer(many=True),
+    ),
+    calendar=extend_schema(
+        description="Endpoint for the number of activities and action items of a journal per day of a year, days without activities are omitted",
+        parameters=[
+            OpenApiParameter(
+                "year",
+                OpenApiTypes.INT,
+                description="The calendar year, defaults to the current year",
+            )
+        ],
+        responses=serializers.JournalDailyRollupsSerializer(many=True),
+    ),
+    stats=extend_schema(
+        description="Endpoint for the analytics of a journal: day streaks, entries per weekday, average submodels per activity, action items completion rate and the most frequent tag pairs",
+        responses={200: OpenApiTypes.OBJECT},
+    ),
+)
 class JournalViewSet(viewsets.ModelViewSet):
     """
     Viewset for creating journal
@@ -56,10 +156,76 @@ class JournalViewSet(viewsets.ModelViewSet):
         queryset = self.queryset
         return queryset.filter(user=self.request.user)
 
+    @transaction.atomic
     def perform_create(self, serializer):
         if self.request.user.is_authenticated:
             serializer.save(user=self.request.user)
 
+    @action(detail=True, methods=["GET"], url_name="export")
+    def export(self, request, *args, **kwargs):
+        """
+        Stream the journal's content without loading it all in memory
+        """
+        journal = self.get_object()
+        file_type = request.query_params.get("file_type", "ndjson")
+
+        if file_type not in EXPORT_FORMATS:
+            raise ValidationError(
+                f"Invalid file_type, expected one of {', '.join(EXPORT_FORMATS)}"
+            )
+
+        stream, content_type = EXPORT_FORMATS[file_type]
+        response = StreamingHttpResponse(stream(journal), content_type=content_type)
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="journal-{journal.id}.{file_type}"'
+        return response
+
+    @action(detail=True, methods=["GET"], url_name="search")
+    def search(self, request, *args, **kwargs):
+        """
+        Return the journal's activities matching the search text
+        """
+        journal = self.get_object()
+        search_text = request.query_params.get("q", "").strip()
+
+        if not search_text:
+            raise ValidationError("The search text `q` was not provided")
+
+        queryset = search_activities(
+            Activities.objects.filter(journal_table__journal=journal), search_text
+        )
+        paginator = SearchResultsPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = serializers.ActivitiesSearchSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["GET"], url_name="calendar")
+    def calendar(self, request, *args, **kwargs):
+        """
+        Return the journal's daily rollups of a year
+        """
+        journal = self.get_object()
+        try:
+            year = int(request.query_params.get("year", timezone.localdate().year))
+            start, end = date(year, 1, 1), date(year, 12, 31)
+        except ValueError:
+            raise ValidationError("The year should be a valid year number")
+
+        rollups = JournalDailyRollups.objects.filter(
+            journal=journal, day__range=(start, end)
+        )
+        serializer = serializers.JournalDailyRollupsSerializer(rollups, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["GET"], url_name="stats")
+    def stats(self, request, *args, **kwargs):
+        """
+        Return the journal's analytics
+        """
+        journal = self.get_object()
+        return Response(get_journal_stats(journal), status=status.HTTP_200_OK)
+
 
 @extend_schema_view(
     create=extend_schema(
@@ -79,6 +245,7 @@ class JournalTableViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = JournalTables.objects.all()
 
+    @transaction.atomic
     def perform_create(self, serializer):
         """
         Create a new journal table
@@ -87,7 +254,25 @@ class JournalTableViewSet(viewsets.ModelViewSet):
 
         if journal is not None:
             serializer.save(journal=journal)
+            # a duplicated table nests the activities copied into it
+            serializer.instance = (
+                self.get_queryset()
+                .prefetch_related(*TABLE_ACTIVITY_RELATIONS)
+                .get(pk=serializer.instance.pk)
+            )
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+        # the update clears the instance's prefetched relations, the response
+        # nests the activities of a fresh one instead
+        serializer.instance = (
+            self.get_queryset()
+            .prefetch_related(*TABLE_ACTIVITY_RELATIONS)
+            .get(pk=serializer.instance.pk)
+        )
+
+    @transaction.atomic
     def perform_destroy(self, instance):
         instance_id = instance.id
         user_journal = Journal.objects.get(user=self.request.user)
@@ -110,11 +295,69 @@ class JournalTableViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         try:
             queryset = self.get_object()
-            serializer = self.get_serializer(queryset)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            table_view = get_compiled_view(queryset.table_view)
+            activities = self.get_table_activities(queryset, table_view)
+            table_data = self.get_table_data(queryset)
+
+            if is_stream_requested(request):
+                return self.stream_retrieve(table_data, activities, table_view)
+
+            paginator = TableActivitiesPagination()
+            paginated = paginator.is_requested(request)
+            if paginated:
+                activities = paginator.paginate_queryset(activities, request, self)
+
+            table_data["activities"] = serializers.JournalTableActivitiesSerializer(
+                activities, many=True, context=self.get_serializer_context()
+            ).data
+            if table_view.group_by == "tags":
+                table_data["groups"] = group_activities_by_tags(
+                    table_data["activities"]
+                )
+
+            if paginated:
+                return paginator.get_paginated_table_response(table_data)
+            return Response(table_data, status=status.HTTP_200_OK)
         except Exception as e:
             raise ValidationError(e)
 
+    def get_table_data(self, instance):
+        return {
+            "id": instance.id,
+            "table_name": instance.table_name,
+            "table_view": instance.table_view,
+            "is_virtual": instance.is_virtual,
+        }
+
+    def get_table_activities(self, instance, table_view):
+        """
+        Return the activities of the table selected and sorted by its view,
+        virtual tables select the activities of every table of the journal
+        """
+        if instance.is_virtual:
+            activities = Activities.objects.filter(
+                journal_table__journal_id=instance.journal_id
+            ).order_by("created", "id")
+        else:
+            activities = Activities.objects.filter(journal_table=instance)
+        return table_view.apply(activities).prefetch_related(*ACTIVITY_RELATIONS)
+
+    def stream_retrieve(self, table_data, activities, table_view):
+        """
+        Stream the table with its activities emitted one at a time, the tag
+        groups of the activities follow them
+        """
+        return StreamingJSONResponse(
+            stream_json_object_with_array(
+                table_data,
+                "activities",
+                activities,
+                serializers.JournalTableActivitiesSerializer,
+                self.get_serializer_context(),
+                collector=TagGroups() if table_view.group_by == "tags" else None,
+            )
+        )
+
     def get_queryset(self):
         """
         Filter queryset to authenticated user
@@ -122,8 +365,11 @@ class JournalTableViewSet(viewsets.ModelViewSet):
         # if id is not None:
         #     return self.queryset.filter(journal__user=self.request.user, id=id)
 
-        queryset = self.queryset
-        return queryset.filter(journal__user=self.request.user)
+        queryset = self.queryset.filter(journal__user=self.request.user)
+        if self.action == "list":
+            # the serializer nests every activity of the tables
+            queryset = queryset.prefetch_related(*TABLE_ACTIVITY_RELATIONS)
+        return queryset
 
 
 @extend_schema_view(
@@ -228,6 +474,11 @@ class JournalTableViewSet(viewsets.ModelViewSet):
         ],
     ),
     batch_tag_processor=extend_schema(exclude=True),
+    autocomplete=extend_schema(
+        description="Endpoint for completing tag names by prefix or similarity",
+        parameters=AUTOCOMPLETE_PARAMETERS,
+        responses=serializers.JournalTagsSerializer(many=True),
+    ),
 )
 class TagsViewSet(BatchRouteMixin, BatchTagRouteMixin, viewsets.ModelViewSet):
     """
@@ -238,6 +489,7 @@ class TagsViewSet(BatchRouteMixin, BatchTagRouteMixin, viewsets.ModelViewSet):
     serializer_class = serializers.TagsSerializer
     permission_classes = [IsAuthenticated]
     queryset = Tags.objects.all()
+    filter_backends = [TagsOrderingFilterBackend]
 
     def perform_create(self, serializer):
         """
@@ -261,6 +513,20 @@ class TagsViewSet(BatchRouteMixin, BatchTagRouteMixin, viewsets.ModelViewSet):
             Q(tag_user=self.request.user) | Q(tag_user__is_superuser=True)
         )
 
+    @action(detail=False, methods=["GET"], url_name="autocomplete")
+    def autocomplete(self, request, *args, **kwargs):
+        text, limit = get_autocomplete_params(request)
+        tags = get_completions(
+            "tags",
+            request.user.id,
+            self.get_queryset(),
+            "tag_name",
+            ["id", "tag_name", "tag_color", "tag_class"],
+            text,
+            limit,
+        )
+        return Response(tags, status=status.HTTP_200_OK)
+
 
 @extend_schema_view(
     create=extend_schema(
@@ -368,6 +634,11 @@ class TagsViewSet(BatchRouteMixin, BatchTagRouteMixin, viewsets.ModelViewSet):
             ),
         ],
     ),
+    autocomplete=extend_schema(
+        description="Endpoint for completing activity names by prefix or similarity",
+        parameters=AUTOCOMPLETE_PARAMETERS,
+        responses=serializers.ActivitiesSearchSerializer(many=True),
+    ),
     batch_delete_activities=extend_schema(
         description="Endpoint for Batch Deleting Activities",
         examples=[
@@ -396,18 +667,53 @@ class ActivitiesViewSet(
     serializer_class = serializers.ActivitiesSerializer
     permission_classes = [IsAuthenticated]
     queryset = Activities.objects.all()
+    filter_backends = [ActivitiesFilterBackend]
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save()
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
+    def list(self, request, *args, **kwargs):
+        if is_stream_requested(request):
+            queryset = self.filter_queryset(self.get_queryset())
+            return StreamingJSONResponse(
+                stream_json_array(
+                    queryset.prefetch_related(*ACTIVITY_RELATIONS),
+                    self.get_serializer_class(),
+                    self.get_serializer_context(),
+                )
+            )
+        return super().list(request, *args, **kwargs)
+
     def get_queryset(self, ids=None):
         if self.request.user.is_authenticated:
+            queryset = self.queryset.filter(owner=self.request.user)
+            # the listed and batch updated activities are serialized with
+            # their relations
             if ids:
-                return self.queryset.filter(
-                    journal_table__journal__user=self.request.user, id__in=ids
-                )
-
-            return self.queryset.filter(journal_table__journal__user=self.request.user)
+                return queryset.filter(id__in=ids).prefetch_related(*ACTIVITY_RELATIONS)
+            if self.action == "list":
+                return queryset.prefetch_related(*ACTIVITY_RELATIONS)
+
+            return queryset
+
+    @action(detail=False, methods=["GET"], url_name="autocomplete")
+    def autocomplete(self, request, *args, **kwargs):
+        text, limit = get_autocomplete_params(request)
+        activities = get_completions(
+            "activities",
+            request.user.id,
+            self.get_queryset(),
+            "name",
+            ["id", "name", "journal_table"],
+            text,
+            limit,
+        )
+        return Response(activities, status=status.HTTP_200_OK)
 
 
 @extend_schema_view(
@@ -419,15 +725,22 @@ class BaseSubModelsViewSet(
     authentication_classes = [ExpiringTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @transaction.atomic
     def perform_create(self, serializer):
         if self.request.user.is_authenticated:
             serializer.save()
 
-    def get_queryset(self):
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
+    def get_queryset(self, ids=None):
         if self.request.user.is_authenticated:
-            return self.queryset.filter(
-                activity__journal_table__journal__user=self.request.user
-            )
+            queryset = self.queryset.filter(owner=self.request.user)
+            # the batch processor selects the submodels of the batch
+            if ids:
+                return queryset.filter(id__in=ids)
+            return queryset
 
 
 @extend_schema_view(
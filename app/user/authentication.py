@@ -2,19 +2,42 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 from rest_framework import authentication, exceptions
 from rest_framework.authtoken.models import Token
+from django.db import DEFAULT_DB_ALIAS
+from core.metrics import registry
+from core.routers import read_alias
+
+TOKEN_LIFETIME = timedelta(hours=72)
 
 class ExpiringTokenAuthentication(authentication.TokenAuthentication):
     def authenticate_credentials(self,key):
         try:
-            token = self.get_model().objects.get(key=key)
+            # the user is checked below, fetched with the token in one query
+            token = self.get_model().objects.select_related("user").get(key=key)
         except self.get_model().DoesNotExist:
-            raise exceptions.AuthenticationFailed("Invalid Or Expired Token Provided")
+            # a token created on the primary may not be on the replica yet
+            token = None
+            if read_alias.get():
+                token = (
+                    self.get_model()
+                    .objects.using(DEFAULT_DB_ALIAS)
+                    .select_related("user")
+                    .filter(key=key)
+                    .first()
+                )
+            if token is None:
+                registry.inc("journal_token_auth_total", result="invalid")
+                raise exceptions.AuthenticationFailed(
+                    "Invalid Or Expired Token Provided"
+                )
         
         if not token.user.is_active:
+            registry.inc("journal_token_auth_total", result="inactive")
             raise exceptions.AuthenticationFailed("Inactive User")
         
         current_time = timezone.now()
 
-        if token.created < current_time - timedelta(hours=72):
+        if token.created < current_time - TOKEN_LIFETIME:
+            registry.inc("journal_token_auth_total", result="expired")
             raise exceptions.AuthenticationFailed("Token has Expired")
+        registry.inc("journal_token_auth_total", result="valid")
         return token.user, token
\ No newline at end of file
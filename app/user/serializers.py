@@ -8,17 +8,19 @@ from django.contrib.auth.password_validation import validate_password
 from django.utils.encoding import force_str
 from django.utils.http import urlsafe_base64_decode as uid_decoder
 from django.contrib.auth.tokens import default_token_generator
+from django.db import transaction
 from rest_framework import serializers, exceptions
 from dj_rest_auth.serializers import (
     PasswordResetSerializer,
     PasswordResetConfirmSerializer,
 )
 from core.models import Journal
+from core.timing import TimedRepresentationMixin
 from journal.config import JOURNAL_DESCRIPTION, DEFAULT_JOURNAL_NAME
 from journal.serializers import JournalSerializer
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for the User Object
     """
@@ -111,9 +113,11 @@ class UserCreateSerializer(serializers.ModelSerializer):
         except Exception as e:
             raise exceptions.ValidationError(e)
 
+    @transaction.atomic
     def create(self, validated_data):
         """
-        Create and return a user with encrypted password
+        Create and return a user with encrypted password, with the default
+        journal and its counters committed together
         """
         validated_data.pop("password2")
 
@@ -6,6 +6,8 @@ if [ $DEV != "true" ]; then
     python manage.py wait_for_db
     python manage.py collectstatic --noinput
     python manage.py migrate
+    # the workers' metrics files are summed, drop the previous server's
+    rm -rf "${METRICS_DIR:-/vol/journalweb/metrics}"
 
     uwsgi --http-socket 0.0.0.0:9008 --workers 4 --master --enable-threads --module app.wsgi
 fi